@@ -1,3 +1,23 @@
-from .conav_suite import env
+import importlib
 
-__version__ = "0.0.1"
\ No newline at end of file
+__version__ = "0.0.1"
+
+# public names are resolved on first access, so importing the package does not load gymnasium or pettingzoo
+_lazy_attributes = {
+    'env': '.conav_suite',
+    'parallel_env': '.conav_suite',
+    'state_batch': '.conav_suite',
+    'VectorWorld': '.utils.core',
+}
+
+
+def __getattr__(name):
+    if name not in _lazy_attributes:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_lazy_attributes[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_attributes))
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+
+import numpy as np
+from gymnasium.utils import seeding
+
+from .conav_suite import Scenario
+from .utils.problems import get_problem_list
+
+CONFIG_FILE = 'bank.json'
+
+
+# Structured record holding one initial state, tagged by the seed that generated it
+def bank_dtype(num_agents, num_large_obstacles, num_small_obstacles):
+    return np.dtype([
+        ('seed', np.int64),
+        ('agents', np.float64, (num_agents, 2)),
+        ('goals', np.float64, (num_agents, 2)),
+        ('large_obstacles', np.float64, (num_large_obstacles, 2)),
+        ('small_obstacles', np.float64, (num_small_obstacles, 2)),
+    ])
+
+
+# Pre-generate num_states initial states per problem instance; state i is exactly what
+# env.reset(seed=seed + i) produces for an env built with the same arguments
+def generate_reset_bank(
+    path,
+    num_states,
+    problem_instances=None,
+    seed=0,
+    num_agents=1,
+    num_large_obstacles=4,
+    large_obstacle_radius=0.05,
+    num_small_obstacles=10,
+    small_obstacle_radius=0.02,
+):
+    problem_instances = get_problem_list() if problem_instances is None else list(problem_instances)
+    os.makedirs(path, exist_ok=True)
+
+    config = {
+        'num_states': num_states,
+        'problem_instances': problem_instances,
+        'seed': seed,
+        'num_agents': num_agents,
+        'num_large_obstacles': num_large_obstacles,
+        'large_obstacle_radius': large_obstacle_radius,
+        'num_small_obstacles': num_small_obstacles,
+        'small_obstacle_radius': small_obstacle_radius,
+        'problem_list': get_problem_list(),
+    }
+
+    scenario = Scenario()
+    world = scenario.make_world(num_agents, num_large_obstacles, large_obstacle_radius, num_small_obstacles, small_obstacle_radius)
+    dtype = bank_dtype(num_agents, num_large_obstacles, num_small_obstacles)
+
+    for problem_instance in problem_instances:
+        states = np.lib.format.open_memmap(
+            os.path.join(path, f"{problem_instance}.npy"), mode='w+', dtype=dtype, shape=(num_states,)
+        )
+        for i in range(num_states):
+            np_random, _ = seeding.np_random(seed + i)
+            scenario.reset_world(world, np_random, problem_instance)
+
+            states['seed'][i] = seed + i
+            states['agents'][i] = [agent.state.p_pos for agent in world.agents]
+            states['goals'][i] = [goal.state.p_pos for goal in world.goals]
+            states['large_obstacles'][i] = [obstacle.state.p_pos for obstacle in world.large_obstacles]
+            states['small_obstacles'][i] = [obstacle.state.p_pos for obstacle in world.small_obstacles]
+        states.flush()
+        del states
+
+    with open(os.path.join(path, CONFIG_FILE), 'w') as file:
+        json.dump(config, file, indent=2)
+
+    return ResetBank(path)
+
+
+class ResetBank:  # memory-mapped initial states, one array file per problem instance
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, CONFIG_FILE)) as file:
+            self.config = json.load(file)
+        self.problem_instances = self.config['problem_instances']
+        self._states = {}
+
+    def __contains__(self, problem_instance):
+        return problem_instance in self.problem_instances
+
+    # Memory-mapped (num_states,) structured array for a problem instance
+    def __getitem__(self, problem_instance):
+        if problem_instance not in self._states:
+            if problem_instance not in self:
+                raise KeyError(f"Reset bank has no states for problem_instance '{problem_instance}'.")
+            self._states[problem_instance] = np.load(
+                os.path.join(self.path, f"{problem_instance}.npy"), mmap_mode='r'
+            )
+        return self._states[problem_instance]
+
+    def __len__(self):
+        return self.config['num_states']
+
+    # Copy state bank_index of problem_instance into the world
+    def reset_world(self, scenario, world, problem_instance, bank_index):
+        states = self[problem_instance]
+        expected = bank_dtype(len(world.agents), world.num_large_obstacles, len(world.small_obstacles))
+        if states.dtype != expected:
+            raise ValueError("Reset bank was generated for a different number of agents or obstacles.")
+        # the cached positions keep clearances that only hold for the radii they were sampled with
+        config = self.config
+        radii = (world.large_obstacle_radius, world.small_obstacle_radius)
+        if (config['large_obstacle_radius'], config['small_obstacle_radius']) != radii:
+            raise ValueError("Reset bank was generated for different obstacle radii.")
+        if config.get('problem_list', world.problem_list) != world.problem_list:
+            raise ValueError("Reset bank was generated for a different problem list.")
+
+        state = states[bank_index]
+        scenario.reset_world_from_state(
+            world,
+            problem_instance,
+            state['agents'],
+            state['goals'],
+            state['large_obstacles'],
+            state['small_obstacles'],
+        )
+        return int(state['seed'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate a bank of conav_suite initial states.")
+    parser.add_argument('path', help="Output directory")
+    parser.add_argument('--num-states', type=int, required=True)
+    parser.add_argument('--problem-instances', nargs='+', default=None, choices=get_problem_list())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--num-agents', type=int, default=1)
+    parser.add_argument('--num-large-obstacles', type=int, default=4)
+    parser.add_argument('--large-obstacle-radius', type=float, default=0.05)
+    parser.add_argument('--num-small-obstacles', type=int, default=10)
+    parser.add_argument('--small-obstacle-radius', type=float, default=0.02)
+    args = parser.parse_args()
+
+    generate_reset_bank(
+        args.path,
+        args.num_states,
+        problem_instances=args.problem_instances,
+        seed=args.seed,
+        num_agents=args.num_agents,
+        num_large_obstacles=args.num_large_obstacles,
+        large_obstacle_radius=args.large_obstacle_radius,
+        num_small_obstacles=args.num_small_obstacles,
+        small_obstacle_radius=args.small_obstacle_radius,
+    )
+
+
+if __name__ == '__main__':
+    main()
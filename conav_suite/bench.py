@@ -0,0 +1,335 @@
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from .conav_suite import env as aec_env, parallel_env, raw_env
+from .utils.problems import get_problem_list
+from .vector import AsyncVectorEnv
+
+MODES = ('aec', 'parallel', 'vectorized', 'startup', 'planner')
+
+
+# p50/p99/mean latency in microseconds of a list of perf_counter_ns durations
+def summarize(durations_ns):
+    durations = np.asarray(durations_ns, dtype=np.float64) / 1e3
+    if len(durations) == 0:
+        return {'count': 0, 'p50_us': None, 'p99_us': None, 'mean_us': None}
+    return {
+        'count': len(durations),
+        'p50_us': float(np.percentile(durations, 50)),
+        'p99_us': float(np.percentile(durations, 99)),
+        'mean_us': float(durations.mean()),
+    }
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter_ns()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter_ns() - start
+
+
+def _per_second(count, durations_ns):
+    total = sum(durations_ns)
+    return count * 1e9 / total if total else None
+
+
+# Latency of reset, a single agent's step, observe and state() through the wrapped AEC env
+def bench_aec(problem_instance, num_steps, num_resets, seed, env_kwargs):
+    env = aec_env(**env_kwargs)
+    np_random = np.random.default_rng(seed)
+    options = {'problem_instance': problem_instance}
+
+    reset_times, state_times = [], []
+    for i in range(num_resets):
+        _, duration = _timed(env.reset, seed=seed + i, options=options)
+        reset_times.append(duration)
+        state_times.append(_timed(env.state)[1])
+
+    env.reset(seed=seed, options=options)
+    step_times, observe_times = [], []
+    num_actions = env.action_space(env.possible_agents[0]).n
+    while len(step_times) < num_steps:
+        # the AEC cycle assumes every agent is alive, so episodes restart as soon as any agent is done
+        if not env.agents or any(env.terminations.values()) or any(env.truncations.values()):
+            env.reset(options=options)
+        agent = env.agent_selection
+        observe_times.append(_timed(env.observe, agent)[1])
+        step_times.append(_timed(env.step, int(np_random.integers(num_actions)))[1])
+    env.close()
+
+    return {
+        'steps_per_sec': _per_second(len(step_times) / len(env.possible_agents), step_times),
+        'resets_per_sec': _per_second(num_resets, reset_times),
+        'reset': summarize(reset_times),
+        'step': summarize(step_times),
+        'observe': summarize(observe_times),
+        'state': summarize(state_times),
+    }
+
+
+# Latency of reset, a joint step of all agents, and rgb_array rendering through the parallel env
+def bench_parallel(problem_instance, num_steps, num_resets, seed, env_kwargs):
+    env = parallel_env(render_mode='rgb_array', **env_kwargs)
+    np_random = np.random.default_rng(seed)
+    options = {'problem_instance': problem_instance}
+
+    reset_times = [_timed(env.reset, seed=seed + i, options=options)[1] for i in range(num_resets)]
+
+    env.reset(seed=seed, options=options)
+    step_times, render_times = [], []
+    num_actions = env.action_space(env.possible_agents[0]).n
+    while len(step_times) < num_steps:
+        if not env.agents:
+            env.reset(options=options)
+        actions = {agent: int(np_random.integers(num_actions)) for agent in env.agents}
+        step_times.append(_timed(env.step, actions)[1])
+        if env.agents:
+            render_times.append(_timed(env.render)[1])
+    env.close()
+
+    return {
+        'steps_per_sec': _per_second(len(step_times), step_times),
+        'resets_per_sec': _per_second(num_resets, reset_times),
+        'render_fps': _per_second(len(render_times), render_times),
+        'reset': summarize(reset_times),
+        'step': summarize(step_times),
+        'render': summarize(render_times),
+    }
+
+
+# Latency of a batched step of num_envs worker processes, counting world steps across all workers
+def bench_vectorized(problem_instance, num_steps, num_resets, seed, env_kwargs, num_envs=4):
+    venv = AsyncVectorEnv(num_envs, problem_instance, env_fn=raw_env, env_kwargs=env_kwargs)
+    np_random = np.random.default_rng(seed)
+    try:
+        reset_times = [_timed(venv.reset, seed=seed + i * num_envs)[1] for i in range(num_resets)]
+
+        num_actions = venv.action_space.n
+        step_times = []
+        for _ in range(max(num_steps // num_envs, 1)):
+            actions = np_random.integers(num_actions, size=(num_envs, venv.num_agents))
+            step_times.append(_timed(venv.step, actions)[1])
+    finally:
+        venv.close()
+
+    return {
+        'num_envs': num_envs,
+        'steps_per_sec': _per_second(len(step_times) * num_envs, step_times),
+        'resets_per_sec': _per_second(num_resets * num_envs, reset_times),
+        'reset': summarize(reset_times),
+        'step': summarize(step_times),
+    }
+
+
+# Time to import the env module and construct the first env in a fresh interpreter, and in-process env construction
+# latency; num_steps and the problem instance are unused
+def bench_startup(problem_instance, num_steps, num_resets, seed, env_kwargs):
+    # conav_suite itself loads lazily, so the fresh interpreter imports the env module the first env() call would load
+    code = (
+        "import json, sys, time; start = time.perf_counter_ns(); import conav_suite.conav_suite as module; "
+        "module.raw_env(**json.loads(sys.argv[1])); print(time.perf_counter_ns() - start)"
+    )
+    output = subprocess.run([sys.executable, '-c', code, json.dumps(env_kwargs)], check=True, capture_output=True, text=True).stdout
+    construct_times = [_timed(raw_env, **env_kwargs)[1] for _ in range(num_resets)]
+
+    return {
+        'first_env': summarize([int(output)]),
+        'construct': summarize(construct_times),
+    }
+
+
+# Expert trajectories of the path planner towards goals drawn anew every episode: each of num_resets episodes resets
+# the env, builds its planner and rolls out num_queries start/goal pairs sampled in its free space; num_steps is unused
+def bench_planner(problem_instance, num_steps, num_resets, seed, env_kwargs, num_queries=64):
+    env = raw_env(**env_kwargs)
+    np_random = np.random.default_rng(seed)
+    options = {'problem_instance': problem_instance}
+
+    episode_times, build_times, action_times = [], [], []
+    num_reached = 0
+    for i in range(num_resets):
+        _, reset_time = _timed(env.reset, seed=seed + i, options=options)
+        planner, build_time = _timed(env.path_planner)
+        sdf = env.signed_distance_field()
+        points = np.empty((0, 2))
+        while len(points) < 2 * num_queries:
+            samples = np_random.uniform(-1.0, 1.0, size=(4 * num_queries, 2))
+            points = np.concatenate((points, samples[sdf.is_free(samples, margin=planner.clearance)]))
+        (_, _, reached), action_time = _timed(planner.actions, points[:num_queries], points[num_queries:2 * num_queries])
+
+        episode_times.append(reset_time + build_time + action_time)
+        build_times.append(build_time)
+        action_times.append(action_time)
+        num_reached += int(reached.sum())
+    env.close()
+
+    return {
+        'num_queries': num_queries,
+        'trajectories_per_sec': _per_second(num_resets * num_queries, episode_times),
+        'reached': num_reached / (num_resets * num_queries),
+        'episode': summarize(episode_times),
+        'build': summarize(build_times),
+        'actions': summarize(action_times),
+    }
+
+
+_BENCHMARKS = {
+    'aec': bench_aec,
+    'parallel': bench_parallel,
+    'vectorized': bench_vectorized,
+    'startup': bench_startup,
+    'planner': bench_planner,
+}
+
+
+# Benchmark every combination of problem instance, entity counts and execution mode
+def run_benchmarks(
+    problem_instances=None,
+    num_agents=(1, 4),
+    num_small_obstacles=(10, 100),
+    num_large_obstacles=(4,),
+    modes=MODES,
+    num_steps=200,
+    num_resets=20,
+    num_envs=4,
+    num_queries=64,
+    seed=0,
+):
+    problem_instances = get_problem_list() if problem_instances is None else list(problem_instances)
+    for mode in modes:
+        if mode not in _BENCHMARKS:
+            raise ValueError(f"Unknown benchmark mode '{mode}', expected one of {MODES}.")
+
+    results = []
+    grid = itertools.product(modes, problem_instances, num_agents, num_small_obstacles, num_large_obstacles)
+    for mode, problem_instance, agents, small_obstacles, large_obstacles in grid:
+        env_kwargs = {
+            'num_agents': agents,
+            'num_small_obstacles': small_obstacles,
+            'num_large_obstacles': large_obstacles,
+        }
+        kwargs = {'vectorized': {'num_envs': num_envs}, 'planner': {'num_queries': num_queries}}.get(mode, {})
+        metrics = _BENCHMARKS[mode](problem_instance, num_steps, num_resets, seed, env_kwargs, **kwargs)
+        results.append({'mode': mode, 'problem_instance': problem_instance, **env_kwargs, 'metrics': metrics})
+
+    return {
+        'config': {
+            'num_steps': num_steps,
+            'num_resets': num_resets,
+            'num_envs': num_envs,
+            'num_queries': num_queries,
+            'seed': seed,
+        },
+        'machine': {
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+
+
+def _result_key(result):
+    return (
+        result['mode'],
+        result['problem_instance'],
+        result['num_agents'],
+        result['num_small_obstacles'],
+        result['num_large_obstacles'],
+    )
+
+
+# p50 latencies that got slower than the baseline by more than tolerance (a fraction), matched by configuration
+def compare(report, baseline, tolerance=0.1):
+    baseline_results = {_result_key(result): result for result in baseline['results']}
+
+    regressions = []
+    for result in report['results']:
+        reference = baseline_results.get(_result_key(result))
+        if reference is None:
+            continue
+        for name, summary in result['metrics'].items():
+            reference_summary = reference['metrics'].get(name)
+            if not isinstance(summary, dict) or not isinstance(reference_summary, dict):
+                continue
+            current, previous = summary['p50_us'], reference_summary['p50_us']
+            if current is None or not previous:
+                continue
+            ratio = current / previous
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    'mode': result['mode'],
+                    'problem_instance': result['problem_instance'],
+                    'num_agents': result['num_agents'],
+                    'num_small_obstacles': result['num_small_obstacles'],
+                    'num_large_obstacles': result['num_large_obstacles'],
+                    'metric': name,
+                    'baseline_p50_us': previous,
+                    'p50_us': current,
+                    'ratio': ratio,
+                })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark conav_suite step, reset, observe, state and render throughput.")
+    parser.add_argument('--output', default=None, help="Write the JSON report to this file instead of stdout")
+    parser.add_argument('--baseline', default=None, help="JSON report to compare p50 latencies against")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="Allowed p50 slowdown over the baseline, as a fraction")
+    parser.add_argument('--problem-instances', nargs='+', default=None, choices=get_problem_list())
+    parser.add_argument('--num-agents', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--num-small-obstacles', nargs='+', type=int, default=[10, 100])
+    parser.add_argument('--num-large-obstacles', nargs='+', type=int, default=[4])
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--num-steps', type=int, default=200)
+    parser.add_argument('--num-resets', type=int, default=20)
+    parser.add_argument('--num-envs', type=int, default=4)
+    parser.add_argument('--num-queries', type=int, default=64, help="Start/goal pairs planned per episode in the planner mode")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        problem_instances=args.problem_instances,
+        num_agents=args.num_agents,
+        num_small_obstacles=args.num_small_obstacles,
+        num_large_obstacles=args.num_large_obstacles,
+        modes=args.modes,
+        num_steps=args.num_steps,
+        num_resets=args.num_resets,
+        num_envs=args.num_envs,
+        num_queries=args.num_queries,
+        seed=args.seed,
+    )
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        report['regressions'] = regressions
+
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    for regression in regressions:
+        print(
+            f"regression: {regression['mode']} {regression['problem_instance']} "
+            f"agents={regression['num_agents']} small={regression['num_small_obstacles']} "
+            f"large={regression['num_large_obstacles']} {regression['metric']} "
+            f"p50 {regression['baseline_p50_us']:.1f}us -> {regression['p50_us']:.1f}us",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
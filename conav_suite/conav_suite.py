@@ -1,16 +1,15 @@
-import random
 import numpy as np
-import matplotlib.path as mpath
 
 from functools import partial
 from .utils.scenario import BaseScenario
-from .utils.simple_env import SimpleEnv, make_env
+from .utils.lidar import Lidar
+from .utils.simple_env import SimpleEnv, make_env, make_parallel_env
+from .utils.spatial import UniformGrid
 from .utils.core import Agent, Goal, Obstacle, World
+from .utils.geometry import get_instance_geometry
 from .utils.problems import get_problem_list, get_problem_instance
 
-from gymnasium.utils import EzPickle
-
-random.seed(42)
+from gymnasium.utils import EzPickle, seeding
 
 class raw_env(SimpleEnv, EzPickle):
     def __init__(
@@ -22,25 +21,135 @@ class raw_env(SimpleEnv, EzPickle):
         small_obstacle_radius=0.02,
         render_mode=None,
         max_cycles=100,
+        spatial_index_threshold=128,
+        reset_bank=None,
+        fused_step=False,
+        render_size=700,
+        profile=False,
+        profile_infos=False,
+        reward_function=None,
+        num_nearest_obstacles=None,
+        sensing_radius=0.25,
+        num_lidar_rays=None,
+        lidar_range=0.5,
+        lidar_targets=('small_obstacles',),
+        large_obstacle_capacity=None,
         ):
         
-        if num_large_obstacles > 10:
+        if max(num_large_obstacles, large_obstacle_capacity or 0) > 10:
             raise ValueError("conav_suite has a maximum of 10 large obstacles.")
         
-        scenario = Scenario()
-        world = scenario.make_world(num_agents, num_large_obstacles, large_obstacle_radius, num_small_obstacles, small_obstacle_radius)
+        lidar = None if num_lidar_rays is None else Lidar(num_lidar_rays, lidar_range, lidar_targets)
+        scenario = Scenario(num_nearest_obstacles, sensing_radius, lidar)
+        world = scenario.make_world(
+            num_agents, num_large_obstacles, large_obstacle_radius, num_small_obstacles, small_obstacle_radius, large_obstacle_capacity
+        )
         
         super().__init__(
             scenario=scenario, 
             world=world, 
             render_mode=render_mode,
             max_cycles=max_cycles, 
+            spatial_index_threshold=spatial_index_threshold,
+            reset_bank=reset_bank,
+            fused_step=fused_step,
+            render_size=render_size,
+            profile=profile,
+            profile_infos=profile_infos,
+            reward_function=reward_function,
         )
         
 env = make_env(raw_env)
+parallel_env = make_parallel_env(raw_env)
+
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+
+# SplitMix64 finalizer, applied elementwise to uint64 arrays
+def _mix64(x):
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+# Uniforms in [0, 1) of shape (R, size) from counter-based streams: every seed key of shape (R,) has an independent
+# stream per lane, and attempt selects the block of draws, so no generator state is shared between rows
+def _stream_uniform(seed_keys, lane, attempt, size):
+    with np.errstate(over='ignore'):
+        stream = _mix64(seed_keys ^ _mix64((np.asarray(lane, dtype=np.uint64) + np.uint64(1)) * _GOLDEN_GAMMA))
+        counter = np.uint64(attempt * size) + np.arange(1, size + 1, dtype=np.uint64)
+        bits = _mix64(stream[:, None] + counter * _GOLDEN_GAMMA)
+    return (bits >> np.uint64(11)) * 2.0 ** -53
+
+
+# Initial states (agents, goals, large obstacles) of shape (B, state_dim) for a batch of seeds, without building environments.
+# Rows are sampled for the whole batch at once, row i from random streams derived from seeds[i] only, so a seed gives
+# the same row wherever it appears in the batch; with exact=True, row i is instead env.reset(seed=seeds[i]).state()
+# of an env with the same arguments (much slower). With a large_obstacle_capacity, rows have the pooled state layout
+def state_batch(
+    problem_instance,
+    seeds,
+    num_agents=1,
+    num_large_obstacles=4,
+    large_obstacle_radius=0.05,
+    small_obstacle_radius=0.02,
+    exact=False,
+    dtype=np.float32,
+    large_obstacle_capacity=None,
+):
+    if problem_instance not in get_problem_list():
+        raise ValueError("problem_instance must be in the problem_list.")
+    if max(num_large_obstacles, large_obstacle_capacity or 0) > 10:
+        raise ValueError("conav_suite has a maximum of 10 large obstacles.")
+
+    seeds = np.asarray(seeds, dtype=np.int64).reshape(-1)
+    scenario = Scenario()
+    # small obstacles are sampled after everything in the state, so they are left out
+    world = scenario.make_world(
+        num_agents, num_large_obstacles, large_obstacle_radius, 0, small_obstacle_radius, large_obstacle_capacity
+    )
+    pooled = large_obstacle_capacity is not None
+    num_slots = len(world.large_obstacles)
+
+    if exact:
+        states = np.empty((len(seeds), 2 * (2 * num_agents + num_slots) + pooled * num_slots), dtype=dtype)
+        for i, seed in enumerate(seeds):
+            np_random, _ = seeding.np_random(int(seed))
+            scenario._set_problem_instance(world, problem_instance)
+            scenario._reset_agents_and_goals(world, np_random)
+            scenario._reset_large_obstacles(world, np_random)
+            state = (world.agent_pos, world.goal_pos, world.large_obstacle_pos) + ((world.large_obstacle_mask,) if pooled else ())
+            states[i] = np.concatenate(state, axis=None)
+        return states
+
+    agents, goals, large_obstacles = scenario.sample_initial_states(world, problem_instance, seeds)
+    batch = [agents, goals, large_obstacles]
+    if pooled:
+        # inactive slots are zero rows, followed by the active flag of every slot
+        padding = np.zeros((len(seeds), num_slots - num_large_obstacles, 2))
+        batch[2] = np.concatenate((large_obstacles, padding), axis=1)
+        batch.append(np.broadcast_to(world.large_obstacle_mask, (len(seeds), num_slots)))
+    return np.concatenate([values.reshape(len(seeds), -1) for values in batch], axis=1).astype(dtype)
 
 class Scenario(BaseScenario):
-    def make_world(self, num_agents, num_large_obstacles, large_obstacle_radius, num_small_obstacles, small_obstacle_radius):
+    # With num_nearest_obstacles, ground agents observe the k nearest small obstacles within sensing_radius,
+    # and with a lidar they observe its range scan instead of every small obstacle; both keep the observation
+    # size independent of num_small_obstacles
+    def __init__(self, num_nearest_obstacles=None, sensing_radius=0.25, lidar=None):
+        if num_nearest_obstacles is not None and num_nearest_obstacles < 1:
+            raise ValueError("num_nearest_obstacles must be at least 1.")
+        if num_nearest_obstacles is not None and lidar is not None:
+            raise ValueError("Ground agents observe either the nearest small obstacles or a lidar scan, not both.")
+        self.num_nearest_obstacles = num_nearest_obstacles
+        self.sensing_radius = sensing_radius
+        self.lidar = lidar
+
+    # With a large_obstacle_capacity, a pool of that many large obstacles is allocated once and every episode
+    # activates num_large_obstacles of them unless told otherwise, so the number can vary between episodes
+    def make_world(self, num_agents, num_large_obstacles, large_obstacle_radius, num_small_obstacles, small_obstacle_radius, large_obstacle_capacity=None):
+        if large_obstacle_capacity is not None and large_obstacle_capacity < num_large_obstacles:
+            raise ValueError("large_obstacle_capacity must be at least num_large_obstacles.")
         world = World(large_obstacle_radius, small_obstacle_radius)
         world.problem_list = get_problem_list()
 
@@ -58,7 +167,9 @@ class Scenario(BaseScenario):
             world.goals.append(goal)
         
         # Large obstacles can only be observed by aerial agent
-        for i in range(num_large_obstacles):
+        world.num_large_obstacles = num_large_obstacles
+        world.large_obstacle_capacity = large_obstacle_capacity
+        for i in range(num_large_obstacles if large_obstacle_capacity is None else large_obstacle_capacity):
             obstacle = Obstacle(radius=large_obstacle_radius)
             obstacle.name = f"obs_{i}"
             obstacle.color = np.array([0.97, 0.801, 0.8])
@@ -71,50 +182,122 @@ class Scenario(BaseScenario):
             obstacle.color = np.array([0.97, 0.801, 0.8])
             world.small_obstacles.append(obstacle)    
         
-        world.buffer_dist = world.agents[0].radius + world.large_obstacles[0].radius
+        world.buffer_dist = world.agents[0].radius + world.large_obstacle_radius
+        world.bind_entities()
+        world.large_obstacle_mask[num_large_obstacles:] = False
+        self._build_observation_layout(world)
         return world
     
+    # Activate num_obstacles more large obstacles of the preallocated pool
     def add_large_obstacles(self, world, num_obstacles):
-        for i in range(num_obstacles):
-            obstacle = Obstacle(radius=world.large_obstacle_radius)
-            obstacle.name = f"obs_{i}"
-            obstacle.color = np.array([0.97, 0.801, 0.8])
-            world.large_obstacles.append(obstacle)
+        inactive = np.flatnonzero(~world.large_obstacle_mask)
+        if num_obstacles > len(inactive):
+            raise ValueError(
+                f"Cannot add {num_obstacles} large obstacles, only {len(inactive)} of the "
+                f"{len(world.large_obstacles)} preallocated ones are inactive."
+            )
+        world.large_obstacle_mask[inactive[:num_obstacles]] = True
     
     # Get constraints on entities given problem instance name
     def _set_problem_instance(self, world, instance_name):
         instance_constr = get_problem_instance(instance_name)
         world.problem_instance = instance_name
         world.instance_constr = instance_constr
+        world.instance_geometry = get_instance_geometry(instance_name)
     
-    # Generate valid points according to some condition
-    def _generate_position(self, np_random, condition):
-        while True:
-            point = np_random.uniform(-1, +1, 2)
-            if condition(point):
-                break
-        return point
-    
-    # Check if point is outside of circular obstacle regions
-    def _outside_circles(self, point, centers_radii, epsilon):
-        return not any(np.linalg.norm(point - center) <= radius + epsilon for center, radius in centers_radii)
+    # Generate num_points valid points by drawing candidate blocks and filtering them with a vectorized condition
+    def _generate_positions(self, np_random, condition, num_points, block_size=64):
+        positions = np.empty((num_points, 2))
+        count = 0
+        while count < num_points:
+            candidates = np_random.uniform(-1, +1, (max(block_size, 2 * (num_points - count)), 2))
+            valid = candidates[condition(candidates)]
+            take = min(len(valid), num_points - count)
+            positions[count : count + take] = valid[:take]
+            count += take
+        return positions
     
-    # Check if point is outside of rectangular obstacle regions
-    def _outside_rectangle(self, point, x_constraints, y_constraints, epsilon):
-        within_constraints = any(
-            (low_x - epsilon <= point[0] <= high_x + epsilon) and (low_y - epsilon <= point[1] <= high_y + epsilon)
-            for (low_x, high_x), (low_y, high_y) in zip(x_constraints, y_constraints)
-        )
-        return not within_constraints
+    # Vectorized check of which points lie outside the problem instance regions dilated by epsilon
+    def _outside_instance(self, world, points, epsilon):
+        return ~world.instance_geometry.offset(epsilon).contains(points)
+
+    # Batched counterpart of _reset_agents_and_goals and _reset_large_obstacles: positions of shape (B, N, 2),
+    # (B, N, 2) and (B, L, 2) drawn from the same distributions for a batch of seeds at once. Every quantity draws
+    # from its own lane of the seed's streams, so each row only depends on its seed
+    def sample_initial_states(self, world, problem_instance, seeds):
+        geometry = get_instance_geometry(problem_instance)
+        num_agents = len(world.agents)
+        num_large_obstacles = int(world.large_obstacle_mask.sum())
+        batch_size = len(seeds)
+        with np.errstate(over='ignore'):
+            keys = _mix64(np.asarray(seeds).astype(np.uint64) * _GOLDEN_GAMMA)
+
+        # agents and goals lie outside the regions dilated by the agent radius; lane j holds point j of every row
+        num_points = 2 * num_agents
+        rows = np.repeat(np.arange(batch_size), num_points)
+        lanes = np.tile(np.arange(num_points), batch_size)
+        outside = geometry.offset(world.agents[0].radius).contains
+        positions = 2 * _stream_uniform(keys[rows], lanes, 0, 2) - 1
+        invalid = np.flatnonzero(outside(positions))
+        attempt = 1
+        while len(invalid):
+            positions[invalid] = 2 * _stream_uniform(keys[rows[invalid]], lanes[invalid], attempt, 2) - 1
+            invalid = invalid[outside(positions[invalid])]
+            attempt += 1
+        positions = positions.reshape(batch_size, num_points, 2)
+
+        # each consecutive group of num_shapes obstacles occupies distinct shapes of the eroded regions
+        shapes = geometry.offset(-world.large_obstacle_radius)
+        num_shapes = len(shapes)
+        occupied = np.zeros((batch_size, num_shapes), dtype=bool)
+        large_obstacles = np.empty((batch_size, num_large_obstacles, 2))
+        for i in range(num_large_obstacles):
+            if i % num_shapes == 0:
+                occupied[:] = False
+            pos = large_obstacles[:, i]
+            invalid = np.arange(batch_size)
+            attempt = 0
+            while len(invalid):
+                uniforms = _stream_uniform(keys[invalid], num_points + i, attempt, 4)
+                points, accepted = self._propose_in_shapes(shapes, occupied[invalid], uniforms)
+                idx = shapes.shape_index(points)
+                accepted &= (idx >= 0) & ~occupied[invalid, np.maximum(idx, 0)]
+                pos[invalid[accepted]] = points[accepted]
+                invalid = invalid[~accepted]
+                attempt += 1
+            occupied[np.arange(batch_size), shapes.shape_index(pos)] = True
+
+        # the sampled order is assigned to the obstacles through a random permutation per episode
+        order = np.argsort(_stream_uniform(keys, num_points + num_large_obstacles, 0, num_large_obstacles), axis=1)
+        shuffled = np.empty_like(large_obstacles)
+        np.put_along_axis(shuffled, order[..., None], large_obstacles, axis=1)
+
+        return positions[:, 0::2], positions[:, 1::2], shuffled
+
+    # Uniform proposals over the union of the unoccupied shapes' bounding boxes clipped to the arena, one per row of
+    # occupied (R, S) from the uniforms (R, 4); points covered by several boxes are kept with probability 1 / coverage
+    # so the union stays uniform
+    def _propose_in_shapes(self, shapes, occupied, uniforms):
+        lows = np.clip(shapes.lows, -1, +1)
+        highs = np.clip(shapes.highs, -1, +1)
+        weights = np.where(occupied, 0.0, np.prod(highs - lows, axis=1))
+
+        cumulative = np.cumsum(weights, axis=1)
+        u = uniforms[:, 0] * cumulative[:, -1]
+        box = np.minimum(np.sum(cumulative <= u[:, None], axis=1), len(shapes) - 1)
+        points = lows[box] + uniforms[:, 1:3] * (highs[box] - lows[box])
+
+        coverage = np.sum(np.all((lows <= points[:, None]) & (points[:, None] <= highs), axis=-1) & ~occupied, axis=1)
+        accepted = uniforms[:, 3] * coverage < 1
+        return points, accepted
 
     # Reset agents and goals to their initial positions
     def _reset_agents_and_goals(self, world, np_random):
         epsilon = world.agents[0].radius
-        
-        if world.problem_instance in ['bisect', 'cross', 'staggered', 'quarters']:
-            # Used for problem instances composed of rectangles
-            x_constraints = [constr[0] for constr in world.instance_constr]
-            y_constraints = [constr[1] for constr in world.instance_constr]
+        condition = partial(self._outside_instance, world, epsilon=epsilon)
+
+        # agent and goal positions are drawn interleaved, one pair per agent
+        positions = self._generate_positions(np_random, condition, 2 * len(world.agents))
 
         for i, agent in enumerate(world.agents):
             agent.goal = world.goals[i]
@@ -122,128 +305,192 @@ class Scenario(BaseScenario):
             agent.state.p_vel = np.zeros(world.dim_p)
             agent.goal.state.p_vel = np.zeros(world.dim_p)
 
-            if world.problem_instance in ['circle', 'corners', 'scatter', 'stellaris']:
-                condition = partial(
-                    self._outside_circles,
-                    centers_radii=world.instance_constr,
-                    epsilon=epsilon,
-                    )
-            else:
-                condition = partial(
-                    self._outside_rectangle, 
-                    x_constraints=x_constraints, 
-                    y_constraints=y_constraints,
-                    epsilon=epsilon, 
-                    )
-
-            agent.state.p_pos = self._generate_position(np_random, condition)
-            agent.goal.state.p_pos = self._generate_position(np_random, condition)
+            agent.state.p_pos = positions[2 * i]
+            agent.goal.state.p_pos = positions[2 * i + 1]
     
-    # Reset all large obstacles to a position that does not intersect with the agents and is within its shape
-    def _reset_large_obstacles(self, world, np_random, paths, num_obstacles=None):
-        def inside_shape_condition(point):
-            return any(path.contains_points(point[None, :]) for path in paths)    
+    # Activate the first num_obstacles large obstacles of the pool (by default the configured number) and deactivate the rest
+    def _activate_large_obstacles(self, world, num_obstacles=None):
+        if num_obstacles is None:
+            num_obstacles = world.num_large_obstacles
+        if not 0 <= num_obstacles <= len(world.large_obstacles):
+            raise ValueError(f"num_large_obstacles must be between 0 and {len(world.large_obstacles)}.")
+        world.large_obstacle_mask[:] = np.arange(len(world.large_obstacles)) < num_obstacles
+
+    # Reset the active large obstacles to a position that does not intersect with the agents and is within its shape;
+    # inactive ones are parked at the origin with zero velocity
+    def _reset_large_obstacles(self, world, np_random, num_obstacles=0):
+        # large obstacles must fit entirely inside a region
+        shapes = world.instance_geometry.offset(-world.large_obstacle_radius)
+        shape_index = shapes.shape_index
         
-        occupied = set()
-        num_shapes = len(world.instance_constr)
+        num_shapes = len(shapes)
+        occupied = np.zeros(num_shapes, dtype=bool)
         
         self.add_large_obstacles(world, num_obstacles)
         
-        large_obstacles = world.large_obstacles[:]
-        random.shuffle(large_obstacles)
+        for large_obstacle, active in zip(world.large_obstacles, world.large_obstacle_mask):
+            if not active:
+                large_obstacle.state.p_pos = np.zeros(world.dim_p)
+                large_obstacle.state.p_vel = np.zeros(world.dim_p)
+
+        active = np.flatnonzero(world.large_obstacle_mask)
+        large_obstacles = [world.large_obstacles[i] for i in active[np_random.permutation(len(active))]]
 
-        for i, large_obstacle in enumerate(large_obstacles):            
+        for i, large_obstacle in enumerate(large_obstacles):
             large_obstacle.state.p_vel = np.zeros(world.dim_p)
             
-            while True:
-                pos = self._generate_position(np_random, inside_shape_condition)
-                shape_idx = next((i for i, path in enumerate(paths) if path.contains_points(pos[None, :])), None)
-                
-                if i % num_shapes == 0:
-                    occupied.clear()
-                
-                if shape_idx not in occupied:
-                    large_obstacle.state.p_pos = pos
-                    occupied.add(shape_idx)
-                    break
+            # each consecutive group of num_shapes obstacles occupies distinct shapes
+            if i % num_shapes == 0:
+                occupied[:] = False
+            
+            def unoccupied_shape(points):
+                idx = shape_index(points)
+                return (idx >= 0) & ~occupied[np.maximum(idx, 0)]
+            
+            pos = self._generate_positions(np_random, unoccupied_shape, 1)[0]
+            large_obstacle.state.p_pos = pos
+            occupied[shape_index(pos[None, :])[0]] = True
     
     def _reset_small_obstacles(self, world, np_random):
-        epsilon = world.small_obstacles[0].radius
+        epsilon = world.small_obstacle_radius
 
-        agent_positions = [agent.state.p_pos for agent in world.agents]
-        goal_positions = [goal.state.p_pos for goal in world.goals]
-        large_obstacle_positions = [obstacle.state.p_pos for obstacle in world.large_obstacles]
-
-        def safe_position(point):
-            outside_entity_positions = not any(np.linalg.norm(point - pos) <= epsilon for pos in agent_positions + goal_positions + large_obstacle_positions)
+        entity_positions = np.array(
+            [agent.state.p_pos for agent in world.agents]
+            + [goal.state.p_pos for goal in world.goals]
+            + [obstacle.state.p_pos for obstacle, active in zip(world.large_obstacles, world.large_obstacle_mask) if active]
+        )
 
-            if world.problem_instance in ['circle', 'corners', 'scatter', 'stellaris']:
-                outside_obstacle_constraints = self._outside_circles(point, world.instance_constr, epsilon) 
-            else:
-                x_constraints = [constr[0] for constr in world.instance_constr]
-                y_constraints = [constr[1] for constr in world.instance_constr]
-                outside_obstacle_constraints = self._outside_rectangle(point, x_constraints, y_constraints, epsilon)
+        def safe_position(points):
+            dist = np.linalg.norm(points[:, None, :] - entity_positions[None, :, :], axis=-1)
+            outside_entity_positions = ~np.any(dist <= epsilon, axis=-1)
+            return outside_entity_positions & self._outside_instance(world, points, epsilon)
 
-            return outside_entity_positions and outside_obstacle_constraints
+        positions = self._generate_positions(np_random, safe_position, len(world.small_obstacles))
 
-        for small_obstacle in world.small_obstacles:
+        for small_obstacle, pos in zip(world.small_obstacles, positions):
             small_obstacle.state.p_vel = np.zeros(world.dim_p)
-            small_obstacle.state.p_pos = self._generate_position(np_random, safe_position)
-
-    def reset_world(self, world, np_random, problem_instance, add_large_obstacles=0):        
-        def make_circle_points(center, radius_and_epsilon, num_points=100):
-            t = np.linspace(0, 2*np.pi, num_points)
-            x = center[0] + radius_and_epsilon * np.cos(t)
-            y = center[1] + radius_and_epsilon * np.sin(t)
-            points = np.column_stack([x, y])
-            return points
-        
-        def make_rectangle_points(bounds, epsilon):
-            min_x, max_x = bounds[0]
-            min_y, max_y = bounds[1]
-            return [
-                (min_x + epsilon, min_y + epsilon),
-                (max_x - epsilon, min_y + epsilon),
-                (max_x - epsilon, max_y - epsilon),
-                (min_x + epsilon, max_y - epsilon),
-            ]
-
-        epsilon = world.large_obstacles[0].radius
+            small_obstacle.state.p_pos = pos
+
+    # num_large_obstacles overrides the number of active large obstacles for this episode, add_large_obstacles activates more
+    def reset_world(self, world, np_random, problem_instance, add_large_obstacles=0, num_large_obstacles=None):
         self._set_problem_instance(world, problem_instance)
-        
-        if world.problem_instance in ['circle', 'corners', 'scatter', 'stellaris']:
-            paths = [mpath.Path(make_circle_points(center, radius - epsilon)) for center, radius in world.instance_constr]
-        else:
-            paths = [mpath.Path(make_rectangle_points(bounds, epsilon)) for bounds in world.instance_constr]
 
         self._reset_agents_and_goals(world, np_random)
-        self._reset_large_obstacles(world, np_random, paths, add_large_obstacles)
+        self._activate_large_obstacles(world, num_large_obstacles)
+        self._reset_large_obstacles(world, np_random, add_large_obstacles)
         self._reset_small_obstacles(world, np_random)
-    
-    # Ground agents can only observe the positions of other agents, goals, and small obstacles
-    def observation(self, agent, world):
-        agent_pos = agent.state.p_pos
-        
+        self.cache_static_positions(world)
+
+    # Reset the world to previously generated positions (e.g. from a reset bank) without sampling. The large obstacles
+    # fill the first slots of the pool, or with large_obstacle_mask give a row per pool slot and the active ones
+    def reset_world_from_state(self, world, problem_instance, agents, goals, large_obstacles, small_obstacles, large_obstacle_mask=None):
+        self._set_problem_instance(world, problem_instance)
+        if large_obstacle_mask is None:
+            self._activate_large_obstacles(world, len(large_obstacles))
+        else:
+            world.large_obstacle_mask[:] = large_obstacle_mask
+
+        for i, agent in enumerate(world.agents):
+            agent.goal = world.goals[i]
+            agent.state.p_pos = np.array(agents[i], dtype=np.float64)
+            agent.state.p_vel = np.zeros(world.dim_p)
+            agent.goal.state.p_pos = np.array(goals[i], dtype=np.float64)
+            agent.goal.state.p_vel = np.zeros(world.dim_p)
+
+        for entities, positions in ((world.large_obstacles, large_obstacles), (world.small_obstacles, small_obstacles)):
+            for entity, pos in zip(entities, positions):
+                entity.state.p_pos = np.array(pos, dtype=np.float64)
+                entity.state.p_vel = np.zeros(world.dim_p)
+        world.large_obstacle_pos[~world.large_obstacle_mask] = 0.0
+
+        self.cache_static_positions(world)
+
+    # Precompute observation offsets and allocate one float32 observation buffer per agent
+    def _build_observation_layout(self, world):
         num_agents = len(world.agents)
         num_small_obstacles = len(world.small_obstacles)
-        
-        other_agents = [np.zeros_like(agent_pos) for _ in range(num_agents - 1)]
-        obstacles = [np.zeros_like(agent_pos) for _ in range(num_small_obstacles)]
-        
-        idx = 0
-        for other_agent in world.agents:
-            if agent.name == other_agent.name:
-                continue
+        dim_p = world.dim_p
+
+        if self.lidar is not None:
+            # distance to the first hit of every ray
+            small_obstacle_dim = self.lidar.num_rays
+        elif self.num_nearest_obstacles is not None:
+            # relative offsets of the k nearest small obstacles followed by their validity mask
+            small_obstacle_dim = (dim_p + 1) * self.num_nearest_obstacles
+        else:
+            small_obstacle_dim = dim_p * num_small_obstacles
+        self.obs_dim = dim_p * (1 + num_agents) + small_obstacle_dim
+        self._agent_rows = {agent.name: i for i, agent in enumerate(world.agents)}
+        # other agents of agent i are rows [0, i) and (i, num_agents) of the agent position array
+        self._other_agent_slices = [
+            (slice(2 * dim_p, (2 + i) * dim_p), slice(0, i), slice((2 + i) * dim_p, (1 + num_agents) * dim_p), slice(i + 1, num_agents))
+            for i in range(num_agents)
+        ]
+        self._small_obstacles_slice = slice(dim_p * (num_agents + 1), self.obs_dim)
+        self._obs_buffers = np.zeros((num_agents, self.obs_dim), dtype=np.float32)
+        if self.lidar is None and self.num_nearest_obstacles is None:
+            self._small_obstacle_block = np.zeros(small_obstacle_dim, dtype=np.float32)
+        else:
+            self._sensor_blocks = np.zeros((num_agents, small_obstacle_dim), dtype=np.float32)
+            self._sensor_key = None
+
+    # Small obstacles are static during an episode, so their flattened positions (or the spatial index of the
+    # nearest obstacle and lidar observations) are cached once per reset
+    def cache_static_positions(self, world):
+        if self.lidar is not None:
+            self.lidar.reset(world)
+            self._sensor_key = None
+        elif self.num_nearest_obstacles is not None:
+            self._small_obstacle_pos = world.small_obstacle_pos.copy()
+            self._small_obstacle_grid = UniformGrid(self._small_obstacle_pos, self.sensing_radius)
+            self._sensor_key = None
+        else:
+            self._small_obstacle_block[:] = world.small_obstacle_pos.ravel()
+
+    # Nearest obstacle or lidar observations of every agent, shape (num_agents, sensor_dim);
+    # computed for all agents at once and reused until the agents move
+    def _sensor_observations(self, world):
+        agent_pos = world.agent_pos
+        key = agent_pos.tobytes()
+        if key != self._sensor_key:
+            blocks = self._sensor_blocks
+            if self.lidar is not None:
+                blocks[:] = self.lidar.scan(agent_pos)
+            elif len(self._small_obstacle_pos) == 0:
+                # without small obstacles every entry is padding, a zero offset that is not valid
+                blocks[:] = 0.0
             else:
-                other_agents[idx] = other_agent.state.p_pos
-                idx += 1
-        
-        for i, small_obstacle in enumerate(world.small_obstacles):
-            obstacles[i] = small_obstacle.state.p_pos
-                
-        goal_pos = agent.goal.state.p_pos
-        
-        return np.concatenate((agent_pos, goal_pos, other_agents, np.concatenate(obstacles, axis=0)))
+                k = self.num_nearest_obstacles
+                indices, _ = self._small_obstacle_grid.nearest(agent_pos, k, self.sensing_radius)
+                valid = indices >= 0
+                offsets = self._small_obstacle_pos[np.maximum(indices, 0)] - agent_pos[:, None, :]
+                offsets[~valid] = 0.0
+                blocks[:, :-k] = offsets.reshape(len(agent_pos), -1)
+                blocks[:, -k:] = valid
+            self._sensor_key = key
+        return self._sensor_blocks
+
+    # Ground agents can only observe the positions of other agents, goals, and small obstacles
+    # Writes into out if given, otherwise into the agent's preallocated buffer (overwritten on the next call)
+    def observation(self, agent, world, out=None):
+        row = self._agent_rows[agent.name]
+        if out is None:
+            out = self._obs_buffers[row]
+
+        dim_p = world.dim_p
+        agent_pos = world.agent_pos
+        out[0:dim_p] = agent_pos[row]
+        out[dim_p : 2 * dim_p] = agent.goal.state.p_pos
+
+        before_out, before_rows, after_out, after_rows = self._other_agent_slices[row]
+        out[before_out] = agent_pos[before_rows].ravel()
+        out[after_out] = agent_pos[after_rows].ravel()
+
+        if self.lidar is None and self.num_nearest_obstacles is None:
+            out[self._small_obstacles_slice] = self._small_obstacle_block
+        else:
+            out[self._small_obstacles_slice] = self._sensor_observations(world)[row]
+        return out
         
     # Reward given by agents to agents for reaching their respective goals
     def reward(self, agent, world):
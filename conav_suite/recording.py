@@ -0,0 +1,356 @@
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+
+from .utils.problems import get_problem_list
+
+MANIFEST_FILE = 'recording.json'
+
+
+# Per-tick columns, written as one .npy file per column and chunk
+def tick_columns(num_agents):
+    return {
+        'episode': ((), np.int64),
+        'step': ((), np.int32),
+        'agent_pos': ((num_agents, 2), np.float32),
+        'agent_vel': ((num_agents, 2), np.float32),
+        # -1 on the tick recorded at reset, before any action
+        'action': ((num_agents,), np.int8),
+        'reward': ((num_agents,), np.float32),
+        'termination': ((num_agents,), np.bool_),
+        'truncation': ((num_agents,), np.bool_),
+    }
+
+
+# Per-episode columns: the static part of the world and how the episode was started
+def episode_columns(num_agents, num_large_obstacles, num_small_obstacles):
+    return {
+        'episode': ((), np.int64),
+        # -1 when the env was reset without a seed
+        'seed': ((), np.int64),
+        # index into the manifest's problem list
+        'problem_instance': ((), np.int16),
+        'start_tick': ((), np.int64),
+        'goals': ((num_agents, 2), np.float32),
+        'large_obstacles': ((num_large_obstacles, 2), np.float32),
+        # active slots of the large obstacle pool
+        'large_obstacle_mask': ((num_large_obstacles,), np.bool_),
+        'small_obstacles': ((num_small_obstacles, 2), np.float32),
+    }
+
+
+def _raw_env(env):
+    return env.aec_env if hasattr(env, 'aec_env') else env.unwrapped
+
+
+def _observation_config(scenario):
+    config = {'num_nearest_obstacles': scenario.num_nearest_obstacles, 'sensing_radius': scenario.sensing_radius}
+    lidar = scenario.lidar
+    if lidar is not None:
+        config.update(num_lidar_rays=lidar.num_rays, lidar_range=lidar.max_range, lidar_targets=list(lidar.targets))
+    return config
+
+
+# Arguments that rebuild the env's RewardFunction through make_reward_function
+def _reward_config(reward_function):
+    if reward_function is None:
+        return None
+    return {**reward_function.weights, 'instances': reward_function.instances}
+
+
+def _allocate(columns, size):
+    return {name: np.empty((size,) + shape, dtype=dtype) for name, (shape, dtype) in columns.items()}
+
+
+class _ChunkBuffer:  # fixed-size struct-of-arrays buffer handed to the writer thread once full
+    def __init__(self, kind, columns, size):
+        self.kind = kind
+        self.columns = columns
+        self.size = size
+        self.arrays = _allocate(columns, size)
+        self.count = 0
+
+    def full(self):
+        return self.count == self.size
+
+
+class TrajectoryRecorder:  # streams every reset and world step of an env into append-only chunked .npy columns
+    def __init__(self, env, path, chunk_size=4096, episode_chunk_size=256, background=True):
+        self.env = _raw_env(env)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.episode_chunk_size = episode_chunk_size
+        os.makedirs(path, exist_ok=True)
+
+        world = self.env.world
+        self.num_agents = len(world.agents)
+        self.config = {
+            'num_agents': self.num_agents,
+            'num_large_obstacles': world.num_large_obstacles,
+            'large_obstacle_capacity': world.large_obstacle_capacity,
+            'large_obstacle_radius': world.large_obstacle_radius,
+            'num_small_obstacles': len(world.small_obstacles),
+            'small_obstacle_radius': world.small_obstacle_radius,
+            'max_cycles': self.env.max_cycles,
+            # observation mode and rewards, so Replay.make_env builds an env that observes like the recorded one
+            **_observation_config(self.env.scenario),
+            'reward_function': _reward_config(self.env.reward_function),
+        }
+        self._tick_columns = tick_columns(self.num_agents)
+        self._episode_columns = episode_columns(
+            self.num_agents, len(world.large_obstacles), len(world.small_obstacles)
+        )
+        self._problem_list = get_problem_list()
+        self._manifest = {
+            'config': self.config,
+            'problem_list': self._problem_list,
+            'tick_columns': {name: [list(shape), np.dtype(dtype).str] for name, (shape, dtype) in self._tick_columns.items()},
+            'episode_columns': {name: [list(shape), np.dtype(dtype).str] for name, (shape, dtype) in self._episode_columns.items()},
+            'tick_chunks': [],
+            'episode_chunks': [],
+        }
+
+        self._ticks = _ChunkBuffer('ticks', self._tick_columns, chunk_size)
+        self._episodes = _ChunkBuffer('episodes', self._episode_columns, episode_chunk_size)
+        self.num_ticks = 0
+        self.num_episodes = 0
+
+        # chunks are written by a background thread so that recording only copies into the buffers
+        self._queue = queue.Queue() if background else None
+        self._writer = None
+        if background:
+            self._writer = threading.Thread(target=self._write_loop, name='TrajectoryRecorder', daemon=True)
+            self._writer.start()
+        self._write_manifest()
+
+        self.env._recorder = self
+        self.closed = False
+
+    # Called by the env after every reset
+    def record_reset(self, seed):
+        world = self.env.world
+        episodes = self._episodes
+        row = episodes.count
+        arrays = episodes.arrays
+        arrays['episode'][row] = self.num_episodes
+        arrays['seed'][row] = -1 if seed is None else seed
+        arrays['problem_instance'][row] = self._problem_list.index(world.problem_instance)
+        arrays['start_tick'][row] = self.num_ticks
+        arrays['goals'][row] = world.goal_pos
+        arrays['large_obstacles'][row] = world.large_obstacle_pos
+        arrays['large_obstacle_mask'][row] = world.large_obstacle_mask
+        arrays['small_obstacles'][row] = world.small_obstacle_pos
+        episodes.count += 1
+        self.num_episodes += 1
+        if episodes.full():
+            self._flush('episodes')
+
+        # views of the agent rows stay valid for the whole episode
+        self._agent_pos = world.agent_pos
+        self._agent_vel = world.store.p_vel[world.agent_slice]
+        row = self._begin_tick()
+        arrays = self._ticks.arrays
+        arrays['action'][row] = -1
+        arrays['reward'][row] = 0
+        arrays['termination'][row] = False
+        arrays['truncation'][row] = False
+        self._end_tick()
+
+    # Called by the env after every world step with the actions and the episode status of that step
+    def record_step(self, actions, status):
+        env = self.env
+        row = self._begin_tick()
+        arrays = self._ticks.arrays
+        arrays['action'][row] = actions
+        arrays['reward'][row] = [env.rewards.get(agent, 0.0) for agent in env.possible_agents]
+        arrays['termination'][row] = status['terminations']
+        arrays['truncation'][row] = status['truncations']
+        self._end_tick()
+
+    def _begin_tick(self):
+        row = self._ticks.count
+        arrays = self._ticks.arrays
+        arrays['episode'][row] = self.num_episodes - 1
+        arrays['step'][row] = self.env.steps
+        arrays['agent_pos'][row] = self._agent_pos
+        arrays['agent_vel'][row] = self._agent_vel
+        return row
+
+    def _end_tick(self):
+        self._ticks.count += 1
+        self.num_ticks += 1
+        if self._ticks.full():
+            self._flush('ticks')
+
+    # Hand the current (partial) buffer of kind 'ticks' or 'episodes' over to the writer and start a new chunk
+    def _flush(self, kind):
+        buffer = self._ticks if kind == 'ticks' else self._episodes
+        if buffer.count == 0:
+            return
+        chunks = self._manifest['tick_chunks' if kind == 'ticks' else 'episode_chunks']
+        index = len(chunks)
+        chunks.append(buffer.count)
+        arrays = {name: array[:buffer.count] for name, array in buffer.arrays.items()}
+
+        new_buffer = _ChunkBuffer(kind, buffer.columns, buffer.size)
+        if kind == 'ticks':
+            self._ticks = new_buffer
+        else:
+            self._episodes = new_buffer
+
+        job = (kind, index, arrays, json.loads(json.dumps(self._manifest)))
+        if self._queue is None:
+            self._write(*job)
+        else:
+            self._queue.put(job)
+
+    def _write_loop(self):
+        while True:
+            job = self._queue.get()
+            if job is not None:
+                self._write(*job)
+            self._queue.task_done()
+            if job is None:
+                return
+
+    def _write(self, kind, index, arrays, manifest):
+        directory = os.path.join(self.path, f"{kind}-{index:06d}")
+        os.makedirs(directory, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(directory, f"{name}.npy"), array)
+        self._write_manifest(manifest)
+
+    # The manifest only lists complete chunks, and is replaced atomically
+    def _write_manifest(self, manifest=None):
+        manifest = self._manifest if manifest is None else manifest
+        tmp = os.path.join(self.path, MANIFEST_FILE + '.tmp')
+        with open(tmp, 'w') as file:
+            json.dump(manifest, file, indent=2)
+        os.replace(tmp, os.path.join(self.path, MANIFEST_FILE))
+
+    # Write out everything recorded so far as (possibly short) chunks; wait=True blocks until they are on disk
+    def flush(self, wait=False):
+        self._flush('episodes')
+        self._flush('ticks')
+        if wait and self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+        if self.env._recorder is self:
+            self.env._recorder = None
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class Replay:  # memory-mapped view of a recording that restores any tick into an env without re-simulating
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as file:
+            self.manifest = json.load(file)
+        self.config = self.manifest['config']
+        self.problem_list = self.manifest['problem_list']
+        self._tick_offsets = np.concatenate(([0], np.cumsum(self.manifest['tick_chunks'], dtype=np.int64)))
+        self._episode_offsets = np.concatenate(([0], np.cumsum(self.manifest['episode_chunks'], dtype=np.int64)))
+        self._chunks = {}
+        self._env = None
+        self._loaded_episode = None
+
+    def __len__(self):
+        return int(self._tick_offsets[-1])
+
+    @property
+    def num_episodes(self):
+        return int(self._episode_offsets[-1])
+
+    # Memory-mapped column of one chunk
+    def _column(self, kind, index, name):
+        key = (kind, index, name)
+        if key not in self._chunks:
+            self._chunks[key] = np.load(os.path.join(self.path, f"{kind}-{index:06d}", f"{name}.npy"), mmap_mode='r')
+        return self._chunks[key]
+
+    def _locate(self, offsets, index, total):
+        if not -total <= index < total:
+            raise IndexError(f"Index {index} is out of range for {total} entries.")
+        index %= total
+        chunk = int(np.searchsorted(offsets, index, side='right') - 1)
+        return chunk, index - int(offsets[chunk])
+
+    # Dict of the tick columns at tick index
+    def tick(self, index):
+        chunk, row = self._locate(self._tick_offsets, index, len(self))
+        return {name: self._column('ticks', chunk, name)[row] for name in self.manifest['tick_columns']}
+
+    # Dict of the episode columns of episode index, with the problem instance name
+    def episode(self, index):
+        chunk, row = self._locate(self._episode_offsets, index, self.num_episodes)
+        episode = {name: self._column('episodes', chunk, name)[row] for name in self.manifest['episode_columns']}
+        episode['problem_instance'] = self.problem_list[int(episode['problem_instance'])]
+        return episode
+
+    # Concatenated tick column over all chunks, e.g. for offline RL datasets (copies the data)
+    def column(self, name):
+        chunks = [self._column('ticks', i, name) for i in range(len(self.manifest['tick_chunks']))]
+        shape, dtype = self.manifest['tick_columns'][name]
+        return np.concatenate(chunks) if chunks else np.empty([0] + shape, dtype=dtype)
+
+    # Env with the recorded configuration, used to restore ticks for observation and rendering
+    def make_env(self, **kwargs):
+        from .conav_suite import raw_env
+
+        return raw_env(**{**self.config, **kwargs})
+
+    # Put the world of env (by default an env owned by the replay) in the state of tick index
+    def restore(self, index, env=None):
+        if env is None:
+            if self._env is None:
+                self._env = self.make_env()
+            env = self._env
+        env = _raw_env(env)
+        tick = self.tick(index)
+        episode_index = int(tick['episode'])
+
+        # obstacles and goals only change between episodes
+        if env is not self._env or self._loaded_episode != episode_index:
+            episode = self.episode(episode_index)
+            env.scenario.reset_world_from_state(
+                env.world,
+                episode['problem_instance'],
+                tick['agent_pos'],
+                episode['goals'],
+                episode['large_obstacles'],
+                episode['small_obstacles'],
+                episode.get('large_obstacle_mask'),
+            )
+            env._reset_static_caches()
+            if env is self._env:
+                self._loaded_episode = episode_index
+
+        world = env.world
+        world.agent_pos[:] = tick['agent_pos']
+        world.store.p_vel[world.agent_slice] = tick['agent_vel']
+        env.steps = int(tick['step'])
+        return env
+
+    # Observations of every agent at tick index, shape (num_agents, obs_dim)
+    def observe(self, index, env=None):
+        env = self.restore(index, env)
+        return np.stack([env.observe(agent) for agent in env.possible_agents])
+
+    # Top-down frame of tick index
+    def render(self, index, env=None):
+        return self.restore(index, env).draw()
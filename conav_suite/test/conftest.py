@@ -0,0 +1,10 @@
+import conav_suite
+import pytest
+
+
+@pytest.fixture
+def env() -> object:
+    env = conav_suite.env()
+    env.reset(options={'problem_instance': 'bisect'})
+    yield env
+    env.close()
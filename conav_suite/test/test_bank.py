@@ -0,0 +1,49 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.bank import ResetBank, generate_reset_bank
+
+
+def test_reset_bank_reproduces_seeded_resets(tmp_path: object) -> None:
+    generate_reset_bank(str(tmp_path), num_states=3, problem_instances=['cross', 'corners'], seed=100, num_agents=2)
+
+    bank_env = conav_suite.parallel_env(num_agents=2, reset_bank=str(tmp_path))
+    seeded_env = conav_suite.parallel_env(num_agents=2)
+
+    for problem_instance in ['cross', 'corners']:
+        for bank_index in range(3):
+            bank_observations, _ = bank_env.reset(options={'problem_instance': problem_instance, 'bank_index': bank_index})
+            seeded_observations, _ = seeded_env.reset(seed=100 + bank_index, options={'problem_instance': problem_instance})
+
+            np.testing.assert_array_equal(bank_env.state(), seeded_env.state())
+            for agent in bank_observations:
+                np.testing.assert_array_equal(bank_observations[agent], seeded_observations[agent])
+
+    assert ResetBank(str(tmp_path))['cross']['seed'].tolist() == [100, 101, 102]
+
+
+def test_reset_bank_rejects_mismatched_env(tmp_path: object) -> None:
+    generate_reset_bank(str(tmp_path), num_states=1, problem_instances=['bisect'], num_agents=1)
+    env = conav_suite.parallel_env(num_agents=3, reset_bank=str(tmp_path))
+
+    with pytest.raises(ValueError):
+        env.reset(options={'problem_instance': 'bisect', 'bank_index': 0})
+
+
+@pytest.mark.parametrize('radii', [{'large_obstacle_radius': 0.08}, {'small_obstacle_radius': 0.03}])
+def test_reset_bank_rejects_mismatched_radii(tmp_path: object, radii: dict) -> None:
+    generate_reset_bank(str(tmp_path), num_states=1, problem_instances=['bisect'])
+    env = conav_suite.parallel_env(reset_bank=str(tmp_path), **radii)
+
+    with pytest.raises(ValueError):
+        env.reset(options={'problem_instance': 'bisect', 'bank_index': 0})
+
+
+def test_reset_bank_rejects_mismatched_problem_list(tmp_path: object) -> None:
+    generate_reset_bank(str(tmp_path), num_states=1, problem_instances=['bisect'])
+    env = conav_suite.parallel_env(reset_bank=str(tmp_path))
+    env.aec_env.reset_bank.config['problem_list'] = ['bisect']
+
+    with pytest.raises(ValueError):
+        env.reset(options={'problem_instance': 'bisect', 'bank_index': 0})
@@ -0,0 +1,47 @@
+import copy
+import json
+
+from conav_suite.bench import compare, main, run_benchmarks
+
+
+def test_run_benchmarks_reports_every_configuration() -> None:
+    report = run_benchmarks(
+        problem_instances=['bisect', 'circle'],
+        num_agents=[2],
+        num_small_obstacles=[5],
+        modes=['aec', 'parallel', 'vectorized', 'startup', 'planner'],
+        num_steps=8,
+        num_resets=2,
+        num_envs=2,
+        num_queries=4,
+    )
+    assert len(report['results']) == 10
+    json.dumps(report)
+
+    by_mode = {result['mode']: result['metrics'] for result in report['results']}
+    assert set(by_mode['aec']) >= {'step', 'reset', 'observe', 'state', 'steps_per_sec'}
+    assert set(by_mode['parallel']) >= {'step', 'reset', 'render', 'render_fps'}
+    assert by_mode['vectorized']['steps_per_sec'] > 0
+    assert by_mode['startup']['construct']['count'] == 2 and by_mode['startup']['first_env']['p50_us'] > 0
+    assert by_mode['planner']['trajectories_per_sec'] > 0 and by_mode['planner']['episode']['count'] == 2
+    assert by_mode['aec']['step']['p99_us'] >= by_mode['aec']['step']['p50_us']
+
+
+def test_compare_flags_slower_p50() -> None:
+    baseline = run_benchmarks(problem_instances=['cross'], num_agents=[1], num_small_obstacles=[5], modes=['parallel'], num_steps=4, num_resets=2)
+    report = copy.deepcopy(baseline)
+    report['results'][0]['metrics']['step']['p50_us'] = baseline['results'][0]['metrics']['step']['p50_us'] * 2
+
+    regressions = compare(report, baseline, tolerance=0.5)
+    assert [regression['metric'] for regression in regressions] == ['step']
+    assert compare(baseline, baseline) == []
+
+
+def test_main_writes_json(tmp_path) -> None:
+    output = tmp_path / 'bench.json'
+    args = ['--problem-instances', 'quarters', '--num-agents', '1', '--num-small-obstacles', '5', '--modes', 'aec', '--num-steps', '4', '--num-resets', '2']
+
+    assert main(args + ['--output', str(output)]) == 0
+    assert main(args + ['--output', str(tmp_path / 'again.json'), '--baseline', str(output), '--tolerance', '1000']) == 0
+    report = json.loads((tmp_path / 'again.json').read_text())
+    assert report['regressions'] == []
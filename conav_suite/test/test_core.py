@@ -0,0 +1,121 @@
+import copy
+
+import numpy as np
+
+from conav_suite.conav_suite import Scenario
+from conav_suite.utils.core import Agent, Obstacle
+
+
+def make_world(num_agents: int=3, problem_instance: str="bisect", seed: int=0) -> object:
+    scenario = Scenario()
+    world = scenario.make_world(num_agents, 4, 0.05, 10, 0.02)
+    scenario.reset_world(world, np.random.default_rng(seed), problem_instance)
+    return world
+
+
+def test_entities_are_views_onto_world_store() -> None:
+    world = make_world()
+    store = world.store
+
+    assert world.entities is world.entities
+    assert len(store) == len(world.entities)
+    for row, entity in enumerate(world.entities):
+        assert np.shares_memory(entity.state.p_pos, store.p_pos)
+        assert entity.radius == store.radius[row]
+
+    agent = world.agents[1]
+    agent.state.p_pos = np.array([0.25, -0.5])
+    np.testing.assert_array_equal(world.agent_pos[1], [0.25, -0.5])
+
+    world.agent_pos[1] += 0.25
+    np.testing.assert_array_equal(agent.state.p_pos, [0.5, -0.25])
+
+    assert not hasattr(agent, '__dict__')
+
+
+def test_store_is_rebound_when_entities_are_added() -> None:
+    world = make_world()
+    pos = world.large_obstacle_pos.copy()
+
+    obstacle = Obstacle(radius=0.05)
+    obstacle.state.p_pos = np.array([0.1, 0.2])
+    world.large_obstacles.append(obstacle)
+
+    assert len(world.entities) == len(world.store)
+    np.testing.assert_array_equal(world.large_obstacle_pos[:-1], pos)
+    np.testing.assert_array_equal(world.large_obstacle_pos[-1], [0.1, 0.2])
+
+
+def test_deepcopy_keeps_entities_bound_to_copied_store() -> None:
+    world = make_world()
+    world_copy = copy.deepcopy(world)
+
+    world_copy.agents[0].state.p_pos += 1.0
+    np.testing.assert_array_equal(world_copy.agent_pos[0], world.agent_pos[0] + 1.0)
+    assert world_copy.agents[0].goal is world_copy.goals[0]
+
+
+def test_standalone_entity_defaults() -> None:
+    agent = Agent()
+    np.testing.assert_array_equal(agent.state.p_pos, np.zeros(2))
+    np.testing.assert_array_equal(agent.action, np.zeros(2))
+    assert agent.movable and agent.mass == 1.0
+
+
+def scalar_environment_force(world: object) -> np.ndarray:
+    p_force = np.zeros((len(world.agents), world.dim_p))
+    for a, agent_a in enumerate(world.agents):
+        for b, agent_b in enumerate(world.agents):
+            if b <= a:
+                continue
+            f_a, f_b = world.get_collision_force(agent_a, agent_b)
+            if f_a is not None:
+                p_force[a] += f_a
+            if f_b is not None:
+                p_force[b] += f_b
+    return p_force
+
+
+def test_neighbor_list_forces_match_brute_force() -> None:
+    world = make_world(num_agents=150)
+    brute_world = copy.deepcopy(world)
+    brute_world.neighbor_list_threshold = 10_000
+
+    rng = np.random.default_rng(3)
+    world.agent_pos[:] = rng.uniform(-0.6, 0.6, (150, 2))
+    world.agent_pos[1] = world.agent_pos[0] + [0.09, 0.0]
+    world.store.action[world.agent_slice] = rng.choice([-2.0, 0.0, 2.0], (150, 2))
+    brute_world.store.p_pos[:] = world.store.p_pos
+    brute_world.store.action[:] = world.store.action
+
+    np.testing.assert_allclose(
+        brute_world.apply_environment_force(np.zeros((150, 2))),
+        scalar_environment_force(brute_world),
+        rtol=1e-10,
+        atol=1e-12,
+    )
+
+    for _ in range(20):
+        world.step()
+        brute_world.step()
+    assert world.neighbor_list.num_builds >= 1
+
+    # summation order differs, and the dense packing amplifies rounding over several steps
+    np.testing.assert_allclose(world.agent_pos, brute_world.agent_pos, rtol=1e-7, atol=1e-9)
+    np.testing.assert_allclose(
+        world.apply_environment_force(np.zeros((150, 2))),
+        scalar_environment_force(world),
+        rtol=1e-10,
+        atol=1e-12,
+    )
+
+
+def test_neighbor_list_is_reused_while_agents_barely_move() -> None:
+    world = make_world(num_agents=64)
+    world.agent_pos[:] = np.stack(np.meshgrid(np.linspace(-0.9, 0.9, 8), np.linspace(-0.9, 0.9, 8)), axis=-1).reshape(-1, 2)
+    world.store.p_vel[world.agent_slice] = 0.0
+    world.store.action[world.agent_slice] = [0.2, 0.0]
+
+    for _ in range(10):
+        world.step()
+    assert world.neighbor_list.num_builds == 1
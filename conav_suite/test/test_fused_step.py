@@ -0,0 +1,32 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.utils.problems import get_problem_list
+
+
+@pytest.mark.parametrize("problem_instance", get_problem_list())
+def test_fused_step_matches_standard_step(problem_instance: str) -> None:
+    kwargs = {'num_agents': 6, 'num_small_obstacles': 20, 'max_cycles': 40}
+    standard_env = conav_suite.parallel_env(**kwargs)
+    fused_env = conav_suite.parallel_env(fused_step=True, **kwargs)
+
+    options = {'problem_instance': problem_instance}
+    standard_env.reset(seed=2, options=options)
+    fused_env.reset(seed=2, options=options)
+
+    # start the agents close together so that collision forces are exercised
+    for env in (standard_env, fused_env):
+        env.aec_env.world.agent_pos[:] = np.linspace(-0.2, 0.2, 6)[:, None] * [1.0, 0.5]
+
+    rng = np.random.default_rng(0)
+    for _ in range(40):
+        actions = rng.integers(5, size=6)
+        standard_env.aec_env.current_actions = actions.tolist()
+        fused_env.aec_env.current_actions = actions.tolist()
+        standard_env.aec_env._advance()
+        fused_env.aec_env._advance()
+
+        np.testing.assert_allclose(fused_env.aec_env.world.agent_pos, standard_env.aec_env.world.agent_pos, rtol=1e-9, atol=1e-12)
+        assert fused_env.aec_env.terminations == standard_env.aec_env.terminations
+        assert fused_env.aec_env.truncations == standard_env.aec_env.truncations
@@ -0,0 +1,41 @@
+import copy
+
+import numpy as np
+import pytest
+
+from conav_suite.utils.geometry import CIRCLE, RECTANGLE, get_instance_geometry
+from conav_suite.utils.problems import get_problem_list
+
+
+def test_geometry_is_cached_and_immutable() -> None:
+    geometry = get_instance_geometry('stellaris', 0.05)
+    assert geometry is get_instance_geometry('stellaris', 0.05)
+    assert geometry is copy.deepcopy(geometry)
+    assert geometry.offset(-0.05) is get_instance_geometry('stellaris')
+
+    with pytest.raises(AttributeError):
+        geometry.kind = RECTANGLE
+    with pytest.raises(ValueError):
+        geometry.radii[0] = 1.0
+
+
+@pytest.mark.parametrize("problem_instance", get_problem_list())
+def test_offset_contains_matches_constraints(problem_instance: str) -> None:
+    epsilon = 0.05
+    geometry = get_instance_geometry(problem_instance)
+    dilated = geometry.offset(epsilon)
+    points = np.random.default_rng(0).uniform(-1, 1, (2000, 2))
+
+    if geometry.kind == CIRCLE:
+        dist = np.linalg.norm(points[:, None, :] - geometry.centers, axis=-1)
+        expected = np.any(dist <= geometry.radii + epsilon, axis=1)
+        np.testing.assert_allclose(dilated.area, np.pi * (geometry.radii + epsilon) ** 2)
+    else:
+        expected = np.any(
+            np.all((geometry.lows - epsilon <= points[:, None, :]) & (points[:, None, :] <= geometry.highs + epsilon), axis=-1),
+            axis=1,
+        )
+        np.testing.assert_allclose(dilated.area, np.prod(geometry.highs - geometry.lows + 2 * epsilon, axis=1))
+
+    np.testing.assert_array_equal(dilated.contains(points), expected)
+    assert np.all(dilated.shape_index(points)[~expected] == -1)
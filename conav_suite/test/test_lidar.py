@@ -0,0 +1,98 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.utils.geometry import get_instance_geometry
+from conav_suite.utils.lidar import Lidar, cast_boxes, cast_circles, cast_circles_around, ray_directions
+
+
+def reference_circle_hit(origin: np.ndarray, direction: np.ndarray, center: np.ndarray, radius: float) -> float:
+    offset = center - origin
+    if offset @ offset <= radius ** 2:
+        return 0.0
+    proj = offset @ direction
+    disc = proj ** 2 - (offset @ offset - radius ** 2)
+    if disc < 0 or proj - np.sqrt(disc) < 0:
+        return np.inf
+    return proj - np.sqrt(disc)
+
+
+def reference_box_hit(origin: np.ndarray, direction: np.ndarray, low: np.ndarray, high: np.ndarray) -> float:
+    # march along the ray in small steps
+    steps = np.arange(0, 3, 1e-4)
+    points = origin + steps[:, None] * direction
+    inside = np.all((low <= points) & (points <= high), axis=1)
+    return steps[inside.argmax()] if inside.any() else np.inf
+
+
+def test_cast_circles_matches_scalar_reference() -> None:
+    rng = np.random.default_rng(0)
+    origins = rng.uniform(-1, 1, size=(5, 2))
+    centers = rng.uniform(-1, 1, size=(30, 2))
+    radii = rng.uniform(0.01, 0.2, size=30)
+    directions = ray_directions(16)
+
+    dist = cast_circles(origins, directions, centers, radii)
+    assert dist.shape == (5, 16)
+    for q, origin in enumerate(origins):
+        for r, direction in enumerate(directions):
+            expected = min(reference_circle_hit(origin, direction, c, radius) for c, radius in zip(centers, radii))
+            assert dist[q, r] == pytest.approx(expected)
+
+
+def test_cast_boxes_matches_marching_reference() -> None:
+    geometry = get_instance_geometry('cross')
+    origins = np.array([[-0.9, -0.9], [0.5, 0.8], [0.0, 0.0]])
+    directions = ray_directions(12)
+
+    dist = cast_boxes(origins, directions, geometry.lows, geometry.highs)
+    for q, origin in enumerate(origins):
+        for r, direction in enumerate(directions):
+            expected = min(reference_box_hit(origin, direction, low, high) for low, high in zip(geometry.lows, geometry.highs))
+            assert dist[q, r] == pytest.approx(expected, abs=2e-4)
+
+
+@pytest.mark.parametrize('problem_instance', ['cross', 'stellaris'])
+def test_grid_scan_matches_batched_scan(problem_instance: str) -> None:
+    targets = ('small_obstacles', 'large_obstacles', 'regions')
+    lidar = Lidar(32, 0.4, targets)
+    worlds = []
+    for seed in range(3):
+        env = conav_suite.parallel_env(num_agents=4, num_small_obstacles=150, num_lidar_rays=32, lidar_range=0.4, lidar_targets=targets)
+        env.reset(seed=seed, options={'problem_instance': problem_instance if seed else 'bisect'})
+        worlds.append(env.aec_env.world)
+
+    batched = lidar.scan_worlds(worlds)
+    assert batched.shape == (3, 4, 32)
+    for world, scan in zip(worlds, batched):
+        lidar.reset(world)
+        np.testing.assert_allclose(lidar.scan(world.agent_pos), scan)
+        assert (scan <= 0.4).all()
+
+
+def test_lidar_observation() -> None:
+    env = conav_suite.parallel_env(num_agents=2, num_small_obstacles=500, num_lidar_rays=64, lidar_range=0.3)
+    observations, _ = env.reset(seed=1, options={'problem_instance': 'scatter'})
+    world = env.aec_env.world
+
+    assert env.observation_space('agent_0').shape == (2 * 3 + 64,)
+    scan = np.stack([observations[agent][6:] for agent in env.possible_agents])
+    expected = cast_circles(world.agent_pos, ray_directions(64), world.small_obstacle_pos, world.small_obstacles[0].radius)
+    np.testing.assert_allclose(scan, np.minimum(expected, 0.3), rtol=1e-6)
+    assert (scan < 0.3).any()
+
+
+def test_lidar_and_nearest_obstacles_are_exclusive() -> None:
+    with pytest.raises(ValueError):
+        conav_suite.env(num_nearest_obstacles=4, num_lidar_rays=8)
+
+
+def test_cast_circles_around_matches_dense_cast() -> None:
+    rng = np.random.default_rng(1)
+    origins = rng.uniform(-1, 1, size=(2, 6, 2))
+    centers = rng.uniform(-1, 1, size=(2, 6, 40, 2))
+    centers[:, :, -5:] = np.inf
+    radii = rng.uniform(0.01, 0.3, size=(2, 6, 40))
+
+    dense = cast_circles(origins, ray_directions(48), centers, radii)
+    np.testing.assert_allclose(cast_circles_around(origins, 48, centers, radii), dense, atol=1e-12)
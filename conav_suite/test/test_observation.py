@@ -0,0 +1,86 @@
+import conav_suite
+import numpy as np
+import pytest
+
+
+def reference_observation(world: object, agent: object) -> np.ndarray:
+    other_agents = [other.state.p_pos for other in world.agents if other is not agent]
+    obstacles = [obstacle.state.p_pos for obstacle in world.small_obstacles]
+    return np.concatenate((agent.state.p_pos, agent.goal.state.p_pos, *other_agents, *obstacles)).astype(np.float32)
+
+
+def test_observation_matches_reference_layout() -> None:
+    env = conav_suite.env(num_agents=3, num_small_obstacles=6)
+    env.reset(seed=1, options={'problem_instance': 'quarters'})
+    raw_env = env.unwrapped
+
+    for _ in range(6):
+        env.step(env.action_space(env.agent_selection).sample())
+
+    for agent in raw_env.world.agents:
+        observation = raw_env.observe(agent.name)
+        assert observation.dtype == np.float32
+        assert observation.shape == raw_env.observation_space(agent.name).shape
+        np.testing.assert_array_equal(observation, reference_observation(raw_env.world, agent))
+
+
+def test_observation_writes_into_out() -> None:
+    env = conav_suite.parallel_env(num_agents=2)
+    env.reset(seed=0, options={'problem_instance': 'scatter'})
+    raw_env = env.aec_env
+
+    out = np.zeros((2, raw_env.scenario.obs_dim), dtype=np.float32)
+    for i, agent in enumerate(raw_env.possible_agents):
+        result = raw_env.observe(agent, out=out[i])
+        assert np.shares_memory(result, out)
+
+    np.testing.assert_array_equal(out[1], raw_env.observe('agent_1'))
+
+
+def reference_nearest_obstacles(world: object, agent: object, k: int, radius: float) -> np.ndarray:
+    offsets = world.small_obstacle_pos - agent.state.p_pos
+    dist = np.linalg.norm(offsets, axis=1)
+    order = [i for i in np.argsort(dist, kind='stable') if dist[i] <= radius][:k]
+    block = np.zeros((k, 2))
+    block[:len(order)] = offsets[order]
+    mask = np.arange(k) < len(order)
+    return np.concatenate((block.ravel(), mask)).astype(np.float32)
+
+
+def test_nearest_obstacle_observation_matches_brute_force() -> None:
+    k, radius = 5, 0.3
+    env = conav_suite.parallel_env(num_agents=3, num_small_obstacles=200, num_nearest_obstacles=k, sensing_radius=radius)
+    observations, _ = env.reset(seed=2, options={'problem_instance': 'cross'})
+    raw_env = env.aec_env
+
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        for agent in raw_env.world.agents:
+            observation = observations[agent.name] if agent.name in observations else raw_env.observe(agent.name)
+            assert observation.shape == (2 * 4 + 3 * k,)
+            np.testing.assert_array_equal(observation[:8], reference_observation(raw_env.world, agent)[:8])
+            np.testing.assert_allclose(observation[8:], reference_nearest_obstacles(raw_env.world, agent, k, radius), atol=1e-6)
+        if not env.agents:
+            break
+        observations, *_ = env.step(rng.integers(5, size=3))
+
+
+def test_nearest_obstacle_observation_size_only_depends_on_k() -> None:
+    shapes = {
+        conav_suite.env(num_small_obstacles=count, num_nearest_obstacles=8).observation_space('agent_0').shape
+        for count in (10, 50, 400)
+    }
+    assert shapes == {(2 * 2 + 3 * 8,)}
+
+
+@pytest.mark.parametrize('kwargs', [{'num_nearest_obstacles': 3}, {'num_lidar_rays': 8}])
+def test_sensor_observations_without_small_obstacles(kwargs: dict) -> None:
+    env = conav_suite.parallel_env(num_agents=2, num_small_obstacles=0, **kwargs)
+    observations, _ = env.reset(seed=0, options={'problem_instance': 'cross'})
+    observations, *_ = env.step([1, 2])
+
+    for agent, observation in observations.items():
+        assert observation.shape == env.observation_space(agent).shape
+    if 'num_nearest_obstacles' in kwargs:
+        # every nearest obstacle entry is padding
+        np.testing.assert_array_equal(observations['agent_0'][6:], 0.0)
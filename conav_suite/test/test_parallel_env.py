@@ -0,0 +1,91 @@
+import conav_suite
+import numpy as np
+
+
+def test_parallel_env_matches_aec_env() -> None:
+    aec_env = conav_suite.env(num_agents=3)
+    parallel_env = conav_suite.parallel_env(num_agents=3)
+
+    options = {'problem_instance': 'staggered'}
+    aec_env.reset(seed=7, options=options)
+    observations, infos = parallel_env.reset(seed=7, options=options)
+
+    assert set(observations) == set(parallel_env.possible_agents)
+    for agent, observation in observations.items():
+        np.testing.assert_array_equal(observation, aec_env.observe(agent))
+
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        actions = {agent: int(rng.integers(5)) for agent in parallel_env.agents}
+        for agent in aec_env.agents:
+            aec_env.step(actions[agent])
+
+        observations, rewards, terminations, truncations, infos = parallel_env.step(actions)
+        for agent in observations:
+            np.testing.assert_array_equal(observations[agent], aec_env.observe(agent))
+            assert terminations[agent] == aec_env.terminations[agent]
+            assert truncations[agent] == aec_env.truncations[agent]
+
+        # AEC dead-agent handling diverges from the parallel API once an agent is done
+        if len(parallel_env.agents) < len(parallel_env.possible_agents):
+            break
+
+
+def test_parallel_env_accepts_action_array() -> None:
+    env = conav_suite.parallel_env(num_agents=2, max_cycles=3)
+    env.reset(seed=0, options={'problem_instance': 'circle'})
+
+    for _ in range(3):
+        observations, rewards, terminations, truncations, infos = env.step(np.zeros(2, dtype=np.int64))
+
+    assert all(truncations.values())
+    assert env.agents == []
+
+
+def test_aec_episode_with_several_agents_runs_to_completion() -> None:
+    aec_env = conav_suite.env(num_agents=3, max_cycles=40)
+    parallel_env = conav_suite.parallel_env(num_agents=3, max_cycles=40)
+    raw_env = aec_env.unwrapped
+    for seed in range(4):
+        options = {'problem_instance': 'cross'}
+        aec_env.reset(seed=seed, options=options)
+        parallel_env.reset(seed=seed, options=options)
+        rng = np.random.default_rng(seed)
+        actions = {agent: int(rng.integers(5)) for agent in parallel_env.possible_agents}
+
+        done = set()
+        for agent in aec_env.agent_iter():
+            observation, reward, termination, truncation, info = aec_env.last()
+            if termination or truncation:
+                done.add(agent)
+                aec_env.step(None)
+                continue
+
+            steps = raw_env.steps
+            aec_env.step(actions[agent])
+            # the step completing a cycle of the remaining agents matches a parallel step
+            if raw_env.steps > steps:
+                observations, _, terminations, truncations, _ = parallel_env.step(actions)
+                for name in observations:
+                    np.testing.assert_array_equal(observations[name], raw_env.observe(name))
+                    assert terminations[name] == raw_env.terminations[name]
+                    assert truncations[name] == raw_env.truncations[name]
+                actions = {agent: int(rng.integers(5)) for agent in parallel_env.possible_agents}
+
+        assert aec_env.agents == [] and parallel_env.agents == []
+        assert done == set(aec_env.possible_agents)
+
+
+def test_parallel_env_done_agents_take_the_no_op_action() -> None:
+    env = conav_suite.parallel_env(num_agents=2, max_cycles=20)
+    env.reset(seed=0, options={'problem_instance': 'bisect'})
+    world = env.aec_env.world
+    # agent_0 starts on its goal and is done after the first step
+    world.agent_pos[0] = world.goal_pos[0]
+    env.step([0, 0])
+    assert env.agents == ['agent_1']
+
+    env.step({'agent_0': 2, 'agent_1': 2})
+    assert env.aec_env.current_actions[0] == 0
+    env.step(np.array([4, 2]))
+    assert env.aec_env.current_actions == [0, 2]
@@ -0,0 +1,129 @@
+import heapq
+
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.utils.planner import PathPlanner
+from conav_suite.utils.problems import get_problem_list
+
+
+def reference_cost_to_go(planner: PathPlanner, goal: np.ndarray) -> np.ndarray:
+    # Dijkstra over the planner's grid graph from the free nodes within reach of the goal node
+    num_nodes = len(planner.free)
+    nodes = np.stack(np.divmod(np.arange(num_nodes), planner.resolution), axis=1) * planner.cell_size + planner.low
+    goal_node = planner.low + np.rint((goal - planner.low) / planner.cell_size) * planner.cell_size
+    dist = np.linalg.norm(nodes - goal_node, axis=1)
+    seeded = planner.free & (dist <= planner.goal_threshold - np.linalg.norm(planner.cell_size) / 2)
+    cost = np.where(seeded, dist, np.inf)
+    seeds = np.nonzero(np.isfinite(cost))[0]
+    heap = [(cost[node], node) for node in seeds]
+    heapq.heapify(heap)
+    while heap:
+        node_cost, node = heapq.heappop(heap)
+        if node_cost > cost[node]:
+            continue
+        for m, neighbor in enumerate(planner.neighbors[:, node]):
+            if neighbor < num_nodes and node_cost + planner.move_costs[m] < cost[neighbor]:
+                cost[neighbor] = node_cost + planner.move_costs[m]
+                heapq.heappush(heap, (cost[neighbor], neighbor))
+    return cost
+
+
+@pytest.mark.parametrize('problem_instance', ['cross', 'stellaris'])
+def test_cost_to_go_matches_dijkstra(problem_instance: str) -> None:
+    env = conav_suite.parallel_env(num_agents=3, num_small_obstacles=60)
+    env.reset(seed=5, options={'problem_instance': problem_instance})
+    planner = PathPlanner(env.aec_env.world, resolution=40)
+
+    goals = env.aec_env.world.goal_pos
+    fields = planner.cost_to_go(goals)
+    assert fields.shape == (3, 40, 40)
+    for field, goal in zip(fields, goals):
+        np.testing.assert_allclose(field.ravel(), reference_cost_to_go(planner, goal), atol=1e-9)
+
+
+def test_path_costs_with_distinct_goals_match_dijkstra() -> None:
+    env = conav_suite.parallel_env(num_agents=1, num_small_obstacles=60)
+    env.reset(seed=3, options={'problem_instance': 'quarters'})
+    planner = PathPlanner(env.aec_env.world, resolution=40)
+    points = np.random.default_rng(1).uniform(-1, 1, size=(2, 30, 2))
+
+    start_nodes = planner._start_nodes(points[0])
+    cost, _ = planner._search(planner._goal_nodes(points[1]), start_nodes)
+    for start_node, path_cost, goal in zip(start_nodes, cost[np.arange(30), start_nodes], points[1]):
+        np.testing.assert_allclose(path_cost, reference_cost_to_go(planner, goal)[start_node], atol=1e-9)
+
+
+def test_paths_keep_clear_of_obstacles() -> None:
+    env = conav_suite.parallel_env(num_agents=2, num_small_obstacles=40)
+    env.reset(seed=2, options={'problem_instance': 'scatter'})
+    world = env.aec_env.world
+    planner = PathPlanner(world)
+    sdf = env.aec_env.signed_distance_field()
+
+    starts = np.random.default_rng(0).uniform(-1, 1, size=(200, 2))
+    starts = starts[sdf(starts) > planner.clearance]
+    goals = world.goal_pos[np.arange(len(starts)) % 2]
+    waypoints, lengths = planner.plan(starts, goals)
+    assert (lengths > 0).all()
+
+    for points, length, goal in zip(waypoints, lengths, goals):
+        points = points[:length]
+        np.testing.assert_array_less(np.linalg.norm(points[-1] - goal), planner.goal_threshold)
+        # segments between waypoints run along grid lines or diagonals through free nodes
+        for a, b in zip(points[1:-1], points[2:]):
+            samples = a + np.linspace(0, 1, 20)[:, None] * (b - a)
+            assert (sdf(samples) > world.agents[0].radius).all()
+
+
+def test_enclosed_goal_is_unreachable() -> None:
+    env = conav_suite.parallel_env(num_agents=1, num_small_obstacles=40)
+    env.reset(seed=0, options={'problem_instance': 'bisect'})
+    world = env.aec_env.world
+    angles = np.linspace(0, 2 * np.pi, 40, endpoint=False)
+    world.small_obstacle_pos[:] = np.array([0.5, 0.0]) + 0.3 * np.stack((np.cos(angles), np.sin(angles)), axis=1)
+    planner = PathPlanner(world)
+
+    starts = np.array([[-0.5, 0.0], [0.5, 0.15]])
+    goals = np.array([[0.5, 0.0], [0.5, 0.0]])
+    _, lengths = planner.plan(starts, goals)
+    assert lengths[0] == 0 and lengths[1] > 0
+    _, _, reached = planner.actions(starts, goals)
+    assert not reached[0] and reached[1]
+
+
+@pytest.mark.parametrize('problem_instance', get_problem_list())
+def test_expert_actions_reach_goal(problem_instance: str) -> None:
+    for seed in range(4):
+        env = conav_suite.parallel_env(num_agents=1)
+        env.reset(seed=seed, options={'problem_instance': problem_instance})
+        raw_env = env.aec_env
+        if raw_env._episode_status()['truncations'].any():
+            continue
+        actions, num_steps, reached = raw_env.path_planner().actions(raw_env.world.agent_pos, raw_env.world.goal_pos)
+        assert reached[0]
+
+        for action in actions[0, :num_steps[0]]:
+            _, _, terminations, truncations, _ = env.step([action])
+            assert not truncations['agent_0']
+        assert terminations['agent_0']
+
+
+def test_env_planner_is_rebuilt_after_reset() -> None:
+    env = conav_suite.env()
+    env.reset(seed=0, options={'problem_instance': 'quarters'})
+    planner = env.unwrapped.path_planner()
+    assert env.unwrapped.path_planner() is planner
+
+    env.reset(seed=1, options={'problem_instance': 'quarters'})
+    assert env.unwrapped.path_planner() is not planner
+
+
+def test_env_planner_forwards_arguments() -> None:
+    env = conav_suite.env()
+    env.reset(seed=0, options={'problem_instance': 'cross'})
+    planner = env.unwrapped.path_planner(resolution=32, margin=0.05)
+    assert planner.resolution == 32 and planner.clearance == pytest.approx(env.unwrapped.world.agents[0].radius + 0.05)
+    assert env.unwrapped.path_planner(resolution=32, margin=0.05) is planner
+    assert env.unwrapped.path_planner().resolution == 64
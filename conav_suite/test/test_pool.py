@@ -0,0 +1,104 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.recording import Replay, TrajectoryRecorder
+
+
+def test_pool_matches_list_layout_for_the_configured_count() -> None:
+    env = conav_suite.parallel_env(num_agents=2, num_large_obstacles=3, num_small_obstacles=10)
+    pooled = conav_suite.parallel_env(num_agents=2, num_large_obstacles=3, num_small_obstacles=10, large_obstacle_capacity=8)
+    for seed in range(3):
+        env.reset(seed=seed, options={'problem_instance': 'stellaris'})
+        pooled.reset(seed=seed, options={'problem_instance': 'stellaris'})
+        world, pooled_world = env.aec_env.world, pooled.aec_env.world
+
+        np.testing.assert_array_equal(pooled_world.large_obstacle_mask, np.arange(8) < 3)
+        np.testing.assert_array_equal(pooled_world.active_large_obstacle_pos, world.large_obstacle_pos)
+        np.testing.assert_array_equal(pooled_world.small_obstacle_pos, world.small_obstacle_pos)
+        np.testing.assert_array_equal(pooled.state()[:-8].reshape(-1, 2)[4 + 3:], 0.0)
+    assert env.state().shape == env.state_space.shape == (2 * (4 + 3),)
+
+
+def test_obstacle_count_varies_per_episode_without_reallocation() -> None:
+    env = conav_suite.parallel_env(num_agents=2, num_large_obstacles=2, large_obstacle_capacity=6)
+    env.reset(seed=0, options={'problem_instance': 'cross'})
+    world = env.aec_env.world
+    store = world.store
+    assert env.state_space.shape == (2 * (4 + 6) + 6,)
+
+    for seed, count in enumerate((0, 6, 3, 1)):
+        env.reset(seed=seed, options={'problem_instance': 'cross', 'num_large_obstacles': count})
+        assert world.store is store
+        state = env.state()
+        assert state.shape == env.state_space.shape
+        np.testing.assert_array_equal(state[-6:], np.arange(6) < count)
+        np.testing.assert_array_equal(world.large_obstacle_pos[count:], 0.0)
+        assert (world.instance_geometry.contains(world.active_large_obstacle_pos)).all()
+        assert len(env.aec_env._large_obstacle_pos) == count
+
+
+def test_inactive_obstacles_do_not_collide() -> None:
+    env = conav_suite.parallel_env(num_agents=1, num_large_obstacles=0, large_obstacle_capacity=4)
+    env.reset(seed=0, options={'problem_instance': 'cross'})
+    world = env.aec_env.world
+    # inactive obstacles are parked at the origin
+    world.agent_pos[0] = 0.0
+    _, _, _, truncations, _ = env.step([0])
+    assert not truncations['agent_0']
+
+
+def test_add_large_obstacles_activates_pool_slots() -> None:
+    env = conav_suite.env(num_large_obstacles=2, large_obstacle_capacity=4)
+    env.reset(seed=0, options={'problem_instance': 'quarters'})
+    scenario, world = env.unwrapped.scenario, env.unwrapped.world
+
+    scenario.reset_world(world, env.unwrapped.np_random, 'quarters', add_large_obstacles=2)
+    assert world.large_obstacle_mask.all()
+    assert len(world.large_obstacles) == 4
+    with pytest.raises(ValueError):
+        scenario.add_large_obstacles(world, 1)
+
+
+def test_invalid_pool_configurations() -> None:
+    with pytest.raises(ValueError):
+        conav_suite.env(num_large_obstacles=4, large_obstacle_capacity=3)
+    with pytest.raises(ValueError):
+        conav_suite.env(large_obstacle_capacity=11)
+
+    env = conav_suite.env()
+    with pytest.raises(ValueError):
+        env.reset(seed=0, options={'problem_instance': 'cross', 'num_large_obstacles': 2})
+    pooled = conav_suite.env(large_obstacle_capacity=5)
+    with pytest.raises(ValueError):
+        pooled.reset(seed=0, options={'problem_instance': 'cross', 'num_large_obstacles': 6})
+
+
+def test_snapshot_restores_active_obstacles() -> None:
+    env = conav_suite.env(num_agents=2, large_obstacle_capacity=6)
+    env.reset(seed=1, options={'problem_instance': 'stellaris', 'num_large_obstacles': 5})
+    world = env.unwrapped.world
+    snapshot = env.snapshot()
+    state = env.state()
+
+    env.reset(seed=2, options={'problem_instance': 'stellaris', 'num_large_obstacles': 1})
+    env.restore(snapshot)
+    np.testing.assert_array_equal(world.large_obstacle_mask, np.arange(6) < 5)
+    np.testing.assert_array_equal(env.state(), state)
+    assert len(env.unwrapped._large_obstacle_pos) == 5
+
+
+def test_replay_restores_active_obstacles(tmp_path) -> None:
+    env = conav_suite.parallel_env(num_agents=2, max_cycles=5, large_obstacle_capacity=5)
+    with TrajectoryRecorder(env, tmp_path, background=False):
+        for seed, count in enumerate((1, 5)):
+            env.reset(seed=seed, options={'problem_instance': 'cross', 'num_large_obstacles': count})
+            while env.agents:
+                env.step({agent: 2 for agent in env.agents})
+
+    replay = Replay(tmp_path)
+    replay_env = replay.restore(0)
+    np.testing.assert_array_equal(replay.episode(0)['large_obstacle_mask'], np.arange(5) < 1)
+    np.testing.assert_array_equal(replay_env.world.large_obstacle_mask, np.arange(5) < 1)
+    replay_env = replay.restore(len(replay) - 1)
+    assert replay_env.world.large_obstacle_mask.all()
@@ -0,0 +1,80 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.utils.profiling import NullTimers, PhaseTimers, merge_stats
+from conav_suite.vector import AsyncVectorEnv
+
+
+def test_perf_stats_are_empty_when_disabled() -> None:
+    env = conav_suite.parallel_env(num_agents=2)
+    env.reset(seed=0, options={'problem_instance': 'bisect'})
+    env.step({agent: 1 for agent in env.agents})
+
+    assert isinstance(env.aec_env._timers, NullTimers)
+    assert env.perf_stats() == {}
+    assert all('perf' not in info for info in env.aec_env.infos.values())
+    # the disabled timers of every env share last_ns, which must stay empty
+    with pytest.raises(TypeError):
+        env.aec_env._timers.last_ns['step'] = 1
+
+
+def test_aec_env_records_every_phase() -> None:
+    env = conav_suite.env(num_agents=2, profile=True, profile_infos=True)
+    env.reset(seed=1, options={'problem_instance': 'cross'})
+    for _ in range(6):
+        env.observe(env.agent_selection)
+        env.step(0)
+
+    stats = env.perf_stats()
+    for phase in ('reset', 'set_action', 'world_step', 'rewards', 'episode_status', 'observe', 'api_step', 'api_observe'):
+        assert stats[phase]['count'] > 0
+        assert stats[phase]['total_s'] > 0
+    assert stats['world_step']['count'] == 3
+    assert stats['api_step']['count'] == 6
+    assert sum(count for _, count in stats['world_step']['histogram']) == 3
+
+    perf = env.unwrapped.infos['agent_0']['perf']
+    assert set(perf) >= {'set_action', 'world_step', 'episode_status'}
+
+    env.perf_stats(reset=True)
+    assert env.perf_stats() == {}
+
+
+def test_fused_parallel_env_records_phases() -> None:
+    env = conav_suite.parallel_env(num_agents=3, fused_step=True, profile=True)
+    env.reset(seed=0, options={'problem_instance': 'quarters'})
+    env.step({agent: 0 for agent in env.agents})
+
+    stats = env.perf_stats()
+    assert stats['fused_step']['count'] == 1
+    assert stats['parallel_outputs']['count'] == 1
+    assert stats['observe']['count'] == 3 + 3
+
+
+def test_merge_stats_sums_workers() -> None:
+    first, second = PhaseTimers(), PhaseTimers()
+    first.record('world_step', first.now() - 1000)
+    second.record('world_step', second.now() - 3000)
+    second.record('observe', second.now() - 10)
+
+    merged = merge_stats([first.stats(), second.stats()])
+    assert merged['world_step']['count'] == 2
+    np.testing.assert_allclose(merged['world_step']['total_s'], first.stats()['world_step']['total_s'] + second.stats()['world_step']['total_s'])
+    assert sum(count for _, count in merged['world_step']['histogram']) == 2
+    assert merged['observe']['count'] == 1
+
+
+def test_async_vector_env_aggregates_worker_stats() -> None:
+    venv = AsyncVectorEnv(2, 'circle', env_kwargs={'profile': True, 'profile_infos': True})
+    try:
+        venv.reset(seed=0)
+        _, _, _, _, infos = venv.step(np.zeros((2, 1)))
+        assert 'world_step' in infos[0]['perf']
+
+        stats = venv.perf_stats()
+        assert len(stats['workers']) == 2
+        assert stats['total']['world_step']['count'] == 2
+        assert stats['total']['reset']['count'] == 2
+    finally:
+        venv.close()
@@ -0,0 +1,100 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.recording import Replay, TrajectoryRecorder
+
+
+def run_episodes(env: object, problem_instances: list, seed: int = 0) -> tuple:
+    rng = np.random.default_rng(seed)
+    observations, frames = [], []
+    for i, problem_instance in enumerate(problem_instances):
+        obs, _ = env.reset(seed=seed + i, options={'problem_instance': problem_instance})
+        observations.append(np.stack([obs[agent] for agent in env.possible_agents]))
+        frames.append(env.aec_env.draw())
+        while env.agents:
+            obs, *_ = env.step({agent: int(rng.integers(5)) for agent in env.agents})
+            alive = len(obs) == len(env.possible_agents)
+            observations.append(np.stack([obs[agent] for agent in env.possible_agents]) if alive else None)
+            frames.append(env.aec_env.draw())
+    return observations, frames
+
+
+@pytest.mark.parametrize('background', [True, False])
+def test_replay_reproduces_observations_and_frames(tmp_path, background: bool) -> None:
+    env = conav_suite.parallel_env(num_agents=2, max_cycles=30, render_size=64)
+    with TrajectoryRecorder(env, tmp_path, chunk_size=16, episode_chunk_size=2, background=background):
+        observations, frames = run_episodes(env, ['cross', 'stellaris', 'quarters'])
+
+    replay = Replay(tmp_path)
+    assert len(replay) == len(observations)
+    assert replay.num_episodes == 3
+    assert replay.manifest['tick_chunks'][0] == 16
+
+    replay_env = replay.make_env(render_size=64)
+    for i in range(len(replay)):
+        if observations[i] is not None:
+            np.testing.assert_array_equal(replay.observe(i, replay_env), observations[i])
+        np.testing.assert_array_equal(replay.render(i, replay_env), frames[i])
+
+
+def test_recorded_columns_and_episodes(tmp_path) -> None:
+    env = conav_suite.parallel_env(num_agents=3, max_cycles=5)
+    recorder = TrajectoryRecorder(env, tmp_path, chunk_size=4)
+    env.reset(seed=7, options={'problem_instance': 'bisect'})
+    actions = {agent: 2 for agent in env.agents}
+    env.step(actions)
+    env.reset(options={'problem_instance': 'circle'})
+    recorder.close()
+    assert env.aec_env._recorder is None
+
+    replay = Replay(tmp_path)
+    assert len(replay) == 3
+    np.testing.assert_array_equal(replay.column('episode'), [0, 0, 1])
+    np.testing.assert_array_equal(replay.column('step'), [0, 1, 0])
+    np.testing.assert_array_equal(replay.column('action'), [[-1, -1, -1], [2, 2, 2], [-1, -1, -1]])
+
+    first, second = replay.episode(0), replay.episode(1)
+    assert (first['seed'], first['problem_instance'], first['start_tick']) == (7, 'bisect', 0)
+    assert (second['seed'], second['problem_instance'], second['start_tick']) == (-1, 'circle', 2)
+    np.testing.assert_array_equal(second['small_obstacles'], env.aec_env.world.small_obstacle_pos.astype(np.float32))
+
+
+def test_flushed_chunks_are_readable_while_recording(tmp_path) -> None:
+    env = conav_suite.parallel_env()
+    recorder = TrajectoryRecorder(env, tmp_path, chunk_size=1000)
+    env.reset(seed=0, options={'problem_instance': 'corners'})
+    env.step({agent: 0 for agent in env.agents})
+    recorder.flush(wait=True)
+
+    replay = Replay(tmp_path)
+    assert len(replay) == 2
+    assert replay.episode(0)['problem_instance'] == 'corners'
+    recorder.close()
+
+
+@pytest.mark.parametrize('env_kwargs', [
+    {'num_nearest_obstacles': 3, 'sensing_radius': 0.4},
+    {'num_lidar_rays': 16, 'lidar_range': 0.3, 'lidar_targets': ('small_obstacles', 'regions')},
+])
+def test_replay_keeps_observation_mode(tmp_path, env_kwargs: dict) -> None:
+    env = conav_suite.parallel_env(num_agents=2, max_cycles=10, num_small_obstacles=30, **env_kwargs)
+    with TrajectoryRecorder(env, tmp_path, background=False):
+        observations, _ = run_episodes(env, ['cross', 'quarters'])
+
+    replay = Replay(tmp_path)
+    replay_env = replay.make_env()
+    for i in range(len(replay)):
+        if observations[i] is not None:
+            # obstacles are recorded in float32, which shifts relative offsets and ranges slightly
+            np.testing.assert_allclose(replay.observe(i, replay_env), observations[i], atol=1e-6)
+
+
+def test_replay_env_keeps_reward_function(tmp_path) -> None:
+    reward_function = {'step': 0.5, 'success': 2.0, 'instances': {'cross': {'step': 1.0}}}
+    env = conav_suite.parallel_env(reward_function=reward_function)
+    TrajectoryRecorder(env, tmp_path).close()
+
+    replay_env = Replay(tmp_path).make_env()
+    assert replay_env.reward_function.weights == env.aec_env.reward_function.weights
+    assert replay_env.reward_function.instances == env.aec_env.reward_function.instances
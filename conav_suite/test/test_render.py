@@ -0,0 +1,92 @@
+import subprocess
+import sys
+
+import conav_suite
+import numpy as np
+from conav_suite.utils.raster import Rasterizer, camera_range
+
+
+def test_rgb_array_frame_shows_entities() -> None:
+    env = conav_suite.env(render_mode='rgb_array', num_agents=2)
+    env.reset(seed=0, options={'problem_instance': 'bisect'})
+
+    frame = env.render()
+    assert frame.shape == (700, 700, 3)
+    assert frame.dtype == np.uint8
+    assert frame.flags['C_CONTIGUOUS']
+    assert np.any(frame != 255)
+    env.close()
+
+
+def test_static_frame_is_cached_per_reset() -> None:
+    env = conav_suite.parallel_env(render_mode='rgb_array', num_agents=2)
+    env.reset(seed=0, options={'problem_instance': 'quarters'})
+    raw_env = env.aec_env
+
+    env.render()
+    static_frame = raw_env._static_frame
+    for _ in range(3):
+        env.step({agent: 0 for agent in env.agents})
+        env.render()
+    assert raw_env._static_frame is static_frame
+
+    env.reset(seed=1, options={'problem_instance': 'quarters'})
+    assert raw_env._static_frame is None
+    env.render()
+    assert raw_env._static_frame is not static_frame
+    env.close()
+
+
+def test_agents_are_drawn_over_static_frame() -> None:
+    env = conav_suite.parallel_env(render_mode='rgb_array', render_size=(96, 64))
+    env.reset(seed=0, options={'problem_instance': 'circle'})
+    raw_env = env.aec_env
+
+    frame = env.render()
+    assert frame.shape == (64, 96, 3)
+    x, y = raw_env._rasterizer.to_pixels(raw_env.world.agent_pos[0], raw_env._static_cam_range).astype(int)
+    agent_color = (raw_env.world.agents[0].color * 200).astype(np.uint8)
+    np.testing.assert_array_equal(frame[y, x], agent_color)
+    env.close()
+
+
+def test_batched_rendering_matches_single_frames() -> None:
+    worlds = []
+    for seed, problem_instance in enumerate(('bisect', 'cross', 'stellaris')):
+        env = conav_suite.env(num_agents=3)
+        env.reset(seed=seed, options={'problem_instance': problem_instance})
+        worlds.append(env.unwrapped.world)
+
+    rasterizer = Rasterizer(128, 128)
+    frames = rasterizer.render_worlds(worlds)
+    assert frames.shape == (3, 128, 128, 3)
+
+    for world, frame in zip(worlds, frames):
+        cam_range = camera_range(world)
+        single = rasterizer.render_static(world, cam_range)
+        rasterizer.render_agents(single[None], world, world.agent_pos[None], [cam_range])
+        np.testing.assert_array_equal(frame, single)
+
+
+def test_pygame_is_not_imported_without_human_render_mode() -> None:
+    code = (
+        "import sys, conav_suite\n"
+        "env = conav_suite.env(render_mode='rgb_array')\n"
+        "env.reset(options={'problem_instance': 'bisect'})\n"
+        "env.render()\n"
+        "assert 'pygame' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_human_render_mode_displays_frames() -> None:
+    code = (
+        "import os\n"
+        "os.environ['SDL_VIDEODRIVER'] = 'dummy'\n"
+        "import conav_suite\n"
+        "env = conav_suite.parallel_env(render_mode='human', render_size=64)\n"
+        "env.reset(options={'problem_instance': 'bisect'})\n"
+        "env.step({agent: 0 for agent in env.agents})\n"
+        "env.close()\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
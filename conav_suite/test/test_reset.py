@@ -0,0 +1,26 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.utils.problems import get_problem_list
+
+
+@pytest.mark.parametrize("problem_instance", get_problem_list())
+def test_reset_is_reproducible_and_valid(problem_instance: str) -> None:
+    env_a = conav_suite.parallel_env(num_agents=3, num_small_obstacles=40)
+    env_b = conav_suite.parallel_env(num_agents=3, num_small_obstacles=40)
+
+    env_a.reset(seed=11, options={'problem_instance': problem_instance})
+    env_b.reset(seed=11, options={'problem_instance': problem_instance})
+    np.testing.assert_array_equal(env_a.state(), env_b.state())
+
+    world = env_a.aec_env.world
+    scenario = env_a.aec_env.scenario
+    agent_pos = np.array([agent.state.p_pos for agent in world.agents])
+    goal_pos = np.array([goal.state.p_pos for goal in world.goals])
+    small_pos = np.array([obs.state.p_pos for obs in world.small_obstacles])
+
+    assert scenario._outside_instance(world, agent_pos, world.agents[0].radius).all()
+    assert scenario._outside_instance(world, goal_pos, world.agents[0].radius).all()
+    assert scenario._outside_instance(world, small_pos, world.small_obstacles[0].radius).all()
+    assert np.all(np.abs(small_pos) <= 1)
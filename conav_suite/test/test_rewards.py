@@ -0,0 +1,127 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.utils.rewards import RewardFunction
+
+WEIGHTS = {
+    'goal_distance': 0.1,
+    'goal_progress': 1.0,
+    'small_collision': 2.0,
+    'large_collision': 3.0,
+    'success': 10.0,
+    'step': 0.01,
+}
+
+
+def test_rewards_default_to_zero() -> None:
+    env = conav_suite.parallel_env(num_agents=2)
+    env.reset(seed=0, options={'problem_instance': 'bisect'})
+    _, rewards, *_ = env.step([1, 2])
+    assert rewards == {'agent_0': 0.0, 'agent_1': 0.0}
+
+
+def test_rewards_match_reference_terms() -> None:
+    env = conav_suite.parallel_env(num_agents=3, num_small_obstacles=40, reward_function=WEIGHTS)
+    env.reset(seed=2, options={'problem_instance': 'cross'})
+    raw_env = env.aec_env
+
+    rng = np.random.default_rng(0)
+    previous = np.linalg.norm(raw_env.world.agent_pos - raw_env.world.goal_pos, axis=1)
+    done = np.zeros(3, dtype=bool)
+    while env.agents:
+        _, rewards, terminations, truncations, _ = env.step(rng.integers(5, size=3))
+        status = raw_env._episode_status()
+        goal_dist = status['goal_dist']
+        expected = (
+            -WEIGHTS['step']
+            - WEIGHTS['goal_distance'] * goal_dist
+            + WEIGHTS['goal_progress'] * (previous - goal_dist)
+            - WEIGHTS['small_collision'] * (status['small_obs_dist'] <= raw_env._small_obs_threshold)
+            - WEIGHTS['large_collision'] * (status['large_obs_dist'] <= raw_env._large_obs_threshold)
+            + WEIGHTS['success'] * status['terminations']
+        )
+        expected[done] = 0.0
+        for i, agent in enumerate(raw_env.possible_agents):
+            if agent in rewards:
+                assert rewards[agent] == pytest.approx(expected[i])
+        previous = goal_dist
+        done |= status['terminations'] | status['truncations']
+
+
+def test_fused_step_rewards_match() -> None:
+    envs = [conav_suite.parallel_env(num_agents=4, reward_function=WEIGHTS, fused_step=fused) for fused in (False, True)]
+    for env in envs:
+        env.reset(seed=7, options={'problem_instance': 'circle'})
+
+    rng = np.random.default_rng(3)
+    for _ in range(30):
+        actions = rng.integers(5, size=4)
+        (_, rewards, *_), (_, fused_rewards, *_) = [env.step(actions) for env in envs]
+        assert rewards.keys() == fused_rewards.keys()
+        for agent in rewards:
+            assert fused_rewards[agent] == pytest.approx(rewards[agent])
+        if not envs[0].agents:
+            break
+
+
+def test_rewards_are_configurable_per_problem_instance() -> None:
+    reward_function = RewardFunction(step=1.0, instances={'corners': {'step': 5.0}})
+    env = conav_suite.parallel_env(reward_function=reward_function)
+
+    env.reset(seed=0, options={'problem_instance': 'corners'})
+    assert env.step([0])[1]['agent_0'] == -5.0
+    env.reset(seed=0, options={'problem_instance': 'bisect'})
+    assert env.step([0])[1]['agent_0'] == -1.0
+
+
+def test_unknown_reward_terms_raise() -> None:
+    with pytest.raises(ValueError):
+        RewardFunction(distance=1.0)
+    with pytest.raises(ValueError):
+        RewardFunction(instances={'cross': {'bonus': 1.0}})
+
+
+def test_snapshot_restores_reward_state() -> None:
+    env = conav_suite.parallel_env(num_agents=2, reward_function=WEIGHTS)
+    env.reset(seed=4, options={'problem_instance': 'stellaris'})
+    env.step([1, 3])
+    snapshot = env.snapshot()
+
+    first = env.step([2, 4])[1]
+    env.restore(snapshot)
+    assert env.step([2, 4])[1] == first
+
+
+def test_aec_last_reports_accumulated_rewards() -> None:
+    env = conav_suite.env(num_agents=2, reward_function={'step': 1.0, 'goal_distance': 1.0})
+    env.reset(seed=0, options={'problem_instance': 'cross'})
+    raw_env = env.unwrapped
+    reference = RewardFunction(step=1.0, goal_distance=1.0)
+    reference.reset(raw_env)
+
+    rng = np.random.default_rng(1)
+    expected = np.zeros(2)
+    for _ in range(10):
+        # each agent sees the reward of the last world step until it acts again
+        env.step(int(rng.integers(5)))
+        assert env.last()[1] == pytest.approx(expected[1])
+        env.step(int(rng.integers(5)))
+        expected = reference(raw_env._episode_status()).copy()
+        assert env.last()[1] == pytest.approx(expected[0])
+        assert expected[0] != 0.0
+        if any(env.terminations.values()) or any(env.truncations.values()):
+            break
+
+
+def test_aec_agent_iter_accumulates_until_every_agent_is_done() -> None:
+    env = conav_suite.env(num_agents=3, max_cycles=20, reward_function={'step': 1.0})
+    env.reset(seed=0, options={'problem_instance': 'bisect'})
+
+    returns = dict.fromkeys(env.possible_agents, 0.0)
+    for agent in env.agent_iter():
+        _, reward, termination, truncation, _ = env.last()
+        returns[agent] += reward
+        env.step(None if termination or truncation else 0)
+    # every agent gets -1 per world step until it is done
+    assert all(-20 <= value < 0 for value in returns.values())
@@ -0,0 +1,73 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.utils.geometry import get_instance_geometry
+from conav_suite.utils.problems import get_problem_list
+from conav_suite.utils.sdf import SignedDistanceField, grid_nodes, region_field
+
+
+def exact_obstacle_distance(world: object, points: np.ndarray, truncation: float) -> np.ndarray:
+    centers = np.concatenate((world.small_obstacle_pos, world.large_obstacle_pos))
+    radii = np.array([obstacle.radius for obstacle in world.small_obstacles + world.large_obstacles])
+    dist = np.linalg.norm(points[:, None] - centers[None], axis=-1) - radii
+    return np.minimum(dist.min(axis=1), truncation)
+
+
+@pytest.mark.parametrize('problem_instance', get_problem_list())
+def test_region_signed_distance_matches_containment(problem_instance: str) -> None:
+    geometry = get_instance_geometry(problem_instance)
+    points = np.random.default_rng(0).uniform(-1, 1, size=(2000, 2))
+    distance = geometry.signed_distance(points)
+
+    np.testing.assert_array_equal(distance <= 0, geometry.contains(points))
+    # moving a point by its distance can never cross a region boundary
+    step = np.abs(distance)[:, None] * 0.999
+    for direction in ((1, 0), (0, 1), (-1, 0), (0, -1)):
+        moved = points + step * np.array(direction)
+        np.testing.assert_array_equal(geometry.contains(moved), distance <= 0)
+
+
+def test_field_is_exact_at_nodes_and_close_between() -> None:
+    env = conav_suite.parallel_env(num_agents=2, num_small_obstacles=300)
+    env.reset(seed=3, options={'problem_instance': 'cross'})
+    world = env.aec_env.world
+    sdf = SignedDistanceField(world, resolution=129, truncation=0.2)
+
+    nodes = grid_nodes(129).reshape(-1, 2)
+    np.testing.assert_allclose(sdf(nodes), exact_obstacle_distance(world, nodes, 0.2), atol=1e-12)
+
+    points = np.random.default_rng(1).uniform(-1, 1, size=(5000, 2))
+    # bilinear interpolation of a 1-Lipschitz field is off by at most one cell diagonal
+    error = np.abs(sdf(points) - exact_obstacle_distance(world, points, 0.2))
+    assert error.max() <= np.sqrt(2) * 2 / 128
+
+
+def test_region_field_is_cached_across_resets() -> None:
+    assert region_field('stellaris', 64) is region_field('stellaris', 64)
+
+    env = conav_suite.parallel_env()
+    env.reset(seed=0, options={'problem_instance': 'stellaris'})
+    sdf = SignedDistanceField(env.aec_env.world, resolution=64, targets=('regions',))
+    np.testing.assert_array_equal(sdf.field, np.minimum(region_field('stellaris', 64), 0.25))
+
+
+def test_env_field_is_rebuilt_after_reset() -> None:
+    env = conav_suite.env()
+    env.reset(seed=0, options={'problem_instance': 'bisect'})
+    sdf = env.unwrapped.signed_distance_field()
+    assert env.unwrapped.signed_distance_field() is sdf
+
+    env.reset(seed=1, options={'problem_instance': 'bisect'})
+    assert env.unwrapped.signed_distance_field() is not sdf
+    world = env.unwrapped.world
+    assert (env.unwrapped.signed_distance_field()(world.large_obstacle_pos) < 0).all()
+
+
+def test_env_field_forwards_arguments() -> None:
+    env = conav_suite.env()
+    env.reset(seed=0, options={'problem_instance': 'cross'})
+    sdf = env.unwrapped.signed_distance_field(resolution=32, targets=('regions',))
+    assert sdf.field.shape == (32, 32)
+    assert env.unwrapped.signed_distance_field(resolution=32, targets=('regions',)) is sdf
+    assert env.unwrapped.signed_distance_field().field.shape == (128, 128)
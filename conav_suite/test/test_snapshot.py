@@ -0,0 +1,81 @@
+import conav_suite
+import numpy as np
+
+from conav_suite.utils.simple_env import restore_batch, snapshot_batch
+from conav_suite.vector import AsyncVectorEnv
+
+
+def _rollout(env, num_steps: int) -> list:
+    trajectory = []
+    for _ in range(num_steps):
+        if env.terminations[env.agent_selection] or env.truncations[env.agent_selection]:
+            break
+        env.step(int(env.unwrapped.np_random.integers(5)))
+        trajectory.append((env.agent_selection, env.unwrapped.world.agent_pos.copy()))
+    return trajectory
+
+
+def test_restore_rewinds_branching_rollouts() -> None:
+    env = conav_suite.env(num_agents=3, num_small_obstacles=20)
+    env.reset(seed=5, options={'problem_instance': 'cross'})
+    _rollout(env, 4)
+
+    snapshot = env.snapshot()
+    assert snapshot.dtype == np.uint64 and snapshot.ndim == 1
+    first = _rollout(env, 12)
+    env.restore(snapshot)
+    second = _rollout(env, 12)
+
+    assert len(first) == len(second)
+    for (agent_a, pos_a), (agent_b, pos_b) in zip(first, second):
+        assert agent_a == agent_b
+        np.testing.assert_array_equal(pos_a, pos_b)
+
+
+def test_restore_into_another_env_reloads_the_episode() -> None:
+    source = conav_suite.env(num_agents=2)
+    source.reset(seed=1, options={'problem_instance': 'stellaris'})
+    source.step(2)
+    source.step(3)
+    snapshot = source.snapshot()
+
+    target = conav_suite.env(num_agents=2)
+    target.reset(seed=9, options={'problem_instance': 'corners'})
+    target.restore(snapshot)
+
+    assert target.unwrapped.world.problem_instance == 'stellaris'
+    assert target.unwrapped.steps == source.unwrapped.steps
+    np.testing.assert_array_equal(target.unwrapped.world.store.p_pos, source.unwrapped.world.store.p_pos)
+    for agent in source.possible_agents:
+        np.testing.assert_array_equal(target.observe(agent), source.observe(agent))
+    np.testing.assert_array_equal(target.snapshot(), snapshot)
+
+
+def test_restore_batch_broadcasts_one_snapshot() -> None:
+    envs = [conav_suite.parallel_env(num_agents=2) for _ in range(3)]
+    for seed, env in enumerate(envs):
+        env.reset(seed=seed, options={'problem_instance': 'bisect'})
+
+    restore_batch(envs, envs[0].snapshot())
+    snapshots = snapshot_batch(envs)
+    assert (snapshots == snapshots[0]).all()
+
+    observations = [env.step([1, 4])[0] for env in envs]
+    for observation in observations[1:]:
+        for agent in envs[0].possible_agents:
+            np.testing.assert_array_equal(observation[agent], observations[0][agent])
+
+
+def test_async_vector_env_restore_branches_from_one_state() -> None:
+    venv = AsyncVectorEnv(2, 'circle', env_kwargs={'num_agents': 2})
+    try:
+        venv.reset(seed=0)
+        venv.step(np.array([[1, 2], [3, 4]]))
+        snapshot = venv.snapshot()[1]
+
+        observations, infos = venv.restore(snapshot)
+        assert [info['problem_instance'] for info in infos] == ['circle', 'circle']
+        np.testing.assert_array_equal(observations[0], observations[1])
+        np.testing.assert_array_equal(venv.snapshot()[0], snapshot)
+    finally:
+        venv.close()
@@ -0,0 +1,57 @@
+import conav_suite
+import numpy as np
+
+from conav_suite.utils.spatial import UniformGrid, min_distance
+
+
+def test_uniform_grid_min_distance_matches_brute_force() -> None:
+    rng = np.random.default_rng(0)
+    points = rng.uniform(-1, 1, (500, 2))
+    queries = rng.uniform(-1.2, 1.2, (300, 2))
+    cell_size = 0.07
+
+    grid = UniformGrid(points, cell_size)
+    expected = min_distance(queries, points)
+    actual = grid.min_distance(queries)
+
+    within = expected <= cell_size
+    np.testing.assert_allclose(actual[within], expected[within])
+    assert np.all(actual[~within] > cell_size)
+
+
+def test_episode_status_is_independent_of_spatial_index() -> None:
+    env = conav_suite.parallel_env(num_agents=4, num_small_obstacles=300, spatial_index_threshold=0)
+    env.reset(seed=5, options={'problem_instance': 'bisect'})
+    raw_env = env.aec_env
+    grid = raw_env._small_obstacle_index
+    assert grid is not None
+
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        raw_env.current_actions = rng.integers(5, size=4).tolist()
+        raw_env.steps += 1
+        raw_env._execute_world_step()
+
+        raw_env._small_obstacle_index = grid
+        grid_status = raw_env._episode_status()
+        raw_env._small_obstacle_index = None
+        brute_status = raw_env._episode_status()
+
+        assert brute_status['truncations'].dtype == bool
+        np.testing.assert_array_equal(brute_status['terminations'], grid_status['terminations'])
+        np.testing.assert_array_equal(brute_status['truncations'], grid_status['truncations'])
+
+
+def test_uniform_grid_nearest_matches_brute_force() -> None:
+    rng = np.random.default_rng(4)
+    points = rng.uniform(-1, 1, size=(500, 2))
+    queries = rng.uniform(-1.2, 1.2, size=(50, 2))
+    grid = UniformGrid(points, 0.2)
+
+    indices, dist = grid.nearest(queries, 6, radius=0.15)
+    brute = np.linalg.norm(queries[:, None] - points[None], axis=-1)
+    for q in range(len(queries)):
+        expected = [i for i in np.argsort(brute[q], kind='stable') if brute[q, i] <= 0.15][:6]
+        assert indices[q, :len(expected)].tolist() == expected
+        assert (indices[q, len(expected):] == -1).all()
+        np.testing.assert_allclose(dist[q, :len(expected)], brute[q, expected])
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from conav_suite.conav_suite import Scenario, raw_env
+
+
+def test_import_does_not_load_heavy_dependencies() -> None:
+    code = (
+        "import sys\n"
+        "import conav_suite\n"
+        "loaded = [name for name in ('gymnasium', 'pettingzoo', 'pygame', 'matplotlib', 'conav_suite.conav_suite') if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+        "assert callable(conav_suite.env)\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_construction_does_not_load_optional_modules() -> None:
+    code = (
+        "import sys\n"
+        "import conav_suite\n"
+        "conav_suite.env(num_agents=16, num_small_obstacles=200)\n"
+        "optional = ('pygame', 'conav_suite.bank', 'conav_suite.bench', 'conav_suite.recording', 'conav_suite.vector')\n"
+        "loaded = [name for name in optional if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
+def test_construction_skips_placeholder_reset(monkeypatch: pytest.MonkeyPatch) -> None:
+    def fail(*args, **kwargs):
+        raise AssertionError("reset_world called during construction")
+
+    monkeypatch.setattr(Scenario, 'reset_world', fail)
+    env = raw_env(num_agents=3, num_small_obstacles=7, num_large_obstacles=2)
+
+    # positions of the agent, its goal, the other agents and the small obstacles
+    assert env.observation_space('agent_0').shape == (2 * (2 + 2 + 7),)
+    # agents, goals and large obstacles
+    assert env.state_space.shape == (2 * (3 + 3 + 2),)
+
+
+@pytest.mark.parametrize('num_agents, num_small_obstacles', [(1, 10), (4, 50), (16, 200)])
+def test_spaces_match_first_reset(num_agents: int, num_small_obstacles: int) -> None:
+    env = raw_env(num_agents=num_agents, num_small_obstacles=num_small_obstacles)
+    env.reset(seed=0, options={'problem_instance': 'cross'})
+
+    for agent in env.agents:
+        assert env.observe(agent).shape == env.observation_space(agent).shape
+    assert np.shape(env.state()) == env.state_space.shape
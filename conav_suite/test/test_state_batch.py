@@ -0,0 +1,88 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite import state_batch
+from conav_suite.utils.geometry import get_instance_geometry
+from conav_suite.utils.problems import get_problem_list
+
+
+@pytest.mark.parametrize('problem_instance', ['cross', 'stellaris'])
+def test_exact_state_batch_matches_env_resets(problem_instance: str) -> None:
+    seeds = [3, 11, 42]
+    states = state_batch(problem_instance, seeds, num_agents=2, exact=True)
+
+    env = conav_suite.env(num_agents=2)
+    for seed, state in zip(seeds, states):
+        env.reset(seed=seed, options={'problem_instance': problem_instance})
+        np.testing.assert_array_equal(state, env.state().astype(np.float32))
+
+
+@pytest.mark.parametrize('problem_instance', get_problem_list())
+def test_state_batch_respects_reset_constraints(problem_instance: str) -> None:
+    num_agents, num_large_obstacles = 3, 6
+    states = state_batch(problem_instance, np.arange(500), num_agents=num_agents, num_large_obstacles=num_large_obstacles)
+    assert states.shape == (500, 2 * (2 * num_agents + num_large_obstacles))
+    assert states.dtype == np.float32
+
+    positions = states.astype(np.float64).reshape(500, -1, 2)
+    agents_and_goals = positions[:, :2 * num_agents]
+    large_obstacles = positions[:, 2 * num_agents:]
+    assert np.all(np.abs(positions) <= 1)
+
+    geometry = get_instance_geometry(problem_instance)
+    assert not geometry.offset(0.05 - 1e-6).contains(agents_and_goals).any()
+
+    # obstacles lie inside the eroded regions, so every obstacle of a group of num_shapes sits in its own region
+    shapes = geometry.offset(-0.05 + 1e-6)
+    shape_index = shapes.shape_index(large_obstacles)
+    assert np.all(shape_index >= 0)
+    if len(shapes) >= num_large_obstacles:
+        assert all(len(set(row)) == num_large_obstacles for row in shape_index)
+
+
+def test_state_batch_is_deterministic_and_matches_reset_distribution() -> None:
+    seeds = np.arange(400)
+    states = state_batch('stellaris', seeds)
+    np.testing.assert_array_equal(states, state_batch('stellaris', seeds))
+    assert not np.array_equal(states, state_batch('stellaris', seeds + 1))
+
+    # how often each region holds a large obstacle is the same as for sequential resets
+    shapes = get_instance_geometry('stellaris').offset(-0.05)
+    exact = state_batch('stellaris', seeds, exact=True)
+    batched_counts = np.bincount(shapes.shape_index(states[:, 4:].reshape(-1, 2)), minlength=len(shapes))
+    exact_counts = np.bincount(shapes.shape_index(exact[:, 4:].reshape(-1, 2)), minlength=len(shapes))
+    np.testing.assert_allclose(batched_counts / batched_counts.sum(), exact_counts / exact_counts.sum(), atol=0.05)
+
+
+def test_state_batch_rows_only_depend_on_their_seed() -> None:
+    states = state_batch('cross', [5, 9, 13], num_agents=2)
+    np.testing.assert_array_equal(state_batch('cross', [13, 1, 5], num_agents=2)[[2, 0]], states[[0, 2]])
+    np.testing.assert_array_equal(state_batch('cross', [9], num_agents=2)[0], states[1])
+
+
+def test_pooled_state_batch_matches_env_state_layout() -> None:
+    kwargs = {'num_agents': 2, 'num_large_obstacles': 3, 'large_obstacle_capacity': 6}
+    exact = state_batch('stellaris', [0, 4], exact=True, **kwargs)
+    env = conav_suite.env(**kwargs)
+    for seed, state in zip([0, 4], exact):
+        env.reset(seed=seed, options={'problem_instance': 'stellaris'})
+        np.testing.assert_array_equal(state, env.state().astype(np.float32))
+
+    states = state_batch('stellaris', np.arange(50), **kwargs)
+    assert states.shape == (50,) + env.unwrapped.state_space.shape
+    np.testing.assert_array_equal(states[:, -6:], np.tile(np.arange(6) < 3, (50, 1)))
+    np.testing.assert_array_equal(states[:, 2 * (4 + 3):-6], 0.0)
+    np.testing.assert_array_equal(states[:, :2 * (4 + 3)], state_batch('stellaris', np.arange(50), num_agents=2, num_large_obstacles=3))
+
+
+def test_state_is_flat_initial_positions() -> None:
+    env = conav_suite.env(num_agents=2)
+    env.reset(seed=0, options={'problem_instance': 'quarters'})
+    world = env.unwrapped.world
+
+    expected = [agent.state.p_pos for agent in world.agents]
+    expected += [agent.goal.state.p_pos for agent in world.agents]
+    expected += [obstacle.state.p_pos for obstacle in world.large_obstacles]
+    np.testing.assert_array_equal(env.state(), np.concatenate(expected))
+    assert env.state().shape == env.unwrapped.state_space.shape
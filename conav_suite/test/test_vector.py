@@ -0,0 +1,82 @@
+import conav_suite
+import numpy as np
+import pytest
+
+from conav_suite.vector import AsyncVectorEnv
+
+
+def test_async_vector_env_matches_local_env() -> None:
+    venv = AsyncVectorEnv(2, ['bisect', 'cross'], env_kwargs={'num_agents': 2})
+    try:
+        observations, infos = venv.reset(seed=3)
+        assert observations.shape == (2, 2, venv.obs_dim)
+        assert [info['problem_instance'] for info in infos] == ['bisect', 'cross']
+
+        local_env = conav_suite.parallel_env(num_agents=2)
+        local_observations, _ = local_env.reset(seed=4, options={'problem_instance': 'cross'})
+        np.testing.assert_array_equal(observations[1, 0], local_observations['agent_0'])
+        np.testing.assert_array_equal(venv.states[1], local_env.state().astype(np.float32))
+
+        actions = np.array([[1, 2], [3, 4]])
+        observations, rewards, terminations, truncations, infos = venv.step(actions)
+        local_observations, *_ = local_env.step(actions[1])
+        np.testing.assert_array_equal(observations[1, 1], local_observations['agent_1'])
+    finally:
+        venv.close()
+
+
+def test_async_vector_env_auto_reset_follows_schedule() -> None:
+    venv = AsyncVectorEnv(1, [['circle', 'corners']], env_kwargs={'max_cycles': 2})
+    try:
+        venv.reset(seed=0)
+        venv.step(np.zeros((1, 1)))
+        observations, rewards, terminations, truncations, infos = venv.step(np.zeros((1, 1)))
+
+        assert truncations.all()
+        assert infos[0]['episode_done']
+        assert infos[0]['problem_instance'] == 'corners'
+    finally:
+        venv.close()
+
+
+def test_async_vector_env_renders_batch() -> None:
+    venv = AsyncVectorEnv(2, ['bisect', 'cross'], env_kwargs={'render_size': 64})
+    try:
+        venv.reset(seed=0)
+        frames = venv.render()
+        assert frames.shape == (2, 64, 64, 3)
+        assert frames.dtype == np.uint8
+    finally:
+        venv.close()
+
+
+def test_async_vector_env_drains_replies_after_a_worker_error() -> None:
+    venv = AsyncVectorEnv(3, 'bisect')
+    try:
+        venv.reset(seed=0)
+        snapshots = venv.snapshot()
+        # an out of range problem instance index makes the first worker fail
+        snapshots[0, 3] = 999
+        with pytest.raises(RuntimeError, match='worker 0'):
+            venv.restore(snapshots)
+        assert not venv._waiting
+        assert not any(pipe.poll() for pipe in venv._pipes[1:])
+    finally:
+        venv.close()
+    assert venv.closed
+
+
+def test_async_vector_env_reports_a_killed_worker() -> None:
+    venv = AsyncVectorEnv(3, 'bisect')
+    try:
+        venv.reset(seed=0)
+        venv._processes[1].kill()
+        venv._processes[1].join()
+        venv.step_async(np.zeros((3, venv.num_agents), dtype=np.int64))
+        with pytest.raises(RuntimeError, match='worker 1: exited unexpectedly'):
+            venv.step_wait()
+        assert not venv._waiting
+        assert not any(pipe.poll() for pipe in venv._pipes[::2])
+    finally:
+        venv.close()
+    assert venv.closed
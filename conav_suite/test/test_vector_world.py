@@ -0,0 +1,49 @@
+import copy
+
+import numpy as np
+
+from conav_suite.conav_suite import Scenario
+from conav_suite.utils.core import VectorWorld
+
+
+def make_worlds(num_envs: int, num_agents: int, problem_instance: str="cross") -> list:
+    worlds = []
+    for seed in range(num_envs):
+        scenario = Scenario()
+        world = scenario.make_world(num_agents, 4, 0.05, 10, 0.02)
+        rng = np.random.default_rng(seed)
+        scenario.reset_world(world, rng, problem_instance)
+        # pack the agents together so that collision forces are exercised
+        for agent in world.agents:
+            agent.state.p_pos = rng.uniform(-0.15, 0.15, world.dim_p)
+            agent.state.p_vel = rng.uniform(-0.5, 0.5, world.dim_p)
+            agent.action = rng.choice([-2.0, 0.0, 2.0], world.dim_p)
+        worlds.append(world)
+    return worlds
+
+
+def test_vector_world_matches_scalar_step() -> None:
+    worlds = make_worlds(num_envs=4, num_agents=5)
+    vector_world = VectorWorld.from_worlds(worlds)
+    scalar_worlds = copy.deepcopy(worlds)
+
+    for _ in range(10):
+        vector_world.step()
+        for world in scalar_worlds:
+            world.step()
+
+    for b, world in enumerate(scalar_worlds):
+        for i, agent in enumerate(world.agents):
+            np.testing.assert_allclose(vector_world.p_pos[b, i], agent.state.p_pos, rtol=1e-10, atol=1e-12)
+            np.testing.assert_allclose(vector_world.p_vel[b, i], agent.state.p_vel, rtol=1e-10, atol=1e-12)
+
+
+def test_vector_world_store_worlds() -> None:
+    worlds = make_worlds(num_envs=2, num_agents=3)
+    vector_world = VectorWorld.from_worlds(worlds)
+    vector_world.step()
+    vector_world.store_worlds(worlds)
+
+    for b, world in enumerate(worlds):
+        positions = np.array([agent.state.p_pos for agent in world.agents])
+        np.testing.assert_array_equal(positions, vector_world.p_pos[b])
@@ -1,21 +1,80 @@
 import numpy as np
 
+from .spatial import NeighborList
 
-class EntityState:  # physical/external base state of all entities
-    def __init__(self):
+
+class EntityStore:  # struct-of-arrays storage for the state and properties of a group of entities
+    def __init__(self, size, dim_p=2):
         # physical position
-        self.p_pos = None
+        self.p_pos = np.zeros((size, dim_p))
         # physical velocity
-        self.p_vel = None
+        self.p_vel = np.zeros((size, dim_p))
+        # physical action (only used by agents)
+        self.action = np.zeros((size, dim_p))
+        # radius
+        self.radius = np.full(size, 0.050)
+        # mass
+        self.mass = np.ones(size)
+        # entity can move / be pushed
+        self.movable = np.zeros(size, dtype=bool)
+        # entity collides with others
+        self.collide = np.ones(size, dtype=bool)
 
+    def __len__(self):
+        return len(self.radius)
+
+
+class EntityState:  # physical/external base state of all entities, a view onto one row of an EntityStore
+    __slots__ = ('_store', '_row', '_p_pos', '_p_vel', '_action')
 
-class AgentState(EntityState):  # state of agents
     def __init__(self):
-        super().__init__()
+        # standalone entities own a single-row store until they are bound to a world
+        self.bind(EntityStore(1), 0)
+
+    # point this state at a row of a (shared) store
+    def bind(self, store, row):
+        self._store = store
+        self._row = row
+        self._p_pos = store.p_pos[row]
+        self._p_vel = store.p_vel[row]
+        self._action = store.action[row]
+
+    # physical position
+    @property
+    def p_pos(self):
+        return self._p_pos
+
+    @p_pos.setter
+    def p_pos(self, value):
+        self._p_pos[...] = value
+
+    # physical velocity
+    @property
+    def p_vel(self):
+        return self._p_vel
+
+    @p_vel.setter
+    def p_vel(self, value):
+        self._p_vel[...] = value
+
+    # copies rebind to the copied store instead of holding detached arrays
+    def __getstate__(self):
+        return (self._store, self._row)
+
+    def __setstate__(self, state):
+        self.bind(*state)
+
+
+class AgentState(EntityState):  # state of agents
+    __slots__ = ()
 
 
 class Entity:  # properties and state of physical world entity
-    def __init__(self):
+    __slots__ = ('name', 'color', 'state')
+
+    def __init__(self, state=None):
+        # state
+        self.state = EntityState() if state is None else state
         # name
         self.name = ""
         # properties:
@@ -26,22 +85,56 @@ class Entity:  # properties and state of physical world entity
         self.collide = True
         # color
         self.color = None
-        # state
-        self.state = EntityState()
         # mass
         self.initial_mass = 1.0
 
+    # entity radius
+    @property
+    def radius(self):
+        return self.state._store.radius[self.state._row]
+
+    @radius.setter
+    def radius(self, value):
+        self.state._store.radius[self.state._row] = value
+
+    # entity can move / be pushed
+    @property
+    def movable(self):
+        return bool(self.state._store.movable[self.state._row])
+
+    @movable.setter
+    def movable(self, value):
+        self.state._store.movable[self.state._row] = value
+
+    # entity collides with others
+    @property
+    def collide(self):
+        return bool(self.state._store.collide[self.state._row])
+
+    @collide.setter
+    def collide(self, value):
+        self.state._store.collide[self.state._row] = value
+
+    @property
+    def initial_mass(self):
+        return self.state._store.mass[self.state._row]
+
+    @initial_mass.setter
+    def initial_mass(self, value):
+        self.state._store.mass[self.state._row] = value
+
     @property
     def mass(self):
         return self.initial_mass
 
 
 class Goal(Entity): # properties of goal entities
-    def __init__(self):
-        super().__init__()
+    __slots__ = ()
 
 
 class Obstacle(Entity):  # properties of obstacles entities
+    __slots__ = ()
+
     def __init__(self, radius):
         super().__init__()
         # entity can be moved / pushed
@@ -51,16 +144,23 @@ class Obstacle(Entity):  # properties of obstacles entities
         
 
 class Agent(Entity):  # properties of agent entities
+    __slots__ = ('goal',)
+
     def __init__(self):
-        super().__init__()
+        super().__init__(state=AgentState())
         # agents are movable by default
         self.movable = True
         # goal entity
         self.goal = None
-        # state
-        self.state = AgentState()
-        # action
-        self.action = None
+
+    # action
+    @property
+    def action(self):
+        return self.state._action
+
+    @action.setter
+    def action(self, value):
+        self.state._action[...] = 0.0 if value is None else value
         
 
 class World:  # multi-agent world
@@ -81,23 +181,101 @@ class World:  # multi-agent world
         # contact response parameters
         self.contact_force = 1e2
         self.contact_margin = 1e-3
+        # broad-phase collision detection is used above this many agents
+        self.neighbor_list_threshold = 32
+        # pairs further apart than the radii plus this many contact margins exert negligible force (exp(-40))
+        self.collision_cutoff_margins = 40
+        # extra distance tracked by the neighbor list so it only needs rebuilding every few steps
+        self.neighbor_skin = 0.25
+        self.neighbor_list = None
+        self._all_pairs = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self._all_pairs_size = 0
         # minimum distance required between entities (used for resetting positions)
         self.buffer_dist = 0
         # problem instance
         self.problem_instance = None
         self.instance_constr = None
+        self.instance_geometry = None
         self.large_obstacle_radius = large_obstacle_radius
         self.small_obstacle_radius = small_obstacle_radius
-        
+        # number of large obstacles activated at every reset, and the size of the preallocated pool when one is used
+        self.num_large_obstacles = 0
+        self.large_obstacle_capacity = None
+        # large obstacles taking part in the current episode; the others are preallocated but inactive
+        self.large_obstacle_mask = np.zeros(0, dtype=bool)
+        # struct-of-arrays store shared by all entities, rows ordered like entities
+        self.store = EntityStore(0, self.dim_p)
+        self._entities = []
+        self.agent_slice = self.goal_slice = slice(0, 0)
+        self.large_obstacle_slice = self.small_obstacle_slice = slice(0, 0)
+
+    # (re)allocate the shared store and bind every entity to its row
+    def bind_entities(self):
+        entities = self.agents + self.goals + self.large_obstacles + self.small_obstacles
+        store = EntityStore(len(entities), self.dim_p)
+
+        for row, entity in enumerate(entities):
+            old_store, old_row = entity.state._store, entity.state._row
+            for name in ('p_pos', 'p_vel', 'action', 'radius', 'mass', 'movable', 'collide'):
+                getattr(store, name)[row] = getattr(old_store, name)[old_row]
+        for row, entity in enumerate(entities):
+            entity.state.bind(store, row)
+
+        self.store = store
+        self._entities = entities
+
+        offsets = np.cumsum([0, len(self.agents), len(self.goals), len(self.large_obstacles), len(self.small_obstacles)])
+        self.agent_slice = slice(offsets[0], offsets[1])
+        self.goal_slice = slice(offsets[1], offsets[2])
+        self.large_obstacle_slice = slice(offsets[2], offsets[3])
+        self.small_obstacle_slice = slice(offsets[3], offsets[4])
+
+        # large obstacles added to the list are active
+        mask = np.ones(len(self.large_obstacles), dtype=bool)
+        kept = min(len(mask), len(self.large_obstacle_mask))
+        mask[:kept] = self.large_obstacle_mask[:kept]
+        self.large_obstacle_mask = mask
+
+    # rebind whenever entities were added to or removed from the lists
+    def _ensure_bound(self):
+        size = len(self.agents) + len(self.goals) + len(self.large_obstacles) + len(self.small_obstacles)
+        if size != len(self._entities):
+            self.bind_entities()
+        return self.store
+
     # return all entities in the world
     @property
     def entities(self):
-        return self.agents + self.goals + self.large_obstacles + self.small_obstacles
+        self._ensure_bound()
+        return self._entities
+
+    # (n, dim_p) views of entity positions
+    @property
+    def agent_pos(self):
+        return self._ensure_bound().p_pos[self.agent_slice]
+
+    @property
+    def goal_pos(self):
+        return self._ensure_bound().p_pos[self.goal_slice]
+
+    @property
+    def large_obstacle_pos(self):
+        return self._ensure_bound().p_pos[self.large_obstacle_slice]
+
+    @property
+    def small_obstacle_pos(self):
+        return self._ensure_bound().p_pos[self.small_obstacle_slice]
+
+    # positions of the active large obstacles, a copy
+    @property
+    def active_large_obstacle_pos(self):
+        return self.large_obstacle_pos[self.large_obstacle_mask]
 
     # update state of the world
     def step(self):
-        # gather forces applied to entities
-        p_force = [None] * len(self.entities)
+        self._ensure_bound()
+        # gather forces applied to agents
+        p_force = np.zeros((len(self.agents), self.dim_p))
         # apply agent physical controls
         p_force = self.apply_action_force(p_force)
         # apply environment forces
@@ -108,36 +286,61 @@ class World:  # multi-agent world
     # gather agent action forces
     def apply_action_force(self, p_force):
         # set applied forces
-        for i, agent in enumerate(self.agents):
-            if agent.movable:
-                p_force[i] = agent.action
+        movable = self.store.movable[self.agent_slice]
+        p_force[movable] = self.store.action[self.agent_slice][movable]
         return p_force
 
     # gather physical forces acting on agents
     def apply_environment_force(self, p_force):
-        # simple (but inefficient) collision response
-        for a, agent_a in enumerate(self.agents):
-            for b, agent_b in enumerate(self.agents):
-                if b <= a:
-                    continue
-                [f_a, f_b] = self.get_collision_force(agent_a, agent_b)
-                if f_a is not None:
-                    if p_force[a] is None:
-                        p_force[a] = 0.0
-                    p_force[a] = f_a + p_force[a]
-                if f_b is not None:
-                    if p_force[b] is None:
-                        p_force[b] = 0.0
-                    p_force[b] = f_b + p_force[b]
+        agent_a, agent_b = self.collision_pairs()
+        if len(agent_a) == 0:
+            return p_force
+
+        store = self.store
+        p_pos = store.p_pos[self.agent_slice]
+        radius = store.radius[self.agent_slice]
+        # vectorized get_collision_force over the candidate pairs
+        delta_pos = p_pos[agent_a] - p_pos[agent_b]
+        dist = np.sqrt(np.sum(np.square(delta_pos), axis=1))
+        dist_min = radius[agent_a] + radius[agent_b]
+        k = self.contact_margin
+        penetration = np.logaddexp(0, -(dist - dist_min) / k) * k
+        force = self.contact_force * delta_pos / dist[:, None] * penetration[:, None]
+
+        collide = store.collide[self.agent_slice]
+        movable = store.movable[self.agent_slice]
+        colliders = collide[agent_a] & collide[agent_b]
+        force_a = force * (colliders & movable[agent_a])[:, None]
+        force_b = -force * (colliders & movable[agent_b])[:, None]
+
+        num_agents = len(p_force)
+        for d in range(self.dim_p):
+            p_force[:, d] += np.bincount(agent_a, weights=force_a[:, d], minlength=num_agents)
+            p_force[:, d] += np.bincount(agent_b, weights=force_b[:, d], minlength=num_agents)
         return p_force
 
+    # candidate agent pairs (a, b) with a < b for collision response
+    def collision_pairs(self):
+        num_agents = len(self.agents)
+        if num_agents <= self.neighbor_list_threshold:
+            # brute force: every pair
+            if self._all_pairs_size != num_agents:
+                self._all_pairs = np.triu_indices(num_agents, k=1)
+                self._all_pairs_size = num_agents
+            return self._all_pairs
+
+        if self.neighbor_list is None:
+            radius = self.store.radius[self.agent_slice]
+            cutoff = 2 * radius.max() + self.collision_cutoff_margins * self.contact_margin
+            self.neighbor_list = NeighborList(cutoff, self.neighbor_skin)
+        return self.neighbor_list.update(self.store.p_pos[self.agent_slice])
+
     # integrate physical state
     def integrate_state(self, p_force):
-        for i, agent in enumerate(self.agents):
-            agent.state.p_vel = agent.state.p_vel * (1 - self.damping)
-            if p_force[i] is not None:
-                agent.state.p_vel += (p_force[i] / agent.mass) * self.dt
-            agent.state.p_pos += agent.state.p_vel * self.dt
+        p_vel = self.store.p_vel[self.agent_slice]
+        p_vel *= 1 - self.damping
+        p_vel += (p_force / self.store.mass[self.agent_slice, None]) * self.dt
+        self.store.p_pos[self.agent_slice] += p_vel * self.dt
 
     # get collision forces for any contact between two agents
     def get_collision_force(self, agent_a, agent_b):
@@ -156,4 +359,112 @@ class World:  # multi-agent world
         force = self.contact_force * delta_pos / dist * penetration
         force_a = +force if agent_a.movable else None
         force_b = -force if agent_b.movable else None
-        return [force_a, force_b]
\ No newline at end of file
+        return [force_a, force_b]
+
+
+class VectorWorld:  # batched physics for B copies of a world with N agents each
+    def __init__(
+        self,
+        num_envs,
+        num_agents,
+        radius=0.050,
+        mass=1.0,
+        movable=True,
+        collide=True,
+        dt=0.1,
+        damping=0.25,
+        contact_force=1e2,
+        contact_margin=1e-3,
+    ):
+        self.num_envs = num_envs
+        self.num_agents = num_agents
+        # position dimensionality
+        self.dim_p = 2
+        # simulation timestep
+        self.dt = dt
+        # physical damping
+        self.damping = damping
+        # contact response parameters
+        self.contact_force = contact_force
+        self.contact_margin = contact_margin
+        # per-agent properties, shared by every environment in the batch
+        self.radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (num_agents,)).copy()
+        self.mass = np.broadcast_to(np.asarray(mass, dtype=np.float64), (num_agents,)).copy()
+        self.movable = np.broadcast_to(np.asarray(movable, dtype=bool), (num_agents,)).copy()
+        self.collide = np.broadcast_to(np.asarray(collide, dtype=bool), (num_agents,)).copy()
+        # batched state and physical actions
+        self.p_pos = np.zeros((num_envs, num_agents, self.dim_p))
+        self.p_vel = np.zeros((num_envs, num_agents, self.dim_p))
+        self.action = np.zeros((num_envs, num_agents, self.dim_p))
+
+    # build a batch from scalar worlds that share the same agent layout
+    @classmethod
+    def from_worlds(cls, worlds):
+        reference = worlds[0]
+        vector_world = cls(
+            num_envs=len(worlds),
+            num_agents=len(reference.agents),
+            radius=[agent.radius for agent in reference.agents],
+            mass=[agent.mass for agent in reference.agents],
+            movable=[agent.movable for agent in reference.agents],
+            collide=[agent.collide for agent in reference.agents],
+            dt=reference.dt,
+            damping=reference.damping,
+            contact_force=reference.contact_force,
+            contact_margin=reference.contact_margin,
+        )
+        vector_world.load_worlds(worlds)
+        return vector_world
+
+    # copy agent positions, velocities and actions from scalar worlds
+    def load_worlds(self, worlds):
+        for b, world in enumerate(worlds):
+            store = world._ensure_bound()
+            self.p_pos[b] = store.p_pos[world.agent_slice]
+            self.p_vel[b] = store.p_vel[world.agent_slice]
+            self.action[b] = store.action[world.agent_slice]
+
+    # copy agent positions and velocities back into scalar worlds
+    def store_worlds(self, worlds):
+        for b, world in enumerate(worlds):
+            store = world._ensure_bound()
+            store.p_pos[world.agent_slice] = self.p_pos[b]
+            store.p_vel[world.agent_slice] = self.p_vel[b]
+
+    # update state of every world in the batch
+    def step(self):
+        # apply agent physical controls
+        p_force = self.apply_action_force()
+        # apply environment forces
+        p_force += self.apply_environment_force()
+        # integrate physical state
+        self.integrate_state(p_force)
+
+    # gather agent action forces, shape (B, N, dim_p)
+    def apply_action_force(self):
+        return np.where(self.movable[None, :, None], self.action, 0.0)
+
+    # gather pairwise collision forces, shape (B, N, dim_p)
+    def apply_environment_force(self):
+        # delta_pos[b, i, j] points from agent j to agent i
+        delta_pos = self.p_pos[:, :, None, :] - self.p_pos[:, None, :, :]
+        dist = np.sqrt(np.sum(np.square(delta_pos), axis=-1))
+        # an agent never collides with itself; infinite distance yields zero force
+        dist[:, np.arange(self.num_agents), np.arange(self.num_agents)] = np.inf
+        # minimum allowable distance
+        dist_min = self.radius[:, None] + self.radius[None, :]
+        # softmax penetration
+        k = self.contact_margin
+        penetration = np.logaddexp(0, -(dist - dist_min) / k) * k
+        with np.errstate(invalid="ignore"):
+            force = self.contact_force * delta_pos / dist[..., None] * penetration[..., None]
+        colliders = self.collide[:, None] & self.collide[None, :]
+        colliders[np.arange(self.num_agents), np.arange(self.num_agents)] = False
+        force = np.where(colliders[None, :, :, None], force, 0.0)
+        return np.where(self.movable[None, :, None], force.sum(axis=2), 0.0)
+
+    # integrate physical state
+    def integrate_state(self, p_force):
+        self.p_vel *= 1 - self.damping
+        self.p_vel += (p_force / self.mass[None, :, None]) * self.dt
+        self.p_pos += self.p_vel * self.dt
@@ -0,0 +1,174 @@
+import numpy as np
+
+# Physical action for each value of the Discrete(dim_p * 2 + 1) action space, before sensitivity
+ACTION_TABLE = np.array([
+    [0.0, 0.0],
+    [-1.0, 0.0],
+    [+1.0, 0.0],
+    [0.0, -1.0],
+    [0.0, +1.0],
+])
+
+
+class FusedStepKernel:  # action decoding, physics and episode status for all agents over preallocated buffers
+    def __init__(self, env, sensitivity=2.0):
+        self.env = env
+        world = env.world
+        num_agents = len(world.agents)
+        dim_p = world.dim_p
+
+        self.action_table = ACTION_TABLE * sensitivity
+        self.num_actions = dim_p * 2 + 1
+        self.actions = np.zeros(num_agents, dtype=np.int64)
+
+        self.force = np.zeros((num_agents, dim_p))
+        self.tmp = np.zeros((num_agents, dim_p))
+
+        # every agent pair (a, b) with a < b, and an incidence matrix that scatters pair forces onto agents
+        self.pair_a, self.pair_b = np.triu_indices(num_agents, k=1)
+        num_pairs = len(self.pair_a)
+        self.incidence = np.zeros((num_agents, num_pairs))
+        self.pos_a = np.zeros((num_pairs, dim_p))
+        self.pos_b = np.zeros((num_pairs, dim_p))
+        self.delta = np.zeros((num_pairs, dim_p))
+        self.pair_dist = np.zeros(num_pairs)
+        self.penetration = np.zeros(num_pairs)
+
+        self.goal_dist = np.zeros(num_agents)
+        self.small_obs_dist = np.zeros(num_agents)
+        self.large_obs_dist = np.zeros(num_agents)
+        self.terminations = np.zeros(num_agents, dtype=bool)
+        self.truncations = np.zeros(num_agents, dtype=bool)
+        self.crossed = np.zeros(num_agents, dtype=bool)
+
+        self.status = {
+            'terminations': self.terminations,
+            'truncations': self.truncations,
+            'goal_dist': self.goal_dist,
+            'small_obs_dist': self.small_obs_dist,
+            'large_obs_dist': self.large_obs_dist,
+        }
+
+    # Bind views and per-episode constants; called after every reset
+    def reset(self):
+        world = self.env.world
+        store = world.store
+        num_agents = len(world.agents)
+
+        self.p_pos = store.p_pos[world.agent_slice]
+        self.p_vel = store.p_vel[world.agent_slice]
+        self.action = store.action[world.agent_slice]
+        self.goal_pos = world.goal_pos
+        self.small_obstacle_pos = self.env._small_obstacle_pos
+        self.large_obstacle_pos = self.env._large_obstacle_pos
+
+        movable = store.movable[world.agent_slice]
+        collide = store.collide[world.agent_slice]
+        radius = store.radius[world.agent_slice]
+        self.movable = movable[:, None].astype(np.float64)
+        self.mass = store.mass[world.agent_slice][:, None].copy()
+        self.dist_min = radius[self.pair_a] + radius[self.pair_b]
+
+        # force on a is +force, on b is -force, each only if the pair collides and the agent is movable
+        colliders = collide[self.pair_a] & collide[self.pair_b]
+        pairs = np.arange(len(self.pair_a))
+        self.incidence[:] = 0.0
+        self.incidence[self.pair_a, pairs] = colliders & movable[self.pair_a]
+        self.incidence[self.pair_b, pairs] = -1.0 * (colliders & movable[self.pair_b])
+        self.pair_force = np.zeros((len(self.pair_a), world.dim_p))
+
+        # obstacles are static, so small and large obstacles are packed into one block per episode
+        num_small = 0 if self.env._small_obstacle_index is not None else len(self.small_obstacle_pos)
+        if num_small:
+            self.obstacle_pos = np.concatenate((self.small_obstacle_pos, self.large_obstacle_pos))
+        else:
+            self.obstacle_pos = self.large_obstacle_pos.copy()
+        self.small_cols = slice(0, num_small)
+        self.large_cols = slice(num_small, len(self.obstacle_pos))
+        self.obstacle_delta = np.zeros((num_agents, len(self.obstacle_pos), world.dim_p))
+        self.obstacle_dist = np.zeros((num_agents, len(self.obstacle_pos)))
+
+    def __call__(self, current_actions):
+        env = self.env
+        world = env.world
+
+        # decode actions through the lookup table
+        self.actions[:] = current_actions
+        np.remainder(self.actions, self.num_actions, out=self.actions)
+        self.action_table.take(self.actions, axis=0, out=self.action)
+        np.multiply(self.action, self.movable, out=self.force)
+
+        # collision forces
+        if len(world.agents) > world.neighbor_list_threshold:
+            world.apply_environment_force(self.force)
+        elif len(self.pair_a):
+            self._collision_force()
+
+        # integrate physical state
+        self.p_vel *= 1 - world.damping
+        np.divide(self.force, self.mass, out=self.tmp)
+        self.tmp *= world.dt
+        self.p_vel += self.tmp
+        np.multiply(self.p_vel, world.dt, out=self.tmp)
+        self.p_pos += self.tmp
+
+        self._episode_status()
+        return self.status
+
+    def _collision_force(self):
+        world = self.env.world
+        k = world.contact_margin
+
+        self.p_pos.take(self.pair_a, axis=0, out=self.pos_a)
+        self.p_pos.take(self.pair_b, axis=0, out=self.pos_b)
+        np.subtract(self.pos_a, self.pos_b, out=self.delta)
+        np.square(self.delta, out=self.pos_a)
+        np.add.reduce(self.pos_a, axis=1, out=self.pair_dist)
+        np.sqrt(self.pair_dist, out=self.pair_dist)
+
+        # softmax penetration
+        np.subtract(self.dist_min, self.pair_dist, out=self.penetration)
+        self.penetration /= k
+        np.logaddexp(0, self.penetration, out=self.penetration)
+        self.penetration *= k
+
+        np.multiply(self.delta, world.contact_force, out=self.pair_force)
+        self.pair_force /= self.pair_dist[:, None]
+        self.pair_force *= self.penetration[:, None]
+
+        np.matmul(self.incidence, self.pair_force, out=self.tmp)
+        self.force += self.tmp
+
+    def _episode_status(self):
+        env = self.env
+
+        np.subtract(self.p_pos, self.goal_pos, out=self.tmp)
+        np.square(self.tmp, out=self.tmp)
+        np.add.reduce(self.tmp, axis=1, out=self.goal_dist)
+        np.sqrt(self.goal_dist, out=self.goal_dist)
+
+        # squared distances from every agent to every obstacle
+        np.subtract(self.p_pos[:, None, :], self.obstacle_pos[None, :, :], out=self.obstacle_delta)
+        np.square(self.obstacle_delta, out=self.obstacle_delta)
+        np.add.reduce(self.obstacle_delta, axis=2, out=self.obstacle_dist)
+
+        if env._small_obstacle_index is not None:
+            self.small_obs_dist[:] = env._small_obstacle_index.min_distance(self.p_pos)
+        else:
+            self._min_distance(self.small_cols, self.small_obs_dist)
+        self._min_distance(self.large_cols, self.large_obs_dist)
+
+        np.less_equal(self.small_obs_dist, env._small_obs_threshold, out=self.truncations)
+        np.less_equal(self.large_obs_dist, env._large_obs_threshold, out=self.crossed)
+        np.logical_or(self.truncations, self.crossed, out=self.truncations)
+        if env.steps >= env.max_cycles:
+            self.truncations[:] = True
+
+        np.less_equal(self.goal_dist, env._goal_dist_threshold, out=self.terminations)
+
+    def _min_distance(self, cols, out):
+        if cols.start == cols.stop:
+            out[:] = np.inf
+            return
+        np.minimum.reduce(self.obstacle_dist[:, cols], axis=1, out=out)
+        np.sqrt(out, out=out)
@@ -0,0 +1,109 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .problems import get_problem_instance
+
+CIRCLE = 'circle'
+RECTANGLE = 'rectangle'
+
+
+def _read_only(array):
+    array = np.array(array, dtype=np.float64)
+    array.flags.writeable = False
+    return array
+
+
+class InstanceGeometry:  # immutable, compiled regions of a problem instance
+    __slots__ = ('name', 'kind', 'epsilon', 'centers', 'radii', 'lows', 'highs', 'bounds', 'area')
+
+    def __init__(self, name, kind, epsilon, centers=None, radii=None, lows=None, highs=None):
+        set_attr = super().__setattr__
+        set_attr('name', name)
+        set_attr('kind', kind)
+        # offset applied to the raw regions: positive dilates, negative erodes
+        set_attr('epsilon', float(epsilon))
+
+        if kind == CIRCLE:
+            radii = np.maximum(np.asarray(radii, dtype=np.float64), 0.0)
+            centers = np.asarray(centers, dtype=np.float64)
+            lows = centers - radii[:, None]
+            highs = centers + radii[:, None]
+            area = np.pi * radii ** 2
+        else:
+            lows = np.asarray(lows, dtype=np.float64)
+            highs = np.maximum(np.asarray(highs, dtype=np.float64), lows)
+            area = np.prod(highs - lows, axis=1)
+
+        set_attr('centers', None if centers is None else _read_only(centers))
+        set_attr('radii', None if radii is None else _read_only(radii))
+        set_attr('lows', _read_only(lows))
+        set_attr('highs', _read_only(highs))
+        # per-shape bounding boxes as (min_x, min_y, max_x, max_y)
+        set_attr('bounds', _read_only(np.concatenate((lows, highs), axis=1)))
+        set_attr('area', _read_only(area))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable.")
+
+    # copies and pickles resolve back to the cached instance
+    def __reduce__(self):
+        return (get_instance_geometry, (self.name, self.epsilon))
+
+    def __len__(self):
+        return len(self.area)
+
+    def __repr__(self):
+        return f"InstanceGeometry(name={self.name!r}, kind={self.kind!r}, epsilon={self.epsilon}, shapes={len(self)})"
+
+    # Boolean mask of shape (..., num_shapes), boundaries count as inside
+    def contains_per_shape(self, points):
+        points = np.asarray(points, dtype=np.float64)[..., None, :]
+        if self.kind == CIRCLE:
+            dist_sq = np.sum(np.square(points - self.centers), axis=-1)
+            return dist_sq <= np.square(self.radii)
+        return np.all((self.lows <= points) & (points <= self.highs), axis=-1)
+
+    # Boolean mask of shape (...) for points inside any region
+    def contains(self, points):
+        return np.any(self.contains_per_shape(points), axis=-1)
+
+    # Exact signed distance of shape (...) to the union of the regions, negative inside
+    def signed_distance(self, points):
+        points = np.asarray(points, dtype=np.float64)[..., None, :]
+        if self.kind == CIRCLE:
+            return (np.sqrt(np.sum(np.square(points - self.centers), axis=-1)) - self.radii).min(axis=-1)
+        # per-axis distance outside the slabs, negative inside
+        delta = np.maximum(self.lows - points, points - self.highs)
+        outside = np.sqrt(np.sum(np.square(np.maximum(delta, 0.0)), axis=-1))
+        inside = np.minimum(delta.max(axis=-1), 0.0)
+        return (outside + inside).min(axis=-1)
+
+    # Index of the first region containing each point, -1 if outside every region
+    def shape_index(self, points):
+        inside = self.contains_per_shape(points)
+        return np.where(inside.any(axis=-1), inside.argmax(axis=-1), -1)
+
+    # Dilated (epsilon > 0) or eroded (epsilon < 0) copy, shared through the cache
+    def offset(self, epsilon):
+        return get_instance_geometry(self.name, self.epsilon + epsilon)
+
+
+@lru_cache(maxsize=None)
+def _compile(instance_name, epsilon):
+    instance_constr = get_problem_instance(instance_name)
+
+    if all(np.ndim(radius) == 0 for _, radius in instance_constr):
+        centers = [center for center, _ in instance_constr]
+        radii = [radius + epsilon for _, radius in instance_constr]
+        return InstanceGeometry(instance_name, CIRCLE, epsilon, centers=centers, radii=radii)
+
+    # rectangles are given as ((min_x, max_x), (min_y, max_y)) and offset on every side
+    lows = [(x_bounds[0] - epsilon, y_bounds[0] - epsilon) for x_bounds, y_bounds in instance_constr]
+    highs = [(x_bounds[1] + epsilon, y_bounds[1] + epsilon) for x_bounds, y_bounds in instance_constr]
+    return InstanceGeometry(instance_name, RECTANGLE, epsilon, lows=lows, highs=highs)
+
+
+# Compiled geometry of a problem instance, cached by (instance, epsilon)
+def get_instance_geometry(instance_name, epsilon=0.0):
+    return _compile(instance_name, round(float(epsilon), 12))
@@ -0,0 +1,199 @@
+import numpy as np
+
+from .geometry import CIRCLE
+from .spatial import UniformGrid
+
+LIDAR_TARGETS = ('small_obstacles', 'large_obstacles', 'regions')
+
+
+# Unit directions of num_rays rays spread evenly around the circle, starting along +x, shape (R, 2)
+def ray_directions(num_rays):
+    angles = 2 * np.pi * np.arange(num_rays) / num_rays
+    return np.stack((np.cos(angles), np.sin(angles)), axis=1)
+
+
+# Distance along every ray to the first circle it hits, shape (..., Q, R), inf where no circle is hit.
+# origins are (..., Q, 2) and directions (R, 2); centers are either shared by all queries, (..., M, 2),
+# or given per query, (..., Q, M, 2), with radii broadcasting against centers[..., 0].
+# Rays starting inside a circle hit it at 0; circles at infinity (padding) are never hit
+def cast_circles(origins, directions, centers, radii):
+    origins = np.asarray(origins, dtype=np.float64)
+    centers = np.asarray(centers, dtype=np.float64)
+    radii = np.asarray(radii, dtype=np.float64)
+    if centers.ndim == origins.ndim:
+        centers = centers[..., None, :, :]
+        radii = radii[..., None, :] if radii.ndim else radii
+    if centers.shape[-2] == 0:
+        return np.full(origins.shape[:-1] + (len(directions),), np.inf)
+
+    with np.errstate(invalid='ignore'):
+        offsets = centers - origins[..., :, None, :]
+        # distance along each ray to the point closest to the center, shape (..., Q, M, R)
+        proj = offsets @ directions.T
+        dx, dy = offsets[..., 0], offsets[..., 1]
+        outside = dx * dx + dy * dy - radii * radii
+        disc = proj * proj - outside[..., None]
+        dist = proj - np.sqrt(disc)
+        dist = np.where(outside[..., None] < 0, 0.0, dist)
+        hit = (disc >= 0) & (dist >= 0)
+    return np.where(hit, dist, np.inf).min(axis=-2)
+
+
+# cast_circles for the num_rays rays of ray_directions(num_rays) and circles given per query, (..., Q, W, 2).
+# Each circle only spans the few rays within its angular half-width asin(r / d) of the direction to its center,
+# so only those (query, circle, ray) triples are evaluated and scattered into the (..., Q, R) result
+def cast_circles_around(origins, num_rays, centers, radii):
+    origins = np.asarray(origins, dtype=np.float64)
+    batch_shape = origins.shape[:-1]
+    origins = origins.reshape(-1, 2)
+    centers = np.asarray(centers, dtype=np.float64)
+    radii = np.broadcast_to(radii, centers.shape[:-1]).reshape(len(origins), -1)
+    centers = centers.reshape(len(origins), -1, 2)
+    step = 2 * np.pi / num_rays
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        delta = centers - origins[:, None, :]
+        dx, dy = delta[..., 0], delta[..., 1]
+        dist_sq = dx * dx + dy * dy
+        half_width = np.arcsin(np.minimum(radii / np.sqrt(dist_sq), 1.0))
+        angle = np.arctan2(dy, dx)
+        first = np.ceil((angle - half_width) / step)
+        last = np.floor((angle + half_width) / step)
+    # padding at infinity spans no rays, and a query inside a circle hits it at 0 along every ray
+    finite = np.isfinite(dist_sq)
+    inside = finite & (dist_sq <= radii * radii)
+    count = np.where(finite & ~inside, last - first + 1, 0).astype(np.int64)
+    first = np.where(finite, first, 0).astype(np.int64)
+
+    scan = np.full((len(origins), num_rays), np.inf)
+    scan[inside.any(axis=1)] = 0.0
+    max_count = int(count.max(initial=0))
+    if max_count:
+        query, circle, k = np.nonzero(np.arange(max_count) < count[..., None])
+        rays = (first[query, circle] + k) % num_rays
+        directions = ray_directions(num_rays)[rays]
+        proj = dx[query, circle] * directions[:, 0] + dy[query, circle] * directions[:, 1]
+        radius = radii[query, circle]
+        disc = proj * proj - (dist_sq[query, circle] - radius * radius)
+        np.minimum.at(scan, (query, rays), proj - np.sqrt(np.maximum(disc, 0.0)))
+    return scan.reshape(batch_shape + (num_rays,))
+
+
+# Distance along every ray to the first axis-aligned box it hits (slab method), shape (..., Q, R), inf where
+# nothing is hit; lows/highs are (..., M, 2) and shared by all queries, rays starting inside a box hit it at 0
+def cast_boxes(origins, directions, lows, highs):
+    origins = np.asarray(origins, dtype=np.float64)
+    if np.shape(lows)[-2] == 0:
+        return np.full(origins.shape[:-1] + (len(directions),), np.inf)
+    # per axis, broadcast to (..., Q, M, R)
+    origins = origins[..., :, None, None, :]
+    lows = np.asarray(lows, dtype=np.float64)[..., None, :, None, :]
+    highs = np.asarray(highs, dtype=np.float64)[..., None, :, None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inverse = 1.0 / directions
+        t_entry, t_exit = None, None
+        for axis in range(2):
+            t_low = (lows[..., axis] - origins[..., axis]) * inverse[:, axis]
+            t_high = (highs[..., axis] - origins[..., axis]) * inverse[:, axis]
+            # fmin/fmax skip the nan of rays running along a slab boundary
+            entry, exit_ = np.fmin(t_low, t_high), np.fmax(t_low, t_high)
+            t_entry = entry if t_entry is None else np.fmax(t_entry, entry)
+            t_exit = exit_ if t_exit is None else np.fmin(t_exit, exit_)
+    t_entry = np.maximum(t_entry, 0.0)
+    return np.where(t_exit >= t_entry, t_entry, np.inf).min(axis=-2)
+
+
+class Lidar:  # range scan of R rays per agent against the static obstacles and problem instance regions
+    def __init__(self, num_rays, max_range, targets=('small_obstacles',)):
+        unknown = set(targets) - set(LIDAR_TARGETS)
+        if unknown:
+            raise ValueError(f"Unknown lidar targets {sorted(unknown)}, expected some of {list(LIDAR_TARGETS)}.")
+        self.num_rays = num_rays
+        self.max_range = float(max_range)
+        self.targets = tuple(targets)
+        self.directions = ray_directions(num_rays)
+
+    # Obstacles and regions are static during an episode, so the circles are indexed once per reset
+    def reset(self, world):
+        self._centers, self._radii = obstacle_circles(world, self.targets)
+        self._geometry = world.instance_geometry if 'regions' in self.targets else None
+        # a circle can only be hit if its center is within max_range plus its radius of the agent
+        self._grid = None
+        if len(self._centers):
+            self._grid = UniformGrid(self._centers, self.max_range + self._radii.max())
+
+    # Distances of shape (num_agents, R), clipped to max_range
+    def scan(self, agent_pos):
+        scan = np.full((len(agent_pos), self.num_rays), np.inf)
+        if self._grid is not None:
+            candidates, centers = self._grid.candidate_positions(agent_pos)
+            centers, radii = _in_range(agent_pos, centers, self._radii[candidates], self.max_range)
+            scan = cast_circles_around(agent_pos, self.num_rays, centers, radii)
+        if self._geometry is not None:
+            np.minimum(scan, _cast_regions(agent_pos, self.directions, self._geometry), out=scan)
+        return np.minimum(scan, self.max_range, out=scan)
+
+    # Scans of a batch of worlds with the same entity layout in one array pass, shape (B, num_agents, R)
+    def scan_worlds(self, worlds):
+        agent_pos = np.stack([world.agent_pos for world in worlds])
+        circles = [obstacle_circles(world, self.targets) for world in worlds]
+        centers = np.stack([centers for centers, _ in circles])
+        radii = np.stack([radii for _, radii in circles])
+        centers, radii = _in_range(agent_pos, centers[:, None], radii[:, None], self.max_range)
+        scan = cast_circles_around(agent_pos, self.num_rays, centers, radii)
+
+        if 'regions' in self.targets:
+            geometries = [world.instance_geometry for world in worlds]
+            # regions differ per problem instance, so they are padded with shapes at infinity
+            num_regions = max(len(geometry) for geometry in geometries)
+            region_centers = np.full((len(worlds), num_regions, 2), np.inf)
+            region_radii = np.zeros((len(worlds), num_regions))
+            lows = np.full((len(worlds), num_regions, 2), np.inf)
+            highs = np.full((len(worlds), num_regions, 2), np.inf)
+            for b, geometry in enumerate(geometries):
+                if geometry.kind == CIRCLE:
+                    region_centers[b, :len(geometry)] = geometry.centers
+                    region_radii[b, :len(geometry)] = geometry.radii
+                else:
+                    lows[b, :len(geometry)] = geometry.lows
+                    highs[b, :len(geometry)] = geometry.highs
+            np.minimum(scan, cast_circles(agent_pos, self.directions, region_centers, region_radii), out=scan)
+            np.minimum(scan, cast_boxes(agent_pos, self.directions, lows, highs), out=scan)
+        return np.minimum(scan, self.max_range, out=scan)
+
+
+# Per-query circles (..., Q, C, 2) and radii (..., Q, C) (or broadcastable to them) compacted to the circles within
+# max_range of their query, shape (..., Q, W, 2) with W the largest count of any query; padding is at infinity
+def _in_range(origins, centers, radii, max_range):
+    centers, radii = np.broadcast_arrays(centers, radii[..., None])
+    radii = radii[..., 0]
+    with np.errstate(invalid='ignore'):
+        delta = centers - origins[..., :, None, :]
+        dx, dy = delta[..., 0], delta[..., 1]
+        reach = max_range + radii
+        in_range = dx * dx + dy * dy <= reach * reach
+    width = int(in_range.sum(axis=-1).max(initial=0))
+    # stable sort moves the circles in range to the front of every row
+    order = np.argsort(~in_range, axis=-1, kind='stable')[..., :width]
+    keep = np.take_along_axis(in_range, order, axis=-1)
+    centers = np.where(keep[..., None], np.take_along_axis(centers, order[..., None], axis=-2), np.inf)
+    return centers, np.take_along_axis(radii, order, axis=-1)
+
+
+# Centers and radii of the obstacles targeted by the lidar
+def obstacle_circles(world, targets):
+    centers, radii = [np.zeros((0, world.dim_p))], [np.zeros(0)]
+    store = world._ensure_bound()
+    for target, entity_slice in (('small_obstacles', world.small_obstacle_slice), ('large_obstacles', world.large_obstacle_slice)):
+        if target in targets:
+            # inactive large obstacles of the pool are left out
+            active = world.large_obstacle_mask if target == 'large_obstacles' else slice(None)
+            centers.append(store.p_pos[entity_slice][active])
+            radii.append(store.radius[entity_slice][active])
+    return np.concatenate(centers), np.concatenate(radii)
+
+
+def _cast_regions(origins, directions, geometry):
+    if geometry.kind == CIRCLE:
+        return cast_circles(origins, directions, geometry.centers, geometry.radii)
+    return cast_boxes(origins, directions, geometry.lows, geometry.highs)
@@ -0,0 +1,264 @@
+import numpy as np
+
+from .fused_step import ACTION_TABLE
+from .sdf import SDF_BOUNDS, SignedDistanceField
+
+# grid moves as (di, dj) node offsets
+MOVES = np.array([(1, 0), (0, 1), (1, 1), (1, -1), (-1, 0), (0, -1), (-1, -1), (-1, 1)])
+# every search round expands the open nodes whose priority is within this many shortest moves of the lowest one
+_BAND = 2.0
+
+
+class PathPlanner:  # shortest grid paths around the static obstacles of a world, and expert actions following them
+    def __init__(self, world, resolution=64, margin=0.03, max_speed=0.6, lookahead=3, sensitivity=2.0, bounds=SDF_BOUNDS):
+        agent = world.agents[0]
+        self.resolution = resolution
+        # nodes within the agent radius plus margin of an obstacle are blocked, the margin absorbs tracking error
+        self.clearance = agent.radius + margin
+        sdf = SignedDistanceField(world, resolution, truncation=2 * self.clearance, bounds=bounds)
+        self.low, self.cell_size = sdf.low, sdf.cell_size
+        self.free = sdf.field.ravel() > self.clearance
+        self.move_costs = np.sqrt(np.sum(np.square(MOVES * self.cell_size), axis=1))
+        self.goal_threshold = agent.radius + agent.goal.radius
+        self._build_graph()
+        # cost-to-go of every node towards a goal node, solved per goal node on first use by cost_to_go
+        self._fields = {}
+
+        # the agent dynamics of World.integrate_state under the actions of SimpleEnv._set_action
+        self.dt = world.dt
+        self.damping = world.damping
+        self.velocity_change = ACTION_TABLE * sensitivity / agent.mass * world.dt
+        self.max_speed = max_speed
+        # the controller steers towards the path node this many nodes past the nearest one
+        self.lookahead = lookahead
+
+    # Grid neighbors of every node, octile distances between nodes and the offsets of the seed nodes of a goal node
+    def _build_graph(self):
+        resolution = self.resolution
+        num_nodes = resolution * resolution
+        i, j = np.divmod(np.arange(num_nodes), resolution)
+        free = self.free
+
+        # neighbors[m, n] is the node reached from n by move m, or num_nodes (a sentinel of infinite cost) if not allowed
+        self.neighbors = np.full((len(MOVES), num_nodes), num_nodes)
+        for m, (di, dj) in enumerate(MOVES):
+            ni, nj = i + di, j + dj
+            inside = (ni >= 0) & (ni < resolution) & (nj >= 0) & (nj < resolution)
+            target = np.where(inside, ni * resolution + nj, 0)
+            allowed = inside & free & free[target]
+            if di and dj:
+                # diagonal moves may not cut the corner of a blocked node
+                allowed &= free[np.where(inside, ni * resolution + j, 0)] & free[np.where(inside, i * resolution + nj, 0)]
+            self.neighbors[m, allowed] = target[allowed]
+
+        # length of the shortest unobstructed grid path between nodes di and dj rows and columns apart, the
+        # consistent heuristic of searches towards a start
+        di, dj = np.divmod(np.arange(num_nodes), resolution)
+        diagonal = np.minimum(di, dj)
+        self._octile = (diagonal * self.move_costs[2] + (di - diagonal) * self.move_costs[0] +
+                        (dj - diagonal) * self.move_costs[1]).reshape(resolution, resolution)
+
+        # paths end at the first free node within reach of every goal sharing the goal node, so goals close to an
+        # obstacle are reached from their free side
+        radius = self.goal_threshold - np.sqrt(np.sum(np.square(self.cell_size))) / 2
+        reach = np.maximum(np.floor(radius / self.cell_size).astype(np.int64), 0)
+        offsets = np.stack(np.meshgrid(np.arange(-reach[0], reach[0] + 1), np.arange(-reach[1], reach[1] + 1),
+                                       indexing='ij'), axis=-1).reshape(-1, 2)
+        dist = np.sqrt(np.sum(np.square(offsets * self.cell_size), axis=1))
+        self._seed_offsets, self._seed_costs = offsets[dist <= radius], dist[dist <= radius]
+
+    # Index of the free node nearest to each point (Q, 2) among the 5 x 5 nodes around it, or of its nearest node
+    # if none of them is free
+    def _start_nodes(self, points):
+        coords = (points - self.low) / self.cell_size
+        offsets = np.stack(np.meshgrid(np.arange(-2, 3), np.arange(-2, 3), indexing='ij'), axis=-1).reshape(-1, 2)
+        index = np.clip(np.rint(coords).astype(np.int64)[:, None, :] + offsets, 0, self.resolution - 1)
+        nodes = index[..., 0] * self.resolution + index[..., 1]
+        dist = np.sum(np.square(index - coords[:, None, :]), axis=2)
+        free = self.free[nodes]
+        best = np.where(free.any(axis=1), np.argmin(np.where(free, dist, np.inf), axis=1), np.argmin(dist, axis=1))
+        return nodes[np.arange(len(nodes)), best]
+
+    # Index of the node nearest to each point (Q, 2)
+    def _goal_nodes(self, points):
+        index = np.clip(np.rint((points - self.low) / self.cell_size).astype(np.int64), 0, self.resolution - 1)
+        return index[:, 0] * self.resolution + index[:, 1]
+
+    def _node_positions(self, nodes):
+        i, j = np.divmod(nodes, self.resolution)
+        return self.low + np.stack((i, j), axis=-1) * self.cell_size
+
+    # Cost-to-go towards goal nodes (Q,), searched from their seed nodes for all goals at once, shape (Q, num_nodes + 1)
+    # with inf for the sentinel, and the seed nodes (Q, num_nodes + 1). Every round expands the open nodes of each
+    # search whose priority is within a band of its lowest one and reopens the neighbors whose cost drops, so costs
+    # are exact once no node is open. With start nodes (Q,), the priority adds the octile distance to the start (A*)
+    # and a search stops once no open node can lead to a cheaper path from its start, whose cost is then exact
+    def _search(self, goal_nodes, start_nodes=None):
+        num_queries = len(goal_nodes)
+        resolution = self.resolution
+        width = resolution * resolution + 1
+        cost = np.full((num_queries, width), np.inf)
+        # moves to the sentinel never lower its cost
+        cost[:, -1] = -np.inf
+        flat_cost = cost.reshape(-1)
+        seeded = np.zeros(cost.shape, dtype=bool)
+        opener = np.empty(cost.size, dtype=np.int64)
+
+        rows = np.arange(num_queries)
+        i, j = np.divmod(goal_nodes, resolution)
+        si, sj = i[:, None] + self._seed_offsets[:, 0], j[:, None] + self._seed_offsets[:, 1]
+        inside = (si >= 0) & (si < resolution) & (sj >= 0) & (sj < resolution)
+        nodes = np.where(inside, si * resolution + sj, 0)
+        valid = inside & self.free[nodes]
+        index = (rows[:, None] * width + nodes)[valid]
+        values = np.broadcast_to(self._seed_costs, valid.shape)[valid]
+        flat_cost[index] = values
+        seeded.reshape(-1)[index] = True
+
+        if start_nodes is None:
+            heuristic, start_i, start_j = np.zeros((resolution, resolution)), np.zeros_like(rows), np.zeros_like(rows)
+        else:
+            heuristic = self._octile
+            start_i, start_j = np.divmod(start_nodes, resolution)
+            start_index = rows * width + start_nodes
+        band = _BAND * self.move_costs.min()
+        priority = np.empty(0)
+        while len(index):
+            # priority of the entries opened last round
+            queries, nodes = np.divmod(index[len(priority):], width)
+            i, j = np.divmod(nodes, resolution)
+            priority = np.concatenate((priority, values[len(priority):] +
+                                       heuristic[np.abs(i - start_i[queries]), np.abs(j - start_j[queries])]))
+
+            # entries whose node was reached at a lower cost since they were opened are dropped, and so are those
+            # that cannot lead to a cheaper path from the start
+            queries = index // width
+            keep = values <= flat_cost[index]
+            if start_nodes is not None:
+                keep &= priority < flat_cost[start_index][queries]
+            if not keep.all():
+                index, values, priority, queries = index[keep], values[keep], priority[keep], queries[keep]
+                if not len(index):
+                    break
+
+            lowest = np.full(num_queries, np.inf)
+            np.minimum.at(lowest, queries, priority)
+            expand = priority <= lowest[queries] + band
+            expanded, expanded_values = index[expand], values[expand]
+            keep = ~expand
+            index, values, priority = index[keep], values[keep], priority[keep]
+
+            nodes = expanded % width
+            targets = (expanded - nodes) + self.neighbors[:, nodes]
+            candidates = expanded_values + self.move_costs[:, None]
+            improved = candidates < flat_cost[targets]
+            targets, candidates = targets[improved], candidates[improved]
+            np.minimum.at(flat_cost, targets, candidates)
+            # of the moves reaching a node in this round, one of those at its new cost opens it
+            opened = candidates == flat_cost[targets]
+            targets, candidates = targets[opened], candidates[opened]
+            moves = np.arange(len(targets))
+            opener[targets] = moves
+            opened = opener[targets] == moves
+            index = np.concatenate((index, targets[opened]))
+            values = np.concatenate((values, candidates[opened]))
+        cost[:, -1] = np.inf
+        return cost, seeded
+
+    # Cost-to-go in world units from every grid node to each goal (G, 2), shape (G, resolution, resolution) laid out
+    # like SignedDistanceField.field, inf where a goal cannot be reached
+    def cost_to_go(self, goals):
+        unique, inverse = np.unique(self._goal_nodes(np.asarray(goals, dtype=np.float64)), return_inverse=True)
+        missing = np.array([node for node in unique.tolist() if node not in self._fields], dtype=np.int64)
+        if len(missing):
+            fields, _ = self._search(missing)
+            self._fields.update(zip(missing.tolist(), fields[:, :-1]))
+        fields = np.stack([self._fields[node] for node in unique.tolist()]) if len(unique) else \
+            np.zeros((0, self.resolution ** 2))
+        return fields[inverse].reshape(-1, self.resolution, self.resolution)
+
+    # Grid node paths from every start to its goal, shape (Q, L) padded with their last node, and whether it is
+    # within reach of the goal
+    def _node_paths(self, starts, goals):
+        start_nodes = self._start_nodes(starts)
+        cost, seeded = self._search(self._goal_nodes(goals), start_nodes)
+        rows = np.arange(len(start_nodes))
+
+        # every node steps to the neighbor that realizes its cost, whose own cost is then realized by one of its
+        # neighbors down to a seed; seeds and unreachable starts stay put, so paths end once every reachable one is
+        # within reach of its goal
+        paths = [start_nodes]
+        while True:
+            nodes = paths[-1]
+            targets = self.neighbors[:, nodes]
+            step = targets[np.argmin(cost[rows, targets] + self.move_costs[:, None], axis=0), rows]
+            step = np.where(seeded[rows, nodes] | np.isinf(cost[rows, nodes]), nodes, step)
+            if (step == nodes).all():
+                break
+            paths.append(step)
+        return np.stack(paths, axis=1), np.isfinite(cost[rows, start_nodes])
+
+    # Waypoints of the shortest paths from starts (Q, 2) to goals (Q, 2): the start, every node where the path turns
+    # and its last node, which is within reach of the goal. Shape (Q, W, 2) padded with the last node, and the number
+    # of waypoints, 0 where the goal is unreachable
+    def plan(self, starts, goals):
+        starts = np.asarray(starts, dtype=np.float64)
+        paths, reachable = self._node_paths(starts, np.asarray(goals, dtype=np.float64))
+        moves = np.diff(paths, axis=1)
+        move_in = np.concatenate((np.zeros_like(paths[:, :1]), moves), axis=1)
+        move_out = np.concatenate((moves, np.zeros_like(paths[:, :1])), axis=1)
+        turns = (move_in != 0) & (move_in != move_out)
+        turns[:, 0] = True
+
+        lengths = turns.sum(axis=1)
+        # stable sort moves the turns to the front of every row, followed by padding at the last node
+        order = np.argsort(~turns, axis=1, kind='stable')[:, :lengths.max()]
+        order[np.arange(order.shape[1]) >= lengths[:, None]] = paths.shape[1] - 1
+        waypoints = self._node_positions(np.take_along_axis(paths, order, axis=1))
+        waypoints[:, 0] = starts
+        return waypoints, np.where(reachable, lengths, 0)
+
+    # Discrete actions in the encoding of SimpleEnv._set_action that take agents from starts (Q, 2) to goals (Q, 2)
+    # along the shortest paths, shape (Q, max_steps) padded with no-ops, the number of steps until each agent reaches
+    # its goal and whether it does within max_steps. Every agent is rolled out on its own, so collisions between
+    # agents are not accounted for
+    def actions(self, starts, goals, velocities=None, max_steps=100):
+        pos = np.array(starts, dtype=np.float64)
+        goals = np.asarray(goals, dtype=np.float64)
+        vel = np.zeros_like(pos) if velocities is None else np.array(velocities, dtype=np.float64)
+        paths, reachable = self._node_paths(pos, goals)
+        points = self._node_positions(paths)
+        num_queries, last = paths.shape
+        last -= 1
+        rows = np.arange(num_queries)
+
+        actions = np.zeros((num_queries, max_steps), dtype=np.int64)
+        num_steps = np.zeros(num_queries, dtype=np.int64)
+        done = np.sum(np.square(goals - pos), axis=1) <= self.goal_threshold ** 2
+        progress = np.zeros(num_queries, dtype=np.int64)
+        # the path node nearest to an agent is searched among the nodes it can pass in one step at terminal speed
+        terminal_speed = np.abs(self.velocity_change).max() / self.damping
+        window = np.arange(int(np.ceil(terminal_speed * self.dt / self.cell_size.min())) + 2)
+        for step in range(max_steps):
+            if done.all():
+                break
+            candidates = np.minimum(progress[:, None] + window, last)
+            dist = np.sum(np.square(points[rows[:, None], candidates] - pos[:, None, :]), axis=2)
+            progress = candidates[rows, np.argmin(dist, axis=1)]
+            target = points[rows, np.minimum(progress + self.lookahead, last)]
+
+            # the action whose next velocity is closest to max_speed towards the target; goals are reached on
+            # contact, so agents never brake
+            direction = target - pos
+            length = np.sqrt(np.sum(np.square(direction), axis=1, keepdims=True))
+            desired = direction * (self.max_speed / np.maximum(length, 1e-12))
+            next_vel = vel[:, None, :] * (1 - self.damping) + self.velocity_change
+            action = np.argmin(np.sum(np.square(next_vel - desired[:, None, :]), axis=2), axis=1)
+
+            moving = ~done
+            actions[moving, step] = action[moving]
+            num_steps[moving] += 1
+            vel[moving] = next_vel[rows, action][moving]
+            pos[moving] += vel[moving] * self.dt
+            done |= np.sum(np.square(goals - pos), axis=1) <= self.goal_threshold ** 2
+        return actions, num_steps, done & reachable
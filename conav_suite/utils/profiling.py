@@ -0,0 +1,90 @@
+import time
+from types import MappingProxyType
+
+# histogram buckets are powers of two in nanoseconds, bucket i holds durations in [2 ** (i - 1), 2 ** i)
+NUM_BUCKETS = 64
+
+
+class PhaseTimers:  # cumulative time, call count and a log2 histogram per named phase
+    enabled = True
+
+    def __init__(self):
+        self.total_ns = {}
+        self.counts = {}
+        self.histograms = {}
+        # duration of the most recent call of every phase
+        self.last_ns = {}
+
+    def now(self):
+        return time.perf_counter_ns()
+
+    # Record the time since start under phase and return the current time, so phases can be chained
+    def record(self, phase, start):
+        now = time.perf_counter_ns()
+        elapsed = now - start
+        if phase not in self.counts:
+            self.total_ns[phase] = 0
+            self.counts[phase] = 0
+            self.histograms[phase] = [0] * NUM_BUCKETS
+        self.total_ns[phase] += elapsed
+        self.counts[phase] += 1
+        self.histograms[phase][min(elapsed.bit_length(), NUM_BUCKETS - 1)] += 1
+        self.last_ns[phase] = elapsed
+        return now
+
+    def clear(self):
+        self.total_ns.clear()
+        self.counts.clear()
+        self.histograms.clear()
+        self.last_ns.clear()
+
+    # Plain dict of per-phase statistics, safe to pickle and merge with merge_stats
+    def stats(self):
+        return {
+            phase: _phase_stats(self.total_ns[phase], self.counts[phase], self.histograms[phase])
+            for phase in self.counts
+        }
+
+
+class NullTimers:  # stand-in when profiling is disabled, every call is a no-op
+    enabled = False
+    # read-only, the class attribute is shared by every env without profiling
+    last_ns = MappingProxyType({})
+
+    def now(self):
+        return 0
+
+    def record(self, phase, start):
+        return 0
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def _phase_stats(total_ns, count, histogram):
+    return {
+        'count': count,
+        'total_s': total_ns / 1e9,
+        'mean_us': total_ns / count / 1e3 if count else 0.0,
+        # (upper bound in microseconds, count) for every non-empty bucket
+        'histogram': [(2 ** i / 1e3, n) for i, n in enumerate(histogram) if n],
+    }
+
+
+# Aggregate the stats of several envs, e.g. the workers of a vectorized env
+def merge_stats(stats_list):
+    total_ns, counts, histograms = {}, {}, {}
+    for stats in stats_list:
+        for phase, phase_stats in stats.items():
+            if phase not in counts:
+                total_ns[phase] = 0
+                counts[phase] = 0
+                histograms[phase] = [0] * NUM_BUCKETS
+            total_ns[phase] += round(phase_stats['total_s'] * 1e9)
+            counts[phase] += phase_stats['count']
+            for upper_us, n in phase_stats['histogram']:
+                histograms[phase][round(upper_us * 1e3).bit_length() - 1] += n
+    return {phase: _phase_stats(total_ns[phase], counts[phase], histograms[phase]) for phase in counts}
@@ -0,0 +1,124 @@
+import numpy as np
+
+from .geometry import CIRCLE
+
+BACKGROUND_COLOR = (255, 255, 255)
+BORDER_COLOR = (0, 0, 0)
+REGION_COLOR = (255, 210, 210)
+
+
+class Rasterizer:  # headless NumPy renderer drawing bordered circles into uint8 (H, W, 3) frames
+    def __init__(self, width=700, height=700):
+        self.width = int(width)
+        self.height = int(height)
+        # entity radii are drawn independently of the camera range, 350 pixels per unit at a width of 700
+        self.radius_scale = 350 * self.width / 700
+        self._stamps = {}
+
+    # White frames of shape (H, W, 3), or (B, H, W, 3) when batch_size is given
+    def blank(self, batch_size=None):
+        shape = (self.height, self.width, 3) if batch_size is None else (batch_size, self.height, self.width, 3)
+        frames = np.empty(shape, dtype=np.uint8)
+        frames[...] = BACKGROUND_COLOR
+        return frames
+
+    # Map world positions of shape (..., 2) to pixel coordinates; cam_range broadcasts against pos[..., 0]
+    def to_pixels(self, pos, cam_range):
+        pos = np.asarray(pos, dtype=np.float64)
+        scale = 0.9 / np.asarray(cam_range, dtype=np.float64)  # the .9 keeps entities from appearing "too" out-of-bounds
+        x = pos[..., 0] * scale * (self.width // 2) + self.width // 2
+        y = -pos[..., 1] * scale * (self.height // 2) + self.height // 2  # flipped to mimic the old pyglet setup
+        return np.stack((x, y), axis=-1)
+
+    # Pixel offsets of a filled disc and of its one pixel border, cached by radius
+    def _stamp(self, radius):
+        key = round(float(radius), 6)
+        if key not in self._stamps:
+            extent = int(np.ceil(radius))
+            dy, dx = np.mgrid[-extent:extent + 1, -extent:extent + 1]
+            dist_sq = dx ** 2 + dy ** 2
+            inside = dist_sq <= radius ** 2
+            border = inside & (dist_sq > (radius - 1) ** 2)
+            self._stamps[key] = (dy[inside], dx[inside], border[inside])
+        return self._stamps[key]
+
+    # Draw circles sharing one pixel radius into frames (B, H, W, 3) at pixel centers (B, E, 2); colors are (E, 3) or (3,)
+    def draw_circles(self, frames, centers, radius, colors, border=True):
+        centers = np.asarray(centers)
+        if len(frames) == 0 or centers.shape[1] == 0:
+            return frames
+        dy, dx, ring = self._stamp(radius)
+        rows = np.floor(centers[..., 1]).astype(np.int64)[..., None] + dy
+        cols = np.floor(centers[..., 0]).astype(np.int64)[..., None] + dx
+        batch = np.broadcast_to(np.arange(len(frames))[:, None, None], rows.shape)
+        visible = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+
+        colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8).reshape(-1, 3), (centers.shape[1], 3))
+        pixel_colors = np.broadcast_to(colors[None, :, None, :], rows.shape + (3,))
+        if border:
+            pixel_colors = np.where(ring[:, None], np.asarray(BORDER_COLOR, dtype=np.uint8), pixel_colors)
+        frames[batch[visible], rows[visible], cols[visible]] = pixel_colors[visible]
+        return frames
+
+    # Draw entities of shape (B, E, 2) in world coordinates, grouped by radius
+    def draw_entities(self, frames, pos, radii, colors, cam_range):
+        centers = self.to_pixels(pos, np.asarray(cam_range, dtype=np.float64)[:, None])
+        radii = np.asarray(radii) * self.radius_scale
+        colors = np.asarray(colors)
+        for radius in np.unique(radii):
+            group = radii == radius
+            self.draw_circles(frames, centers[:, group], radius, colors[group])
+        return frames
+
+    # Draw the regions of a problem instance into a single frame (H, W, 3)
+    def draw_regions(self, frame, geometry, cam_range, color=REGION_COLOR):
+        if geometry.kind == CIRCLE:
+            centers = self.to_pixels(geometry.centers, cam_range)
+            for center, radius in zip(centers, geometry.radii):
+                pixel_radius = radius * 0.9 / cam_range * (self.width // 2)
+                self.draw_circles(frame[None], center[None, None], pixel_radius, color, border=False)
+            return frame
+
+        # y is flipped, so the top-left corner comes from (low x, high y)
+        top_left = self.to_pixels(np.stack((geometry.lows[:, 0], geometry.highs[:, 1]), axis=1), cam_range)
+        bottom_right = self.to_pixels(np.stack((geometry.highs[:, 0], geometry.lows[:, 1]), axis=1), cam_range)
+        top_left = np.clip(np.floor(top_left).astype(np.int64), 0, (self.width, self.height))
+        bottom_right = np.clip(np.floor(bottom_right).astype(np.int64), 0, (self.width, self.height))
+        for (x0, y0), (x1, y1) in zip(top_left, bottom_right):
+            frame[y0:y1, x0:x1] = color
+        return frame
+
+    # Frame of the goals, obstacles and problem instance regions, which stay fixed during an episode
+    def render_static(self, world, cam_range):
+        frame = self.blank()
+        if world.instance_geometry is not None:
+            self.draw_regions(frame, world.instance_geometry, cam_range)
+        large_obstacles = [obstacle for obstacle, active in zip(world.large_obstacles, world.large_obstacle_mask) if active]
+        entities = world.goals + large_obstacles + world.small_obstacles
+        pos = np.concatenate((world.goal_pos, world.active_large_obstacle_pos, world.small_obstacle_pos))
+        radii = [entity.radius for entity in entities]
+        colors = [entity.color * 200 for entity in entities]
+        return self.draw_entities(frame[None], pos[None], radii, colors, [cam_range])[0]
+
+    # Draw the agents of B environments, with positions (B, N, 2), on top of their static frames (B, H, W, 3)
+    def render_agents(self, frames, world, agent_pos, cam_range):
+        radii = [agent.radius for agent in world.agents]
+        colors = [agent.color * 200 for agent in world.agents]
+        return self.draw_entities(frames, agent_pos, radii, colors, cam_range)
+
+    # Render several worlds at once into a (B, H, W, 3) batch; the worlds must have the same entity layout
+    def render_worlds(self, worlds, cam_range=None):
+        if cam_range is None:
+            cam_range = [camera_range(world) for world in worlds]
+        if len(worlds) == 0:
+            return self.blank(0)
+        cam_range = np.broadcast_to(np.asarray(cam_range, dtype=np.float64), (len(worlds),))
+        frames = np.stack([self.render_static(world, r) for world, r in zip(worlds, cam_range)])
+        agent_pos = np.stack([world.agent_pos for world in worlds])
+        return self.render_agents(frames, worlds[0], agent_pos, cam_range)
+
+
+# Half-width of the view that centers every entity of the world
+def camera_range(world):
+    pos = (world.agent_pos, world.goal_pos, world.active_large_obstacle_pos, world.small_obstacle_pos)
+    return float(np.max(np.abs(np.concatenate(pos))))
@@ -0,0 +1,82 @@
+import numpy as np
+
+# Weight of every reward term; all terms are off by default, which keeps the rewards at 0
+REWARD_WEIGHTS = {
+    # penalty proportional to the distance to the goal, every step
+    'goal_distance': 0.0,
+    # bonus proportional to how much closer to the goal the agent got during the step
+    'goal_progress': 0.0,
+    # penalty on the step an agent touches a small / large obstacle
+    'small_collision': 0.0,
+    'large_collision': 0.0,
+    # bonus on the step an agent reaches its goal
+    'success': 0.0,
+    # constant penalty every step
+    'step': 0.0,
+}
+
+
+class RewardFunction:  # vectorized rewards of all agents, computed from the distances found by the episode status check
+    def __init__(self, instances=None, **weights):
+        self.weights = _check_weights(weights, REWARD_WEIGHTS)
+        # problem instance name -> weights that override the defaults above
+        self.instances = {name: _check_weights(overrides, self.weights) for name, overrides in (instances or {}).items()}
+        # distance to the goal after the last step, and agents that were done before the current step
+        self.goal_dist = None
+        self.done = None
+
+    # Select the weights of the new problem instance and store the initial goal distances; called after every reset
+    def reset(self, env):
+        world = env.world
+        self._weights = self.instances.get(world.problem_instance, self.weights)
+        self._small_obs_threshold = env._small_obs_threshold
+        self._large_obs_threshold = env._large_obs_threshold
+
+        num_agents = len(world.agents)
+        if self.goal_dist is None or len(self.goal_dist) != num_agents:
+            self.goal_dist = np.zeros(num_agents)
+            self.done = np.zeros(num_agents, dtype=bool)
+            self.rewards = np.zeros(num_agents)
+        self.goal_dist[:] = np.sqrt(np.sum(np.square(world.agent_pos - world.goal_pos), axis=1))
+        self.done[:] = False
+
+    # Rewards of shape (num_agents,) from the status dict of _episode_status; agents that were already done get 0
+    def __call__(self, status):
+        weights = self._weights
+        goal_dist = status['goal_dist']
+        rewards = self.rewards
+
+        rewards[:] = -weights['step']
+        if weights['goal_distance']:
+            rewards -= weights['goal_distance'] * goal_dist
+        if weights['goal_progress']:
+            rewards += weights['goal_progress'] * (self.goal_dist - goal_dist)
+        if weights['small_collision']:
+            rewards -= weights['small_collision'] * (status['small_obs_dist'] <= self._small_obs_threshold)
+        if weights['large_collision']:
+            rewards -= weights['large_collision'] * (status['large_obs_dist'] <= self._large_obs_threshold)
+        if weights['success']:
+            rewards += weights['success'] * status['terminations']
+        rewards[self.done] = 0.0
+
+        self.goal_dist[:] = goal_dist
+        self.done |= status['terminations']
+        self.done |= status['truncations']
+        return rewards
+
+
+def _check_weights(weights, defaults):
+    unknown = set(weights) - set(REWARD_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown reward terms {sorted(unknown)}, expected some of {list(REWARD_WEIGHTS)}.")
+    return {**defaults, **{name: float(value) for name, value in weights.items()}}
+
+
+# Build the RewardFunction of an env from its reward_function argument: None, a RewardFunction, or a dict of its arguments;
+# a RewardFunction is copied because it keeps per-episode state
+def make_reward_function(reward_function):
+    if reward_function is None:
+        return None
+    if isinstance(reward_function, RewardFunction):
+        return RewardFunction(instances=reward_function.instances, **reward_function.weights)
+    return RewardFunction(**reward_function)
@@ -0,0 +1,85 @@
+from functools import lru_cache
+
+import numpy as np
+
+from .geometry import get_instance_geometry
+from .lidar import obstacle_circles
+
+SDF_TARGETS = ('small_obstacles', 'large_obstacles', 'regions')
+# entities are placed inside [-1, 1] x [-1, 1]
+SDF_BOUNDS = ((-1.0, -1.0), (1.0, 1.0))
+# circles stamped at once, bounding the (circles, window, window) temporaries
+_CHUNK_SIZE = 256
+
+
+# Grid nodes of shape (resolution, resolution, 2) spanning bounds, node [i, j] is at (x_i, y_j)
+def grid_nodes(resolution, bounds=SDF_BOUNDS):
+    xs = np.linspace(bounds[0][0], bounds[1][0], resolution)
+    ys = np.linspace(bounds[0][1], bounds[1][1], resolution)
+    return np.stack(np.meshgrid(xs, ys, indexing='ij'), axis=-1)
+
+
+# Exact signed distances of the regions of a problem instance at the grid nodes, cached across resets
+@lru_cache(maxsize=None)
+def region_field(instance_name, resolution, bounds=SDF_BOUNDS):
+    field = get_instance_geometry(instance_name).signed_distance(grid_nodes(resolution, bounds))
+    field.flags.writeable = False
+    return field
+
+
+class SignedDistanceField:  # grid of the signed distance to the nearest static obstacle or region, bilinearly interpolated
+    def __init__(self, world, resolution=128, truncation=0.25, targets=('small_obstacles', 'large_obstacles'), bounds=SDF_BOUNDS):
+        unknown = set(targets) - set(SDF_TARGETS)
+        if unknown:
+            raise ValueError(f"Unknown signed distance targets {sorted(unknown)}, expected some of {list(SDF_TARGETS)}.")
+        self.resolution = resolution
+        # distances are exact up to truncation and clipped to it beyond, which keeps the obstacle search local
+        self.truncation = float(truncation)
+        self.targets = tuple(targets)
+        self.bounds = tuple(tuple(float(value) for value in corner) for corner in bounds)
+        self.low = np.asarray(self.bounds[0])
+        self.cell_size = (np.asarray(self.bounds[1]) - self.low) / (resolution - 1)
+        self.field = self._obstacle_field(world)
+        if 'regions' in self.targets:
+            np.minimum(self.field, region_field(world.problem_instance, resolution, self.bounds), out=self.field)
+
+    # Every circle is stamped into the window of grid nodes it can reach within truncation, keeping the smallest distance
+    def _obstacle_field(self, world):
+        field = np.full(self.resolution * self.resolution, self.truncation)
+        centers, radii = obstacle_circles(world, self.targets)
+        if len(centers):
+            half_width = np.ceil((self.truncation + radii.max()) / self.cell_size).astype(np.int64)
+            for start in range(0, len(centers), _CHUNK_SIZE):
+                self._stamp(field, centers[start:start + _CHUNK_SIZE], radii[start:start + _CHUNK_SIZE], half_width)
+        return field.reshape(self.resolution, self.resolution)
+
+    def _stamp(self, field, centers, radii, half_width):
+        axes = []
+        for axis in range(2):
+            # node indices along the axis of every window, shape (C, 2 * half_width + 1)
+            offsets = np.arange(-half_width[axis], half_width[axis] + 1)
+            index = np.rint((centers[:, axis] - self.low[axis]) / self.cell_size[axis]).astype(np.int64)[:, None] + offsets
+            delta = self.low[axis] + index * self.cell_size[axis] - centers[:, axis, None]
+            axes.append((index, (index >= 0) & (index < self.resolution), delta * delta))
+        (ix, valid_x, dx_sq), (iy, valid_y, dy_sq) = axes
+        dist = np.sqrt(dx_sq[:, :, None] + dy_sq[:, None, :]) - radii[:, None, None]
+        keep = valid_x[:, :, None] & valid_y[:, None, :] & (dist < self.truncation)
+        nodes = ix[:, :, None] * self.resolution + iy[:, None, :]
+        np.minimum.at(field, nodes[keep], dist[keep])
+
+    # Bilinearly interpolated signed distance of shape (...) at points (..., 2); points outside the bounds are clamped
+    def __call__(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        coords = np.clip((points - self.low) / self.cell_size, 0.0, self.resolution - 1)
+        index = np.minimum(coords.astype(np.int64), self.resolution - 2)
+        frac = coords - index
+        i, j = index[..., 0], index[..., 1]
+        fx, fy = frac[..., 0], frac[..., 1]
+        field = self.field
+        bottom = field[i, j] * (1 - fx) + field[i + 1, j] * fx
+        top = field[i, j + 1] * (1 - fx) + field[i + 1, j + 1] * fx
+        return bottom * (1 - fy) + top * fy
+
+    # Points whose interpolated clearance is larger than margin, shape (...)
+    def is_free(self, points, margin=0.0):
+        return self(points) > margin
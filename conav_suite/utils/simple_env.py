@@ -1,22 +1,40 @@
 import gymnasium
 import numpy as np
-import pygame
 from gymnasium import spaces
 from gymnasium.utils import seeding
 
-from pettingzoo import AECEnv
-from pettingzoo.utils import wrappers
+from pettingzoo import AECEnv, ParallelEnv
+from pettingzoo.utils import BaseWrapper, wrappers
 from pettingzoo.utils.agent_selector import agent_selector
 
+from .fused_step import FusedStepKernel
+from .planner import PathPlanner
+from .profiling import NullTimers, PhaseTimers
+from .raster import Rasterizer
+from .rewards import make_reward_function
+from .sdf import SignedDistanceField
+from .spatial import UniformGrid, min_distance
+
+_MASK_64 = (1 << 64) - 1
+
+
 def make_env(raw_env):
     def env(**kwargs):
         env = raw_env(**kwargs)
         env = wrappers.AssertOutOfBoundsWrapper(env)
         env = wrappers.OrderEnforcingWrapper(env)
+        if kwargs.get('profile'):
+            env = ProfilingWrapper(env)
         return env
     return env
 
 
+def make_parallel_env(raw_env):
+    def parallel_env(**kwargs):
+        return SimpleParallelEnv(raw_env(**kwargs))
+    return parallel_env
+
+
 class SimpleEnv(AECEnv):
     metadata = {
         "render_modes": ["human", "rgb_array"],
@@ -31,17 +49,29 @@ class SimpleEnv(AECEnv):
         max_cycles,
         render_mode=None,
         local_ratio=None,
+        spatial_index_threshold=128,
+        reset_bank=None,
+        fused_step=False,
+        render_size=700,
+        profile=False,
+        profile_infos=False,
+        reward_function=None,
     ):
         super().__init__()
 
+        # per-phase timers; the null timers make instrumentation a no-op unless profiling is enabled
+        self._timers = PhaseTimers() if profile else NullTimers()
+        # also report the durations of the last world step's phases in infos[agent]['perf']
+        self.profile_infos = profile and profile_infos
+
         self.render_mode = render_mode
-        pygame.init()
         self.viewer = None
-        self.width = 700
-        self.height = 700
-        self.screen = pygame.Surface([self.width, self.height])
+        # render_size is either the side of a square frame or (width, height)
+        self.width, self.height = (render_size, render_size) if np.ndim(render_size) == 0 else render_size
+        self.screen = None
         self.max_size = 1
-        self.game_font = pygame.freetype.Font(None, 20)
+        self._rasterizer = None
+        self._static_frame = None
 
         self.renderOn = False
         self.seed()
@@ -51,8 +81,17 @@ class SimpleEnv(AECEnv):
         self.scenario = scenario
         self.world = world
         self.local_ratio = local_ratio
-
-        self.scenario.reset_world(self.world, self.np_random, 'bisect')
+        # vectorized rewards (rewards.RewardFunction); without one, Scenario.reward is called per agent
+        self.reward_function = make_reward_function(reward_function)
+        # small obstacle counts above this threshold are queried through a uniform grid
+        self.spatial_index_threshold = spatial_index_threshold
+        # optional pre-generated initial states, selected with options['bank_index']
+        if isinstance(reset_bank, str):
+            from ..bank import ResetBank
+            reset_bank = ResetBank(reset_bank)
+        self.reset_bank = reset_bank
+
+        # spaces are sized analytically from the entity counts, no placeholder reset is needed
         self.agents = [agent.name for agent in self.world.agents]
         self.possible_agents = self.agents[:]
         self._index_map = {agent.name: idx for idx, agent in enumerate(self.world.agents)}
@@ -66,7 +105,7 @@ class SimpleEnv(AECEnv):
         for agent in self.world.agents:
             space_dim = self.world.dim_p * 2 + 1
             self.action_spaces[agent.name] = spaces.Discrete(space_dim)
-            obs_dim = len(self.scenario.observation(agent, self.world))
+            obs_dim = self.scenario.obs_dim
             self.observation_spaces[agent.name] = spaces.Box(
                 low=-np.float32(1),
                 high=+np.float32(1),
@@ -76,6 +115,9 @@ class SimpleEnv(AECEnv):
         
         # state space is used by aerial agent; it encodes the positions of all agents, obstacles, and goals
         state_dim = len(world.agents) * 2 + len(world.large_obstacles) * 2 + len(world.agents) * 2
+        # with a large obstacle pool, inactive slots are zero rows followed by one active flag per slot
+        if world.large_obstacle_capacity is not None:
+            state_dim += len(world.large_obstacles)
         self.state_space = spaces.Box(
             low=-np.float32(1),
             high=+np.float32(1),
@@ -84,6 +126,13 @@ class SimpleEnv(AECEnv):
         )
         self.steps = 0
         self.current_actions = [None] * self.num_agents
+        # decode actions, integrate physics and compute episode status in one vectorized pass
+        self._fused_step = FusedStepKernel(self) if fused_step else None
+        # set by recording.TrajectoryRecorder to receive every reset and world step
+        self._recorder = None
+        self._snapshot_layout_cache = None
+        self._sdf = None
+        self._planner = None
 
     def observation_space(self, agent):
         return self.observation_spaces[agent]
@@ -94,31 +143,28 @@ class SimpleEnv(AECEnv):
     def seed(self, seed=None):
         self.np_random, seed = seeding.np_random(seed)
 
-    def observe(self, agent):
-        return self.scenario.observation(
-            self.world.agents[self._index_map[agent]], self.world
-        ).astype(np.float32)
+    # Returns a fresh float32 array unless an out array is provided
+    def observe(self, agent, out=None):
+        start = self._timers.now()
+        if out is None:
+            out = np.empty(self.observation_spaces[agent].shape, dtype=np.float32)
+        observation = self.scenario.observation(
+            self.world.agents[self._index_map[agent]], self.world, out=out
+        )
+        self._timers.record('observe', start)
+        return observation
         
     def state(self):
         if self.steps > 0:
             raise Exception('The state of the system can only be retrieved at the start of an episode before any steps have been taken.')
         
-        state = np.zeros(self.state_space.shape)
-        
-        for i, agent in enumerate(self.world.agents):
-            state[2*i : 2*i+2] = agent.state.p_pos
-
-        start_idx = 2 * len(self.world.agents)
-        for i, agent in enumerate(self.world.agents):
-            state[start_idx + 2*i : start_idx + 2*i+2] = agent.goal.state.p_pos
-        
-        start_idx = 4 * len(self.world.agents)
-        for i, obstacle in enumerate(self.world.large_obstacles):
-            state[start_idx + 2*i : start_idx + 2*i+2] = obstacle.state.p_pos
-             
-        return np.concatenate(state, axis=None)
+        world = self.world
+        if world.large_obstacle_capacity is not None:
+            return np.concatenate((world.agent_pos, world.goal_pos, world.large_obstacle_pos, world.large_obstacle_mask), axis=None)
+        return np.concatenate((world.agent_pos, world.goal_pos, world.large_obstacle_pos), axis=None)
 
     def reset(self, seed=None, return_info=False, options=None):        
+        start = self._timers.now()
         if seed is not None:
             self.seed(seed=seed)
             
@@ -129,7 +175,17 @@ class SimpleEnv(AECEnv):
         if problem_instance not in self.world.problem_list:
             raise ValueError("problem_instance must be in the problem_list.")
         
-        self.scenario.reset_world(self.world, self.np_random, problem_instance)
+        num_large_obstacles = options.get('num_large_obstacles')
+        if num_large_obstacles is not None and self.world.large_obstacle_capacity is None:
+            raise ValueError("num_large_obstacles can only be set per episode with a large_obstacle_capacity.")
+        
+        if options.get('bank_index') is not None:
+            if self.reset_bank is None:
+                raise ValueError("A reset_bank must be provided to reset the environment with a bank_index.")
+            self.reset_bank.reset_world(self.scenario, self.world, problem_instance, options['bank_index'])
+        else:
+            self.scenario.reset_world(self.world, self.np_random, problem_instance, num_large_obstacles=num_large_obstacles)
+        self._reset_static_caches()
 
         self.agents = self.possible_agents[:]
         # PettingZoo Gymansium requires rewards to be set even if not used
@@ -140,12 +196,18 @@ class SimpleEnv(AECEnv):
         self.infos = {name: {} for name in self.agents}
         
         self._reset_called = True
+        self._agent_selector.reinit(self.agents[:])
         self.agent_selection = self._agent_selector.reset()
         self.steps = 0
 
         self.current_actions = [None] * len(self.world.agents)
+        if self._recorder is not None:
+            self._recorder.record_reset(seed)
+        self._timers.record('reset', start)
         
     def _execute_world_step(self):
+        timers = self._timers
+        start = timers.now()
         # set action for each agent
         for i, agent in enumerate(self.world.agents):
             action = self.current_actions[i]
@@ -155,8 +217,23 @@ class SimpleEnv(AECEnv):
                 scenario_action.append(action % mdim)
                 action //= mdim
             self._set_action(scenario_action, agent)
+        start = timers.record('set_action', start)
 
         self.world.step()
+        timers.record('world_step', start)
+
+    # Rewards are assigned after the episode status, whose distances the reward function reuses
+    def _assign_rewards(self, status):
+        if self.reward_function is not None:
+            rewards = self.reward_function(status)
+            if self.local_ratio is not None:
+                # the mean reward of all agents serves as the global reward
+                rewards = rewards.mean() * (1 - self.local_ratio) + rewards * self.local_ratio
+            # agents removed by _was_dead_step get no reward
+            for agent, reward in zip(self.possible_agents, rewards.tolist()):
+                if agent in self.rewards:
+                    self.rewards[agent] = reward
+            return
 
         # PettingZoo Gymansium requires rewards to be set
         # even if they are not used
@@ -174,7 +251,8 @@ class SimpleEnv(AECEnv):
             else:
                 reward = agent_reward
 
-            self.rewards[agent.name] = reward
+            if agent.name in self.rewards:
+                self.rewards[agent.name] = reward
 
     # set env action for a particular agent
     def _set_action(self, action, agent):
@@ -195,61 +273,286 @@ class SimpleEnv(AECEnv):
         # make sure we used all elements of action
         assert len(action) == 0
     
+    # Obstacles are static during an episode, so their positions and spatial index are built once per reset
+    def _build_static_cache(self):
+        agent = self.world.agents[0]
+        self._goal_dist_threshold = agent.radius + agent.goal.radius
+        self._small_obs_threshold = agent.radius + self.world.small_obstacle_radius
+        self._large_obs_threshold = agent.radius + self.world.large_obstacle_radius
+
+        self._small_obstacle_pos = self.world.small_obstacle_pos
+        self._large_obstacle_pos = self.world.active_large_obstacle_pos
+
+        self._small_obstacle_index = None
+        if len(self._small_obstacle_pos) > self.spatial_index_threshold:
+            self._small_obstacle_index = UniformGrid(self._small_obstacle_pos, self._small_obs_threshold)
+
+    # Rebuild everything derived from the goals and obstacles of a new episode
+    def _reset_static_caches(self):
+        self._build_static_cache()
+        self._static_frame = None
+        self._sdf = None
+        self._planner = None
+        if self._fused_step is not None:
+            self._fused_step.reset()
+        if self.reward_function is not None:
+            self.reward_function.reset(self)
+
+    # Signed distance field of the obstacles of the current episode, built on first use after a reset. kwargs (resolution,
+    # truncation, targets, bounds) go to SignedDistanceField; calling with other kwargs than the cached field rebuilds it
+    def signed_distance_field(self, **kwargs):
+        if self._sdf is None or self._sdf[0] != kwargs:
+            self._sdf = (kwargs, SignedDistanceField(self.world, **kwargs))
+        return self._sdf[1]
+
+    # Shortest path planner around the obstacles of the current episode, built on first use after a reset. kwargs
+    # (resolution, margin, ...) go to PathPlanner; calling with other kwargs than the cached planner rebuilds it
+    def path_planner(self, **kwargs):
+        if self._planner is None or self._planner[0] != kwargs:
+            self._planner = (kwargs, PathPlanner(self.world, **kwargs))
+        return self._planner[1]
+
     # Check if episode is terminated or truncated
-    def _episode_status(self):    
-        goal_dist_threshold = self.world.agents[0].radius + self.world.agents[0].goal.radius
-        small_obs_threshold = self.world.agents[0].radius + self.world.small_obstacles[0].radius
-        large_obs_threshold = self.world.agents[0].radius + self.world.large_obstacles[0].radius
-        
-        small_obstacles = [obs for obs in self.world.small_obstacles]
-        large_obstacles = [obs for obs in self.world.large_obstacles]    
+    def _episode_status(self):
+        agent_pos = self.world.agent_pos
+        goal_pos = self.world.goal_pos
 
-        goal_dist = [np.linalg.norm(agent.state.p_pos - agent.goal.state.p_pos) for agent in self.world.agents]
-        small_obs_dist = [min(np.linalg.norm(agent.state.p_pos - obs.state.p_pos) for obs in small_obstacles)
-                          for agent in self.world.agents]
-        large_obs_dist = [min(np.linalg.norm(agent.state.p_pos - obs.state.p_pos) for obs in large_obstacles)
-                          for agent in self.world.agents]
+        goal_dist = np.sqrt(np.sum(np.square(agent_pos - goal_pos), axis=1))
+        small_obs_dist = min_distance(agent_pos, self._small_obstacle_pos, self._small_obstacle_index)
+        large_obs_dist = min_distance(agent_pos, self._large_obstacle_pos)
 
-        crossed_threshold_small = [dist <= small_obs_threshold for dist in small_obs_dist]
-        crossed_threshold_large = [dist <= large_obs_threshold for dist in large_obs_dist]
-        
-        truncations = [(crossed_small or crossed_large) for crossed_small, crossed_large in zip(crossed_threshold_small, crossed_threshold_large)]
-        truncations = [True] * self.num_agents if self.steps >= self.max_cycles else truncations
+        truncations = (small_obs_dist <= self._small_obs_threshold) | (large_obs_dist <= self._large_obs_threshold)
+        if self.steps >= self.max_cycles:
+            truncations[:] = True
 
-        terminations = [False] * self.num_agents
-        for i, dist in enumerate(goal_dist):
-            if dist <= goal_dist_threshold:
-                terminations[i] = True
+        terminations = goal_dist <= self._goal_dist_threshold
 
-        return {'terminations': terminations, 'truncations': truncations}
+        return {
+            'terminations': terminations,
+            'truncations': truncations,
+            'goal_dist': goal_dist,
+            'small_obs_dist': small_obs_dist,
+            'large_obs_dist': large_obs_dist,
+        }
 
     def step(self, action):
         if (
             self.terminations[self.agent_selection]
             or self.truncations[self.agent_selection]
         ):
+            agent = self.agent_selection
             self._was_dead_step(action)
+            # removed agents take the no-op action in the remaining world steps
+            self.current_actions[self._index_map[agent]] = 0
+            # once every done agent is removed, the next cycle runs over the remaining agents
+            if self.agents and not any(self.terminations[agent] or self.truncations[agent] for agent in self.agents):
+                self._agent_selector.reinit(self.agents[:])
+                self.agent_selection = self._agent_selector.reset()
             return
 
-        current_idx = self._index_map[self.agent_selection]
-        next_idx = (current_idx + 1) % self.num_agents
+        cur_agent = self.agent_selection
+        completes_cycle = self._agent_selector.is_last()
         self.agent_selection = self._agent_selector.next()
-        self.current_actions[current_idx] = action
-
-        if next_idx == 0:
-            self.steps += 1
-            self._execute_world_step()
-            status = self._episode_status()
-            for idx, agent in enumerate(self._index_map.keys()):
-                self.terminations[agent] = status['terminations'][idx]
-                self.truncations[agent] = status['truncations'][idx]  
+        self.current_actions[self._index_map[cur_agent]] = action
+
+        # rewards are only non-zero on the step that completes a cycle, and last() reports the accumulated rewards
+        self._clear_rewards()
+        if completes_cycle:
+            self._advance()
+            # agents that got done are selected first, so that they are removed before the next cycle
+            done = [agent for agent in self.agents if self.terminations[agent] or self.truncations[agent]]
+            if done:
+                self.agent_selection = done[0]
+        self._cumulative_rewards[cur_agent] = 0
+        self._accumulate_rewards()
 
         if self.render_mode == "human":
             self.render()
 
+    # Execute one world step with the actions in current_actions and update episode status
+    def _advance(self):
+        timers = self._timers
+        self.steps += 1
+        if self._fused_step is not None:
+            start = timers.now()
+            status = self._fused_step(self.current_actions)
+            start = timers.record('fused_step', start)
+        else:
+            self._execute_world_step()
+            start = timers.now()
+            status = self._episode_status()
+            start = timers.record('episode_status', start)
+        self._assign_rewards(status)
+        timers.record('rewards', start)
+        # agents removed by _was_dead_step keep no status
+        for agent in self.agents:
+            idx = self._index_map[agent]
+            self.terminations[agent] = bool(status['terminations'][idx])
+            self.truncations[agent] = bool(status['truncations'][idx])
+        if self._recorder is not None:
+            self._recorder.record_step(self.current_actions, status)
+
+        if self.profile_infos:
+            perf = {phase: elapsed / 1e9 for phase, elapsed in timers.last_ns.items()}
+            for agent in self.agents:
+                self.infos[agent]['perf'] = perf
+
+    # Per-phase cumulative time, call counts and duration histograms, empty unless profiling is enabled
+    def perf_stats(self, reset=False):
+        stats = self._timers.stats()
+        if reset:
+            self._timers.clear()
+        return stats
+
+    # Word offsets of the sections of the flat uint64 snapshot buffer; the layout only depends on the entity counts
+    def _snapshot_layout(self):
+        num_entities = len(self.world.entities)
+        if self._snapshot_layout_cache is None or self._snapshot_layout_cache['num_entities'] != num_entities:
+            num_agents = len(self.possible_agents)
+            dim_p = self.world.dim_p
+            # integer words: steps, agent selection, selector position, problem instance and active large obstacle bits,
+            # then per-agent status flags and pending actions (0 when unset, action + 1 otherwise), then the PCG64 state
+            num_ints = 5 + 2 * num_agents + 6
+            # float64 words: rewards, cumulative rewards, the reward function's goal distances,
+            # positions of every entity and velocities of the agents
+            agent_words = num_agents * dim_p
+            num_floats = 3 * num_agents + num_entities * dim_p + agent_words
+            self._snapshot_layout_cache = {
+                'num_entities': num_entities,
+                'size': num_ints + num_floats,
+                'ints': slice(0, num_ints),
+                'rewards': slice(num_ints, num_ints + 3 * num_agents),
+                'agent_pos': slice(num_ints + 3 * num_agents, num_ints + 3 * num_agents + agent_words),
+                'static_pos': slice(num_ints + 3 * num_agents + agent_words, num_ints + num_floats - agent_words),
+                'agent_vel': slice(num_ints + num_floats - agent_words, num_ints + num_floats),
+            }
+        return self._snapshot_layout_cache
+
+    # Minimal numeric state of the episode as a flat uint64 buffer, e.g. to fork rollouts and rewind with restore.
+    # Holds steps, the agent selection, the active large obstacles, termination/truncation flags, pending actions,
+    # the PCG64 state, rewards, the positions of every entity and the velocities of the agents (float64 values are stored bitwise)
+    def snapshot(self, out=None):
+        if not self._reset_called:
+            raise ValueError("The environment must be reset before taking a snapshot.")
+        layout = self._snapshot_layout()
+        if out is None:
+            out = np.empty(layout['size'], dtype=np.uint64)
+        elif out.shape != (layout['size'],) or out.dtype != np.uint64:
+            raise ValueError(f"out must be a uint64 array of shape ({layout['size']},).")
+        world = self.world
+
+        rng_state = self.np_random.bit_generator.state
+        if rng_state['bit_generator'] != 'PCG64':
+            raise ValueError("Snapshots require np_random to use the PCG64 bit generator.")
+        state, inc = rng_state['state']['state'], rng_state['state']['inc']
+
+        # agents removed by _was_dead_step are no longer in the status dicts
+        terminations, truncations = self.terminations, self.truncations
+        flags = [
+            1 | terminations[agent] << 1 | truncations[agent] << 2 if agent in terminations else 0
+            for agent in self.possible_agents
+        ]
+        reward_function = self.reward_function
+        if reward_function is not None:
+            flags = [flag | done << 3 for flag, done in zip(flags, reward_function.done.tolist())]
+        actions = [0 if action is None else action + 1 for action in self.current_actions]
+        out[layout['ints']] = [
+            self.steps,
+            self._index_map[self.agent_selection],
+            self._agent_selector._current_agent,
+            world.problem_list.index(world.problem_instance),
+            int(np.dot(world.large_obstacle_mask, 1 << np.arange(len(world.large_obstacles)))),
+            *flags,
+            *actions,
+            state >> 64, state & _MASK_64, inc >> 64, inc & _MASK_64, rng_state['has_uint32'], rng_state['uinteger'],
+        ]
+
+        floats = out.view(np.float64)
+        rewards = floats[layout['rewards']].reshape(3, -1)
+        rewards[0] = [self.rewards.get(agent, 0.0) for agent in self.possible_agents]
+        rewards[1] = [self._cumulative_rewards.get(agent, 0.0) for agent in self.possible_agents]
+        rewards[2] = 0.0 if reward_function is None else reward_function.goal_dist
+        store = world.store
+        floats[layout['agent_pos'].start:layout['static_pos'].stop] = store.p_pos.ravel()
+        floats[layout['agent_vel']] = store.p_vel[world.agent_slice].ravel()
+        return out
+
+    # Put the env back into the state of a snapshot; goals and obstacles are only reloaded when they differ
+    def restore(self, snapshot):
+        layout = self._snapshot_layout()
+        snapshot = np.asarray(snapshot)
+        if snapshot.shape != (layout['size'],) or snapshot.dtype != np.uint64:
+            raise ValueError(f"snapshot must be a uint64 array of shape ({layout['size']},).")
+        world = self.world
+        store = world.store
+        agents = world.agent_slice
+        floats = snapshot.view(np.float64)
+        num_agents = len(self.possible_agents)
+
+        ints = snapshot[layout['ints']].tolist()
+        steps, selection, selector_position, problem_index, large_obstacle_bits = ints[:5]
+        flags = ints[5:5 + num_agents]
+        actions = ints[5 + num_agents:5 + 2 * num_agents]
+        state_hi, state_lo, inc_hi, inc_lo, has_uint32, uinteger = ints[5 + 2 * num_agents:]
+
+        # goals and obstacles are static during an episode, a bitwise comparison tells if they need reloading
+        problem_instance = world.problem_list[problem_index]
+        static_pos = floats[layout['static_pos']]
+        large_obstacle_mask = large_obstacle_bits >> np.arange(len(world.large_obstacles)) & 1 == 1
+        if (
+            not self._reset_called
+            or problem_instance != world.problem_instance
+            or not np.array_equal(large_obstacle_mask, world.large_obstacle_mask)
+            or store.p_pos[agents.stop:].tobytes() != static_pos.tobytes()
+        ):
+            self.scenario._set_problem_instance(world, problem_instance)
+            for agent, goal in zip(world.agents, world.goals):
+                agent.goal = goal
+            store.p_pos[agents.stop:] = static_pos.reshape(-1, world.dim_p)
+            store.p_vel[agents.stop:] = 0.0
+            world.large_obstacle_mask[:] = large_obstacle_mask
+            self.scenario.cache_static_positions(world)
+            self._reset_static_caches()
+        store.p_pos[agents] = floats[layout['agent_pos']].reshape(-1, world.dim_p)
+        store.p_vel[agents] = floats[layout['agent_vel']].reshape(-1, world.dim_p)
+
+        self.np_random.bit_generator.state = {
+            'bit_generator': 'PCG64',
+            'state': {'state': state_hi << 64 | state_lo, 'inc': inc_hi << 64 | inc_lo},
+            'has_uint32': has_uint32,
+            'uinteger': uinteger,
+        }
+
+        rewards = floats[layout['rewards']].tolist()
+        self.agents = []
+        self.rewards, self._cumulative_rewards, self.terminations, self.truncations, self.infos = {}, {}, {}, {}, {}
+        for i, (agent, flag) in enumerate(zip(self.possible_agents, flags)):
+            if flag & 1:
+                self.agents.append(agent)
+                self.rewards[agent] = rewards[i]
+                self._cumulative_rewards[agent] = rewards[num_agents + i]
+                self.terminations[agent] = bool(flag & 2)
+                self.truncations[agent] = bool(flag & 4)
+                self.infos[agent] = {}
+        self.current_actions = [action - 1 if action else None for action in actions]
+        if self.reward_function is not None:
+            self.reward_function.goal_dist[:] = rewards[2 * num_agents:]
+            self.reward_function.done[:] = [bool(flag & 8) for flag in flags]
+
+        self.steps = steps
+        self.agent_selection = self.possible_agents[selection]
+        self._agent_selector.reinit(self.agents[:])
+        self._agent_selector._current_agent = selector_position
+        self._agent_selector.selected_agent = self.agent_selection
+        self._reset_called = True
+
     def enable_render(self, mode="human"):
         if not self.renderOn and mode == "human":
-            self.screen = pygame.display.set_mode(self.screen.get_size())
+            # pygame is only needed to display frames
+            import pygame
+
+            pygame.init()
+            self.screen = pygame.display.set_mode((self.width, self.height))
             self.renderOn = True
 
     def render(self):
@@ -261,50 +564,165 @@ class SimpleEnv(AECEnv):
 
         self.enable_render(self.render_mode)
 
-        observation = np.array(pygame.surfarray.pixels3d(self.screen))
+        start = self._timers.now()
+        frame = self.draw()
+        self._timers.record('render', start)
         if self.render_mode == "human":
-            self.draw()
+            import pygame
+
+            pygame.surfarray.blit_array(self.screen, frame.transpose(1, 0, 2))
             pygame.display.flip()
-        return (
-            np.transpose(observation, axes=(1, 0, 2))
-            if self.render_mode == "rgb_array"
-            else None
-        )
+            return None
+        return frame
 
+    # Rasterize the world into a uint8 (height, width, 3) frame, available in every render mode
     def draw(self):
-        # clear screen
-        self.screen.fill((255, 255, 255))
-
-        # update bounds to center around agent
-        all_poses = [entity.state.p_pos for entity in self.world.entities]
-        cam_range = np.max(np.abs(np.array(all_poses)))
-
-        # update geometry and text positions
-        text_line = 0
-        for e, entity in enumerate(self.world.entities):
-            # geometry
-            x, y = entity.state.p_pos
-            y *= (
-                -1
-            )  # this makes the display mimic the old pyglet setup (ie. flips image)
-            x = (
-                (x / cam_range) * self.width // 2 * 0.9
-            )  # the .9 is just to keep entities from appearing "too" out-of-bounds
-            y = (y / cam_range) * self.height // 2 * 0.9
-            x += self.width // 2
-            y += self.height // 2
-            pygame.draw.circle(
-                self.screen, entity.color * 200, (x, y), entity.radius * 350
-            )  # 350 is an arbitrary scale factor to get pygame to render similar sizes as pyglet
-            pygame.draw.circle(
-                self.screen, (0, 0, 0), (x, y), entity.radius * 350, 1
-            )  # borders
-            assert (
-                0 < x < self.width and 0 < y < self.height
-            ), f"Coordinates {(x, y)} are out of bounds."
+        world = self.world
+        if self._rasterizer is None:
+            self._rasterizer = Rasterizer(self.width, self.height)
+
+        # update bounds to center around agent; agents beyond the static entities widen the camera in steps of 10%,
+        # so the view depends only on the current positions and moving agents rarely force a new static frame
+        if self._static_frame is None:
+            self._static_extent = max(np.max(np.abs(np.concatenate(
+                (world.goal_pos, world.active_large_obstacle_pos, world.small_obstacle_pos)
+            )), initial=0.0), 1e-6)
+        cam_range = self._static_extent
+        agent_extent = np.max(np.abs(world.agent_pos))
+        if agent_extent > cam_range:
+            cam_range *= 1.1 ** np.ceil(np.log(agent_extent / cam_range) / np.log(1.1))
+        if self._static_frame is None or cam_range != self._static_cam_range:
+            self._build_static_frame(cam_range)
+
+        # goals, obstacles and problem instance regions are copied from the static frame, only agents are drawn
+        frame = self._static_frame.copy()
+        self._rasterizer.render_agents(frame[None], world, world.agent_pos[None], [self._static_cam_range])
+        return frame
+
+    def _build_static_frame(self, cam_range):
+        self._static_frame = self._rasterizer.render_static(self.world, cam_range)
+        self._static_cam_range = cam_range
 
     def close(self):
         if self.renderOn:
+            import pygame
+
             pygame.event.pump()
             pygame.display.quit()
-            self.renderOn = False
\ No newline at end of file
+            self.renderOn = False
+
+
+class SimpleParallelEnv(ParallelEnv):
+    def __init__(self, aec_env):
+        super().__init__()
+
+        self.aec_env = aec_env
+        self.metadata = aec_env.metadata
+        self.render_mode = aec_env.render_mode
+        self.possible_agents = aec_env.possible_agents[:]
+        self.agents = []
+
+        self.observation_spaces = aec_env.observation_spaces
+        self.action_spaces = aec_env.action_spaces
+        self.state_space = aec_env.state_space
+
+    def observation_space(self, agent):
+        return self.observation_spaces[agent]
+
+    def action_space(self, agent):
+        return self.action_spaces[agent]
+
+    def reset(self, seed=None, options=None):
+        self.aec_env.reset(seed=seed, options=options)
+        self.agents = self.aec_env.agents[:]
+
+        observations = {agent: self.aec_env.observe(agent) for agent in self.agents}
+        infos = {agent: dict(self.aec_env.infos[agent]) for agent in self.agents}
+        return observations, infos
+
+    # Actions are either a dict keyed by agent name or an array ordered as possible_agents;
+    # agents that are missing or already done take the no-op action
+    def step(self, actions):
+        env = self.aec_env
+
+        live = set(self.agents)
+        if isinstance(actions, dict):
+            for idx, agent in enumerate(self.possible_agents):
+                env.current_actions[idx] = int(actions.get(agent, 0)) if agent in live else 0
+        else:
+            actions = np.asarray(actions).reshape(len(self.possible_agents))
+            for idx, agent in enumerate(self.possible_agents):
+                env.current_actions[idx] = int(actions[idx]) if agent in live else 0
+
+        env._advance()
+
+        start = env._timers.now()
+        observations = {agent: env.observe(agent) for agent in self.agents}
+        rewards = {agent: env.rewards[agent] for agent in self.agents}
+        terminations = {agent: env.terminations[agent] for agent in self.agents}
+        truncations = {agent: env.truncations[agent] for agent in self.agents}
+        infos = {agent: dict(env.infos[agent]) for agent in self.agents}
+
+        self.agents = [agent for agent in self.agents if not (terminations[agent] or truncations[agent])]
+        env._timers.record('parallel_outputs', start)
+
+        if self.render_mode == "human":
+            self.render()
+
+        return observations, rewards, terminations, truncations, infos
+
+    def state(self):
+        return self.aec_env.state()
+
+    def snapshot(self, out=None):
+        return self.aec_env.snapshot(out)
+
+    def restore(self, snapshot):
+        env = self.aec_env
+        env.restore(snapshot)
+        self.agents = [agent for agent in env.agents if not (env.terminations[agent] or env.truncations[agent])]
+
+    def perf_stats(self, reset=False):
+        return self.aec_env.perf_stats(reset)
+
+    def render(self):
+        return self.aec_env.render()
+
+    def close(self):
+        self.aec_env.close()
+
+
+# Snapshots of several envs stacked into a (B, L) uint64 array
+def snapshot_batch(envs):
+    snapshots = None
+    for b, env in enumerate(envs):
+        if snapshots is None:
+            snapshots = np.empty((len(envs),) + env.snapshot().shape, dtype=np.uint64)
+        env.snapshot(out=snapshots[b])
+    return snapshots
+
+
+# Restore envs from a (B, L) batch of snapshots, or restore a single (L,) snapshot into every env
+def restore_batch(envs, snapshots):
+    snapshots = np.asarray(snapshots, dtype=np.uint64)
+    if snapshots.ndim == 1:
+        snapshots = np.broadcast_to(snapshots, (len(envs),) + snapshots.shape)
+    if len(snapshots) != len(envs):
+        raise ValueError("Provide one snapshot per env or a single snapshot for all of them.")
+    for env, snapshot in zip(envs, snapshots):
+        env.restore(snapshot)
+
+
+class ProfilingWrapper(BaseWrapper):  # outermost wrapper timing the AEC API calls, including the PettingZoo wrappers below it
+    def step(self, action):
+        timers = self.unwrapped._timers
+        start = timers.now()
+        super().step(action)
+        timers.record('api_step', start)
+
+    def observe(self, agent):
+        timers = self.unwrapped._timers
+        start = timers.now()
+        observation = super().observe(agent)
+        timers.record('api_observe', start)
+        return observation
@@ -0,0 +1,137 @@
+import numpy as np
+
+
+class UniformGrid:  # static uniform-grid index over 2-D points for fixed-radius queries
+    def __init__(self, points, cell_size):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.cell_size = float(cell_size)
+
+        # grid covers the bounding box of the points
+        self.origin = self.points.min(axis=0) if len(self.points) else np.zeros(2)
+        extent = self.points.max(axis=0) - self.origin if len(self.points) else np.zeros(2)
+        self.shape = (np.floor(extent / self.cell_size).astype(int) + 1)
+
+        cells = self._cell_ids(self._cell_coords(self.points))
+        num_cells = int(np.prod(self.shape))
+        counts = np.bincount(cells, minlength=num_cells)
+        self.max_occupancy = int(counts.max()) if len(cells) else 0
+
+        # dense (num_cells + 1, max_occupancy) table of point indices padded with -1, and the positions of
+        # those points padded with inf; the last row is an empty cell that stands in for cells outside the grid
+        order = np.argsort(cells, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        slots = np.arange(len(cells)) - starts[cells[order]]
+        self.table = np.full((num_cells + 1, max(self.max_occupancy, 1)), -1, dtype=np.int64)
+        self.table[cells[order], slots] = order
+        self.table_points = np.full(self.table.shape + (2,), np.inf)
+        self.table_points[cells[order], slots] = self.points[order]
+        self._empty_cell = num_cells
+
+        offsets = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+        self._offsets = offsets
+
+    def _cell_coords(self, points):
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def _cell_ids(self, coords):
+        return coords[..., 0] * self.shape[1] + coords[..., 1]
+
+    # Cell ids of the 3x3 block of cells around each query, shape (Q, 9); cells outside the grid map to an empty cell
+    def _block_cells(self, queries):
+        coords = self._cell_coords(queries)[:, None, :] + self._offsets[None, :, :]
+        valid = np.all((coords >= 0) & (coords < self.shape), axis=-1)
+        return np.where(valid, self._cell_ids(coords), self._empty_cell)
+
+    # Indices of all points in the 3x3 block of cells around each query, shape (Q, 9 * max_occupancy), -1 padded
+    def candidates(self, queries):
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        return self.table[self._block_cells(queries)].reshape(len(queries), -1)
+
+    # Candidate indices and their positions, shape (Q, C, 2); missing candidates are at infinity
+    def candidate_positions(self, queries):
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        cells = self._block_cells(queries)
+        return self.table[cells].reshape(len(queries), -1), self.table_points[cells].reshape(len(queries), -1, 2)
+
+    # Candidate indices and their distances to each query; missing candidates are at infinite distance
+    def candidate_distances(self, queries):
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        candidates, positions = self.candidate_positions(queries)
+        delta = positions - queries[:, None, :]
+        dx, dy = delta[..., 0], delta[..., 1]
+        return candidates, np.sqrt(dx * dx + dy * dy)
+
+    # Distance to the nearest point, exact whenever that distance is at most cell_size (inf beyond the 3x3 block)
+    def min_distance(self, queries):
+        _, dist = self.candidate_distances(queries)
+        if dist.shape[1] == 0:
+            return np.full(len(dist), np.inf)
+        return dist.min(axis=1)
+
+    # The k nearest points within radius (at most cell_size) of each query, nearest first;
+    # indices of shape (Q, k) padded with -1 and distances padded with inf
+    def nearest(self, queries, k, radius=None):
+        radius = self.cell_size if radius is None else float(radius)
+        if radius > self.cell_size:
+            raise ValueError("nearest can only search within cell_size of the queries.")
+        candidates, dist = self.candidate_distances(queries)
+        dist[dist > radius] = np.inf
+        if dist.shape[1] < k:
+            padding = k - dist.shape[1]
+            candidates = np.pad(candidates, ((0, 0), (0, padding)), constant_values=-1)
+            dist = np.pad(dist, ((0, 0), (0, padding)), constant_values=np.inf)
+
+        rows = np.arange(len(dist))[:, None]
+        if dist.shape[1] > 4 * k:
+            # only sort the k closest candidates of wide candidate blocks
+            closest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            order = closest[rows, np.argsort(dist[rows, closest], axis=1, kind='stable')]
+        else:
+            order = np.argsort(dist, axis=1, kind='stable')[:, :k]
+        candidates = candidates[rows, order]
+        dist = dist[rows, order]
+        candidates[np.isinf(dist)] = -1
+        return candidates, dist
+
+
+# Distance from each query to its nearest point, shape (Q,)
+def min_distance(queries, points, index=None):
+    if index is not None:
+        return index.min_distance(queries)
+    if len(points) == 0:
+        return np.full(len(queries), np.inf)
+    delta = queries[:, None, :] - points[None, :, :]
+    return np.sqrt(np.sum(np.square(delta), axis=-1)).min(axis=1)
+
+
+class NeighborList:  # Verlet list of candidate point pairs, rebuilt only after points moved more than half the skin
+    def __init__(self, cutoff, skin):
+        self.cutoff = float(cutoff)
+        self.skin = float(skin)
+        self.num_builds = 0
+        self._reference = None
+        self._pairs = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+    # Candidate pairs (i, j) with i < j; every pair closer than cutoff is guaranteed to be included
+    def update(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        if self._needs_rebuild(points):
+            self._build(points)
+        return self._pairs
+
+    def _needs_rebuild(self, points):
+        if self._reference is None or len(self._reference) != len(points):
+            return True
+        displacement_sq = np.sum(np.square(points - self._reference), axis=1)
+        return displacement_sq.max(initial=0.0) > (0.5 * self.skin) ** 2
+
+    def _build(self, points):
+        radius = self.cutoff + self.skin
+        grid = UniformGrid(points, radius)
+        candidates, dist = grid.candidate_distances(points)
+
+        rows = np.broadcast_to(np.arange(len(points))[:, None], candidates.shape)
+        keep = (candidates > rows) & (dist <= radius)
+        self._pairs = (rows[keep], candidates[keep])
+        self._reference = points.copy()
+        self.num_builds += 1
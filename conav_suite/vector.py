@@ -0,0 +1,302 @@
+import ctypes
+import multiprocessing as mp
+
+import numpy as np
+
+from .conav_suite import raw_env
+from .utils.profiling import merge_stats
+
+
+# Shared-memory arrays written by the workers and read in place by the main process
+def _shared_array(ctx, shape, dtype):
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape)) * dtype.itemsize
+    return ctx.RawArray(ctypes.c_uint8, max(size, 1))
+
+
+def _as_array(raw, shape, dtype):
+    dtype = np.dtype(dtype)
+    count = int(np.prod(shape))
+    return np.frombuffer(raw, dtype=dtype, count=count).reshape(shape)
+
+
+# Normalize a problem instance schedule into one list of instances per worker
+def _make_schedule(problem_instances, num_envs):
+    if isinstance(problem_instances, str):
+        return [[problem_instances] for _ in range(num_envs)]
+
+    if len(problem_instances) != num_envs:
+        raise ValueError("problem_instances must be a single name or provide one entry per worker.")
+
+    schedule = []
+    for entry in problem_instances:
+        entry = [entry] if isinstance(entry, str) else list(entry)
+        if len(entry) == 0:
+            raise ValueError("Each worker must be scheduled at least one problem_instance.")
+        schedule.append(entry)
+    return schedule
+
+
+def _worker(index, env_fn, env_kwargs, schedule, buffers, shapes, pipe, parent_pipe):
+    parent_pipe.close()
+
+    # each worker only touches its own row of the shared batch buffers
+    views = {name: _as_array(buffers[name], shape, dtype)[index] for name, (shape, dtype) in shapes.items()}
+    observations = views['observations']
+    final_observations = views['final_observations']
+    states = views['states']
+    rewards = views['rewards']
+    terminations = views['terminations']
+    truncations = views['truncations']
+
+    env = env_fn(**env_kwargs)
+    episode = 0
+
+    def write_observations(target):
+        for i, agent in enumerate(env.possible_agents):
+            env.observe(agent, out=target[i])
+
+    def reset(seed=None, problem_instance=None):
+        nonlocal episode
+        if problem_instance is None:
+            problem_instance = schedule[episode % len(schedule)]
+            episode += 1
+        env.reset(seed=seed, options={'problem_instance': problem_instance})
+        write_observations(observations)
+        states[:] = env.state()
+        return problem_instance
+
+    try:
+        while True:
+            command, data = pipe.recv()
+
+            if command == 'reset':
+                seed, problem_instance = data
+                problem_instance = reset(seed, problem_instance)
+                rewards[:] = 0
+                terminations[:] = False
+                truncations[:] = False
+                pipe.send(('ok', {'problem_instance': problem_instance}))
+
+            elif command == 'step':
+                env.current_actions = [int(action) for action in data]
+                env._advance()
+                for i, agent in enumerate(env.possible_agents):
+                    rewards[i] = env.rewards[agent]
+                    terminations[i] = env.terminations[agent]
+                    truncations[i] = env.truncations[agent]
+
+                info = {'problem_instance': env.world.problem_instance, 'episode_done': False}
+                if env.profile_infos:
+                    info['perf'] = {phase: elapsed / 1e9 for phase, elapsed in env._timers.last_ns.items()}
+                if np.all(terminations | truncations):
+                    # keep the final observation, then start the next scheduled episode
+                    write_observations(final_observations)
+                    info['episode_done'] = True
+                    info['problem_instance'] = reset()
+                else:
+                    write_observations(observations)
+                pipe.send(('ok', info))
+
+            elif command == 'restore':
+                env.restore(data)
+                for i, agent in enumerate(env.possible_agents):
+                    rewards[i] = env.rewards[agent]
+                    terminations[i] = env.terminations[agent]
+                    truncations[i] = env.truncations[agent]
+                write_observations(observations)
+                pipe.send(('ok', {'problem_instance': env.world.problem_instance}))
+
+            elif command == 'call':
+                name, args, kwargs = data
+                pipe.send(('ok', getattr(env, name)(*args, **kwargs)))
+
+            elif command == 'close':
+                env.close()
+                pipe.send(('ok', None))
+                break
+
+            else:
+                raise ValueError(f"Unknown command {command!r}.")
+
+    except (KeyboardInterrupt, EOFError):
+        pass
+    except Exception as error:
+        pipe.send(('error', f"{type(error).__name__}: {error}"))
+    finally:
+        pipe.close()
+
+
+class AsyncVectorEnv:
+    def __init__(
+        self,
+        num_envs,
+        problem_instances,
+        env_fn=raw_env,
+        env_kwargs=None,
+        context=None,
+    ):
+        self.num_envs = num_envs
+        self.env_kwargs = dict(env_kwargs or {})
+        self.schedule = _make_schedule(problem_instances, num_envs)
+
+        # build one env locally to size the shared buffers
+        probe = env_fn(**self.env_kwargs)
+        self.possible_agents = probe.possible_agents[:]
+        self.num_agents = len(self.possible_agents)
+        self.observation_space = probe.observation_space(self.possible_agents[0])
+        self.action_space = probe.action_space(self.possible_agents[0])
+        self.state_space = probe.state_space
+        self.obs_dim = self.observation_space.shape[0]
+        self.state_dim = self.state_space.shape[0]
+        probe.close()
+
+        ctx = mp.get_context(context)
+        self._shapes = {
+            'observations': ((num_envs, self.num_agents, self.obs_dim), np.float32),
+            'final_observations': ((num_envs, self.num_agents, self.obs_dim), np.float32),
+            'states': ((num_envs, self.state_dim), np.float32),
+            'rewards': ((num_envs, self.num_agents), np.float32),
+            'terminations': ((num_envs, self.num_agents), np.bool_),
+            'truncations': ((num_envs, self.num_agents), np.bool_),
+        }
+        self._buffers = {name: _shared_array(ctx, shape, dtype) for name, (shape, dtype) in self._shapes.items()}
+
+        # zero-copy views of the shared blocks; they are overwritten in place by every step
+        self.observations = _as_array(self._buffers['observations'], *self._shapes['observations'])
+        self.final_observations = _as_array(self._buffers['final_observations'], *self._shapes['final_observations'])
+        self.states = _as_array(self._buffers['states'], *self._shapes['states'])
+        self.rewards = _as_array(self._buffers['rewards'], *self._shapes['rewards'])
+        self.terminations = _as_array(self._buffers['terminations'], *self._shapes['terminations'])
+        self.truncations = _as_array(self._buffers['truncations'], *self._shapes['truncations'])
+
+        self._pipes = []
+        self._processes = []
+        for k in range(num_envs):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                name=f"AsyncVectorEnv-{k}",
+                args=(
+                    k,
+                    env_fn,
+                    self.env_kwargs,
+                    self.schedule[k],
+                    self._buffers,
+                    self._shapes,
+                    child_pipe,
+                    parent_pipe,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self._pipes.append(parent_pipe)
+            self._processes.append(process)
+
+        self._waiting = False
+        self.closed = False
+
+    # A worker that died cannot receive the command, _receive reports it along with the other workers
+    def _send(self, pipe, command):
+        try:
+            pipe.send(command)
+        except OSError:
+            pass
+
+    # Every pipe is drained before raising, so replies of the other workers are not read as answers to the next command
+    def _receive(self):
+        results, errors = [], []
+        for k, pipe in enumerate(self._pipes):
+            try:
+                status, data = pipe.recv()
+            except (EOFError, OSError):
+                # the worker process died without replying, e.g. it crashed or was killed
+                process = self._processes[k]
+                process.join(timeout=1.0)
+                status, data = 'error', f"exited unexpectedly with exit code {process.exitcode}"
+            if status == 'error':
+                errors.append(f"worker {k}: {data}")
+            results.append(data)
+        self._waiting = False
+        if errors:
+            raise RuntimeError(f"AsyncVectorEnv workers failed: {'; '.join(errors)}")
+        return results
+
+    # Seeds are offset per worker; problem_instance overrides the schedule for this reset only
+    def reset(self, seed=None, problem_instance=None):
+        for k, pipe in enumerate(self._pipes):
+            worker_seed = None if seed is None else seed + k
+            self._send(pipe, ('reset', (worker_seed, problem_instance)))
+        infos = self._receive()
+        return self.observations, infos
+
+    # Actions have shape (K, num_agents) and are the only per-step data sent to the workers
+    def step_async(self, actions):
+        actions = np.asarray(actions).reshape(self.num_envs, self.num_agents)
+        for pipe, worker_actions in zip(self._pipes, actions):
+            self._send(pipe, ('step', worker_actions))
+        self._waiting = True
+
+    def step_wait(self):
+        infos = self._receive()
+        return self.observations, self.rewards, self.terminations, self.truncations, infos
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    # Call a method on every worker env and return the (small) results
+    def call(self, name, *args, **kwargs):
+        for pipe in self._pipes:
+            self._send(pipe, ('call', (name, args, kwargs)))
+        return self._receive()
+
+    # Snapshots of every worker env, shape (K, L); see SimpleEnv.snapshot
+    def snapshot(self):
+        return np.stack(self.call('snapshot'))
+
+    # Restore every worker from a (K, L) batch of snapshots or from a single (L,) snapshot, e.g. to branch
+    # K rollouts from one state; observations, rewards and episode status are rewritten from the restored state
+    def restore(self, snapshots):
+        snapshots = np.asarray(snapshots, dtype=np.uint64)
+        if snapshots.ndim == 1:
+            snapshots = np.broadcast_to(snapshots, (self.num_envs,) + snapshots.shape)
+        for pipe, snapshot in zip(self._pipes, snapshots):
+            self._send(pipe, ('restore', np.ascontiguousarray(snapshot)))
+        infos = self._receive()
+        return self.observations, infos
+
+    # Per-phase timing stats of every worker (envs built with profile=True) and their aggregate
+    def perf_stats(self, reset=False):
+        workers = self.call('perf_stats', reset)
+        return {'workers': workers, 'total': merge_stats(workers)}
+
+    # Top-down frames of every worker env, rasterized in parallel without pygame, shape (K, H, W, 3)
+    def render(self):
+        return np.stack(self.call('draw'))
+
+    def close(self):
+        if self.closed:
+            return
+        if self._waiting:
+            try:
+                self._receive()
+            except RuntimeError:
+                pass
+        for pipe in self._pipes:
+            # workers that failed or died have already exited
+            self._send(pipe, ('close', None))
+        for pipe in self._pipes:
+            try:
+                pipe.recv()
+            except (EOFError, OSError):
+                pass
+            pipe.close()
+        for process in self._processes:
+            process.join()
+        self.closed = True
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()